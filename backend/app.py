@@ -5,7 +5,9 @@ from flask import Flask
 from flask_cors import CORS
 
 from src.api import api_blueprint
+from src.constants import CREDENTIALS_PATH
 from src.logger_config import logger
+from src.service_pool import warm_up_service_pool
 
 app = Flask(__name__)
 
@@ -17,12 +19,15 @@ CORS(app, resources={r'/api/*': {'origins': '*'}}, supports_credentials=True)
 
 app.register_blueprint(api_blueprint)
 
-if not os.path.exists('creds/credentials.json'):
+if not os.path.exists(CREDENTIALS_PATH):
     logger.error('credentials.json file not found.')
     logger.error('Please download the credentials.json file from Google Cloud Console.')
     logger.error('Place credentials.json to creds/ directory.')
     logger.error('See README.md for more information.')
     sys.exit(1)
 
+# Parse the discovery document before the first request arrives
+warm_up_service_pool()
+
 if __name__ == '__main__':
     app.run(port=5000, debug=True)
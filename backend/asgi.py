@@ -0,0 +1,59 @@
+"""
+ASGI entry point, serve with: uvicorn asgi:app
+
+The calendar list, event list and event item resources are served on the event
+loop by src.async_api, so hundreds of requests can wait for Google at the same
+time in one process. Every other resource is served by the Flask app of app.py
+in a thread pool. Needs the optional dependencies: pip install .[async]
+"""
+
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount, Route
+
+from app import app as flask_app
+from src.async_api import CalendarList, EventItem, EventList
+from src.async_client import close_async_client
+from src.constants import CACHE_HEADER, NEXT_CURSOR_HEADER, TRUNCATED_HEADER
+
+# Event sub-resources served by Flask, matched before the event item path
+FLASK_EVENT_RESOURCES = ('stats', 'suggest', 'overlaps', 'batch', 'bulk-delete')
+
+wsgi_app = WSGIMiddleware(flask_app)
+
+
+@asynccontextmanager
+async def lifespan(_):
+    yield
+    await close_async_client()
+
+
+routes = [
+    Route('/api/calendars/', CalendarList),
+    Route('/api/events/{calendar_id}/', EventList),
+    *(
+        Route(f'/api/events/{{calendar_id}}/{name}/', wsgi_app)
+        for name in FLASK_EVENT_RESOURCES
+    ),
+    Route('/api/events/{calendar_id}/{event_id}/', EventItem),
+    Mount('/', wsgi_app),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=['*'],
+            allow_methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
+            allow_headers=['Content-Type', 'Authorization', 'If-Match', 'If-None-Match'],
+            expose_headers=[TRUNCATED_HEADER, CACHE_HEADER, NEXT_CURSOR_HEADER, 'ETag'],
+        )
+    ],
+    lifespan=lifespan,
+)
+app.state.wsgi_app = wsgi_app
@@ -0,0 +1,63 @@
+"""
+Benchmark of the computed event properties of a 10k-event list.
+
+Compares the batch EventPropertiesEngine with the previous per-event
+implementation, which parsed every time twice and formatted it with
+babel.dates.format_datetime, and checks that the results are identical.
+
+Usage: python -m benchmarks.event_properties [--events 10000] [--repeat 10]
+"""
+
+import argparse
+import copy
+import timeit
+from datetime import datetime
+
+from benchmarks.serialization import make_events
+from src.event_properties import update_events_properties
+from src.serialization import dumps
+from src.utils import format_event_time_from_iso
+
+COMPUTED = ('formatted_start', 'formatted_end', 'duration')
+
+
+def legacy_update_event_properties(event: dict):
+    """The per-event implementation replaced by EventPropertiesEngine."""
+    start = event['start'].get('dateTime', event['start'].get('date'))
+    end = event['end'].get('dateTime', event['end'].get('date'))
+    event['formatted_start'] = format_event_time_from_iso(start)
+    event['formatted_end'] = format_event_time_from_iso(end)
+    time_difference = datetime.fromisoformat(end) - datetime.fromisoformat(start)
+    event['duration'] = time_difference.total_seconds() / 3600
+    return event
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    for event in events:
+        for name in COMPUTED:
+            del event[name]
+
+    legacy = [legacy_update_event_properties(event) for event in copy.deepcopy(events)]
+    engine = update_events_properties(copy.deepcopy(events))
+    assert dumps(legacy) == dumps(engine), 'Results differ'
+
+    cases = {
+        'per-event update_event_properties': lambda: [
+            legacy_update_event_properties(event) for event in events
+        ],
+        'EventPropertiesEngine': lambda: update_events_properties(events),
+    }
+    print(f'{args.events} events, best of {args.repeat} runs, identical output')
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f'{name:<36} {best * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the JSON serialization of a 10k-event response.
+
+Compares src.serialization (orjson when installed) with the standard library
+json module that the responses were serialized with before.
+
+Usage: python -m benchmarks.serialization [--events 10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+
+from src import serialization
+
+
+def make_events(count: int) -> list[dict]:
+    """Returns count events shaped like the events of the event list response."""
+    start = datetime(2024, 1, 1, 9)
+    events = []
+    for i in range(count):
+        event_start = start + timedelta(hours=i * 5)
+        event_end = event_start + timedelta(hours=1, minutes=30)
+        events.append(
+            {
+                'kind': 'calendar#event',
+                'etag': f'"{3400000000000000 + i}"',
+                'id': f'event{i:08d}',
+                'status': 'confirmed',
+                'htmlLink': f'https://www.google.com/calendar/event?eid=event{i:08d}',
+                'created': '2024-01-01T08:00:00.000Z',
+                'updated': '2024-01-01T08:00:00.000Z',
+                'summary': f'Event {i % 50}',
+                'description': 'Weekly meeting – agenda in the shared document',
+                'location': 'Helsinki',
+                'start': {
+                    'dateTime': event_start.isoformat() + '+02:00',
+                    'timeZone': 'Europe/Helsinki',
+                },
+                'end': {
+                    'dateTime': event_end.isoformat() + '+02:00',
+                    'timeZone': 'Europe/Helsinki',
+                },
+                'formatted_start': event_start.strftime('%d.%m.%Y %H:%M'),
+                'formatted_end': event_end.strftime('%d.%m.%Y %H:%M'),
+                'duration': 1.5,
+            }
+        )
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    backend = 'orjson' if serialization.orjson is not None else 'json (fallback)'
+    cases = {
+        'json.dumps (response)': lambda: json.dumps(events),
+        f'dumps, {backend}': lambda: serialization.dumps(events),
+        'json.dumps indent=2 (file)': lambda: json.dumps(
+            events, indent=2, ensure_ascii=False
+        ),
+        f'dumps_pretty, {backend}': lambda: serialization.dumps_pretty(events),
+    }
+
+    print(f'{args.events} events, best of {args.repeat} runs')
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f'{name:<32} {best * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
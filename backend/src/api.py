@@ -5,9 +5,22 @@ API Blueprint and API resources
 from flask import Blueprint, Response
 from flask_restful import Api
 
+from src.compression import compress_response
+from src.constants import CACHE_HEADER, NEXT_CURSOR_HEADER, TRUNCATED_HEADER
+
 # Import collections
 from src.resources.calendar import CalendarList, CalendarListId
-from src.resources.event import EventItem, EventList
+from src.resources.event import (
+    EventBatch,
+    EventBulkDelete,
+    EventItem,
+    EventList,
+    EventOverlaps,
+    EventStats,
+    EventSuggest,
+)
+from src.resources.freeslots import FreeSlots
+from src.resources.metrics import Metrics
 
 api_blueprint = Blueprint('api', __name__, url_prefix='/api')
 api = Api(api_blueprint)
@@ -17,9 +30,14 @@ api = Api(api_blueprint)
 def after_request(response: Response) -> Response:
     header = response.headers
     header['Access-Control-Allow-Origin'] = '*'
-    header['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    header['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-    return response
+    header['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
+    header['Access-Control-Allow-Headers'] = (
+        'Content-Type, Authorization, If-Match, If-None-Match'
+    )
+    header['Access-Control-Expose-Headers'] = ', '.join(
+        (TRUNCATED_HEADER, CACHE_HEADER, NEXT_CURSOR_HEADER, 'ETag')
+    )
+    return compress_response(response)
 
 
 # Add resources
@@ -27,8 +45,16 @@ api.add_resource(CalendarList, '/calendars/', methods=['GET'])
 api.add_resource(CalendarListId, '/calendars/id/', methods=['GET'])
 
 api.add_resource(EventList, '/events/<calendar_id>/', methods=['GET', 'POST'])
+api.add_resource(EventStats, '/events/<calendar_id>/stats/', methods=['GET'])
+api.add_resource(EventSuggest, '/events/<calendar_id>/suggest/', methods=['GET'])
+api.add_resource(EventOverlaps, '/events/<calendar_id>/overlaps/', methods=['GET'])
+api.add_resource(EventBatch, '/events/<calendar_id>/batch/', methods=['POST'])
+api.add_resource(EventBulkDelete, '/events/<calendar_id>/bulk-delete/', methods=['POST'])
 api.add_resource(
     EventItem,
     '/events/<calendar_id>/<event_id>/',
-    methods=['GET', 'PUT', 'DELETE'],
+    methods=['GET', 'PUT', 'PATCH', 'DELETE'],
 )
+
+api.add_resource(FreeSlots, '/freeslots/', methods=['GET'])
+api.add_resource(Metrics, '/metrics/', methods=['GET'])
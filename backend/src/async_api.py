@@ -0,0 +1,260 @@
+"""
+Async resources of the ASGI entry point (asgi.py).
+
+The calendar list, event list and event item resources are served by the
+asyncio services, so a request that waits for Google does not hold a thread.
+They respond like the Flask resources in src.resources, with the same error
+bodies (src.error), ETags (src.etag) and compression (src.compression).
+Streamed event lists are handed to the Flask app that asgi.py mounts for the
+other resources.
+"""
+
+from starlette.endpoints import HTTPEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.compression import (
+    choose_encoding,
+    compress_body,
+    compression_stats,
+    encoded_etag,
+    is_compressible,
+)
+from src.constants import (
+    CACHE_HEADER,
+    JSON,
+    MASON,
+    NDJSON,
+    NEXT_CURSOR_HEADER,
+    TRUNCATED_HEADER,
+)
+from src.error import APIError, ParameterError, error_body
+from src.etag import compute_etag, etag_matches, event_etag, upstream_etag
+from src.logger_config import logger
+from src.projection import parse_fields
+from src.resources.event import get_list_query, get_page_params, get_time_range
+from src.serialization import dumps
+from src.services.async_calendar import get_calendar_list
+from src.services.async_event import (
+    create_event,
+    delete_event,
+    get_event,
+    get_events,
+    get_events_from_calendars,
+    parse_calendar_ids,
+    update_event,
+)
+
+
+def _compress(request: Request, response: Response):
+    """
+    Compresses the body of the response like src.compression.compress_response.
+    Returns the encoding, or None if the body was not compressed.
+    """
+    if not is_compressible(response.media_type, response.status_code, response.headers):
+        return None
+
+    response.headers.add_vary_header('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    compressed = compress_body(response.body, encoding) if encoding else None
+    if compressed is None:
+        compression_stats.record_skipped()
+        return None
+
+    response.body = compressed
+    response.headers['Content-Length'] = str(len(compressed))
+    response.headers['Content-Encoding'] = encoding
+    return encoding
+
+
+def json_response(
+    request: Request, data, status: int = 200, mimetype: str = MASON, etag: str = None
+) -> Response:
+    """
+    Returns a response with the data serialized as the body, compressed with
+    the encoding negotiated with the client, and the ETag (without quotes)
+    of the representation.
+    """
+    response = Response(dumps(data), status_code=status, media_type=mimetype)
+    encoding = _compress(request, response)
+    if etag is not None:
+        if encoding is not None:
+            etag = encoded_etag(etag, encoding)
+        response.headers['ETag'] = f'"{etag}"'
+    return response
+
+
+def create_error_response(request: Request, status_code, title, message=None):
+    """Returns a Mason error response, see src.error.create_error_response."""
+    body = error_body(request.url.path, title, message)
+    return json_response(request, body, status=status_code)
+
+
+def error_response(request: Request, error: Exception) -> Response:
+    """Returns the error response of an exception raised by a service."""
+    if isinstance(error, APIError):
+        return create_error_response(
+            request, error.status_code, error.title, error.message
+        )
+    if isinstance(error, ParameterError):
+        return create_error_response(request, 400, 'Bad Request', error.message)
+    logger.error('An unhandled error occurred: %s', error)
+    return create_error_response(request, 500, 'Internal Server Error', str(error))
+
+
+def etag_response(request: Request, data, etag: str) -> Response:
+    """
+    Returns the data with its ETag, or a bodyless 304 Not Modified response if
+    the If-None-Match header matches the ETag, see src.etag.not_modified.
+    """
+    if etag_matches(etag, request.headers.get('If-None-Match')):
+        return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+    return json_response(request, data, etag=etag)
+
+
+async def _read_json(request: Request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise ParameterError('Request body must be valid JSON')
+
+
+def _wants_stream(request: Request) -> bool:
+    # The Flask resource validates the stream format
+    accept = request.headers.get('Accept', '').split(',')[0].split(';')[0].strip()
+    return 'stream' in request.query_params or accept == NDJSON
+
+
+class CalendarList(HTTPEndpoint):
+    async def get(self, request: Request) -> Response:
+        """
+        Returns the list of calendars.
+        The cached list is reloaded with the refresh=true query parameter.
+        """
+        refresh = request.query_params.get('refresh', 'false').lower() == 'true'
+        try:
+            calendars = await get_calendar_list(refresh=refresh)
+            return etag_response(request, calendars, compute_etag(calendars))
+        except Exception as e:
+            return error_response(request, e)
+
+
+class EventList(HTTPEndpoint):
+    """Resource for a list of calendar events."""
+
+    async def get(self, request: Request):
+        """Returns the calendar events for the specified time range."""
+        if _wants_stream(request):
+            # Events are streamed by the Flask app while the pages arrive
+            return request.app.state.wsgi_app
+
+        calendar_id = request.path_params['calendar_id']
+        args = request.query_params
+        try:
+            start_date, end_date = get_time_range(args)
+            fields = parse_fields(args.get('fields'))
+            page_params = get_page_params(args)
+            params = dict(
+                start_date=start_date,
+                end_date=end_date,
+                search_query=args.get('search_query'),
+                fields=fields,
+                **page_params,
+            )
+            # The same query gets the same ETag as from the Flask resource
+            query = get_list_query(fields, page_params)
+            calendar_ids = await parse_calendar_ids(calendar_id)
+            if calendar_ids is not None:
+                events = await get_events_from_calendars(calendar_ids, **params)
+                body = {'items': events, 'errors': events.errors or {}}
+                etag = compute_etag(events + [body['errors']], query)
+                response = etag_response(request, body, etag)
+            else:
+                events = await get_events(calendar_id, **params)
+                response = etag_response(request, events, compute_etag(events, query))
+            if events.truncated:
+                # The page limit was reached before the end of the time range
+                response.headers[TRUNCATED_HEADER] = 'true'
+            if events.cache_status is not None:
+                response.headers[CACHE_HEADER] = events.cache_status.upper()
+            if events.next_cursor is not None:
+                response.headers[NEXT_CURSOR_HEADER] = events.next_cursor
+            return response
+        except Exception as e:
+            return error_response(request, e)
+
+    async def post(self, request: Request) -> Response:
+        """Creates a new calendar event."""
+        if request.headers.get('Content-Type') != JSON:
+            return create_error_response(
+                request, 415, 'Unsupported Media Type', 'Request type must be JSON'
+            )
+
+        try:
+            event = await create_event(
+                request.path_params['calendar_id'],
+                event_body=await _read_json(request),
+                conflicts=request.query_params.get('conflicts'),
+            )
+            return json_response(request, event, mimetype=JSON)
+        except Exception as e:
+            return error_response(request, e)
+
+
+class EventItem(HTTPEndpoint):
+    """Resource for a single calendar event."""
+
+    async def get(self, request: Request) -> Response:
+        """Returns a single calendar event by ID."""
+        try:
+            event = await get_event(
+                request.path_params['calendar_id'], request.path_params['event_id']
+            )
+            return etag_response(request, event, event_etag(event))
+        except Exception as e:
+            return error_response(request, e)
+
+    async def put(self, request: Request) -> Response:
+        """
+        Replaces a calendar event with the request body, the updatable fields
+        that the body leaves out are cleared.
+        """
+        return await self._update(request, replace=True)
+
+    async def patch(self, request: Request) -> Response:
+        """Updates the fields of the request body on a calendar event."""
+        return await self._update(request, replace=False)
+
+    @staticmethod
+    async def _update(request: Request, replace: bool) -> Response:
+        """
+        Updates a calendar event with the request body. An If-Match header with
+        the ETag of the event makes the update conditional, a concurrent
+        modification fails with 412.
+        """
+        if request.headers.get('Content-Type') != JSON:
+            return create_error_response(
+                request, 415, 'Unsupported Media Type', 'Request type must be JSON'
+            )
+
+        try:
+            event = await update_event(
+                request.path_params['calendar_id'],
+                request.path_params['event_id'],
+                event_body=await _read_json(request),
+                etag=upstream_etag(request.headers.get('If-Match')),
+                replace=replace,
+            )
+            return json_response(request, event, etag=event_etag(event))
+        except Exception as e:
+            return error_response(request, e)
+
+    async def delete(self, request: Request) -> Response:
+        """Deletes a single calendar event by ID."""
+        try:
+            await delete_event(
+                request.path_params['calendar_id'], request.path_params['event_id']
+            )
+            return Response('Event deleted successfully', status_code=200)
+        except Exception as e:
+            return error_response(request, e)
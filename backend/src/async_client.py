@@ -0,0 +1,200 @@
+"""
+Asynchronous client of the Google Calendar REST API.
+
+googleapiclient blocks the calling thread for the whole round trip to Google,
+so the threaded services can only have as many requests in flight as there
+are threads. The asyncio services (src.services.async_event and
+src.services.async_calendar) send their requests with one httpx.AsyncClient
+per event loop instead. Its connection pool keeps the connections to
+googleapis.com open between requests, and any number of requests can wait for
+Google at the same time on one thread.
+
+The access token comes from the same credentials as the service pool, see
+src.auth. Loading or refreshing them is blocking I/O and runs in a thread.
+httpx is an optional dependency: pip install .[async]
+Reference: https://developers.google.com/calendar/api/v3/reference
+"""
+
+import asyncio
+from urllib.parse import quote
+
+from src.auth import add_credentials_listener, get_credentials
+from src.constants import (
+    ASYNC_MAX_CONNECTIONS,
+    ASYNC_TIMEOUT,
+    MAX_EVENT_PAGES,
+    MAX_RESULTS_PER_PAGE,
+)
+from src.error import ServiceBuildError
+from src.logger_config import logger
+from src.serialization import loads
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+API_ROOT = 'https://www.googleapis.com/calendar/v3/'
+
+_credentials = None
+_client = None
+_client_loop = None
+
+
+class AsyncHttpError(Exception):
+    """A failed request to the Google Calendar REST API."""
+
+    def __init__(self, status: int, message: str):
+        self.status = status
+        self.message = message
+        super().__init__(f'{status} {message}')
+
+
+def _error_message(response) -> str:
+    # Google describes the error in {"error": {"code": ..., "message": ...}}
+    try:
+        return loads(response.content)['error']['message']
+    except (ValueError, KeyError, TypeError):
+        return response.reason_phrase
+
+
+async def _get_access_token() -> str:
+    """Returns a valid access token, loading or refreshing the credentials if needed."""
+    global _credentials
+    credentials = _credentials
+    if credentials is None or not credentials.valid:
+        credentials = await asyncio.to_thread(get_credentials)
+        if not credentials:
+            raise ServiceBuildError('Missing credentials for the Calendar API client.')
+        _credentials = credentials
+    return credentials.token
+
+
+def _reset_credentials(*_):
+    global _credentials
+    _credentials = None
+
+
+add_credentials_listener(_reset_credentials)
+
+
+class AsyncCalendarClient(object):
+    """Sends authorized requests to the Calendar REST API over a connection pool."""
+
+    def __init__(self, http):
+        self.http = http
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict = None,
+        json: dict = None,
+        headers: dict = None,
+    ):
+        """
+        Sends a request to the path relative to the API root and returns the
+        decoded JSON response, or None for an empty response.
+        Raises:
+            AsyncHttpError: If the API responds with an error or cannot be reached.
+        """
+        token = await _get_access_token()
+        if params is not None:
+            params = {name: value for name, value in params.items() if value is not None}
+        try:
+            response = await self.http.request(
+                method,
+                path,
+                params=params,
+                json=json,
+                headers={'Authorization': f'Bearer {token}', **(headers or {})},
+            )
+        except httpx.HTTPError as e:
+            raise AsyncHttpError(503, f'Google Calendar API is unreachable: {e}')
+        if response.is_error:
+            raise AsyncHttpError(response.status_code, _error_message(response))
+        if not response.content:
+            return None
+        return loads(response.content)
+
+
+def events_path(calendar_id, event_id=None) -> str:
+    """Returns the path of the events of a calendar, or of one of its events."""
+    path = f'calendars/{quote(calendar_id, safe="")}/events'
+    if event_id is not None:
+        path += f'/{quote(event_id, safe="")}'
+    return path
+
+
+async def fetch_event_pages(
+    client: AsyncCalendarClient,
+    calendar_id,
+    max_pages: int = MAX_EVENT_PAGES,
+    **list_params,
+):
+    """
+    Fetches the events of an events list query, following nextPageToken until
+    the last page or until max_pages pages have been fetched, like EventPages.
+    Returns the events, whether the page limit truncated them and the
+    nextSyncToken of the last page.
+    Raises:
+        AsyncHttpError: If the Google Calendar API request fails.
+    """
+    events = []
+    page_token = None
+    page_count = 0
+    while True:
+        result = await client.request(
+            'GET',
+            events_path(calendar_id),
+            params={
+                'maxResults': MAX_RESULTS_PER_PAGE,
+                'pageToken': page_token,
+                **list_params,
+            },
+        )
+        page_count += 1
+        events.extend(result.get('items', []))
+
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return events, False, result.get('nextSyncToken')
+        if max_pages and page_count >= max_pages:
+            logger.warning('Event list truncated after %d pages', page_count)
+            return events, True, None
+
+
+def get_async_client() -> AsyncCalendarClient:
+    """
+    Returns the client of the running event loop, created on first use.
+    Raises:
+        ServiceBuildError: If httpx is not installed.
+    """
+    global _client, _client_loop
+    if httpx is None:
+        raise ServiceBuildError('The async client needs httpx: pip install .[async]')
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        # Connections belong to the event loop that opened them
+        http = httpx.AsyncClient(
+            base_url=API_ROOT,
+            timeout=ASYNC_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_MAX_CONNECTIONS,
+            ),
+        )
+        _client = AsyncCalendarClient(http)
+        _client_loop = loop
+        logger.info('Created the async Calendar API client')
+    return _client
+
+
+async def close_async_client():
+    """Closes the connections of the client, the next request creates a new one."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.http.aclose()
+        _client = None
+        _client_loop = None
+        logger.info('Closed the async Calendar API client')
@@ -0,0 +1,108 @@
+"""
+Asyncio variant of the event sync of src.sync, see src.async_client.
+
+The pages of a full or incremental sync are listed with the async client on
+the event loop, so a sync waits for Google without holding a thread. Only the
+event store is used in a worker thread: reading the sync state and the stored
+events, and writing the synced events, which also notifies the listeners of
+the store (index updates), with the same functions as the threaded sync.
+
+The threaded and the asyncio sync lock a calendar separately. Both may sync it
+at the same time, like the workers sharing the SQLite store, and writing the
+same changes twice leaves the same stored events.
+Reference: https://developers.google.com/calendar/api/guides/sync
+"""
+
+import asyncio
+import weakref
+
+from src.async_client import AsyncCalendarClient, AsyncHttpError, fetch_event_pages
+from src.logger_config import logger
+from src.sync import (
+    CACHE_HIT,
+    CACHE_MISS,
+    forget_calendar,
+    get_sync_state,
+    is_fresh,
+    read_synced_events,
+    store_changes,
+    store_full_sync,
+)
+
+# Locks of the calendars by event loop, a lock belongs to the loop that uses it
+_locks = weakref.WeakKeyDictionary()
+
+
+def _get_lock(calendar_id) -> asyncio.Lock:
+    locks = _locks.setdefault(asyncio.get_running_loop(), {})
+    return locks.setdefault(calendar_id, asyncio.Lock())
+
+
+async def _list_pages(client: AsyncCalendarClient, calendar_id, **list_params):
+    # A sync must see every page, the page limit does not apply
+    events, _, sync_token = await fetch_event_pages(
+        client, calendar_id, max_pages=0, singleEvents='true', **list_params
+    )
+    return events, sync_token
+
+
+async def full_sync(client: AsyncCalendarClient, calendar_id):
+    """Downloads all events of the calendar and replaces the stored events."""
+    logger.info('Full sync of calendar %s', calendar_id)
+    items, sync_token = await _list_pages(client, calendar_id)
+    await asyncio.to_thread(store_full_sync, calendar_id, items, sync_token)
+
+
+async def incremental_sync(client: AsyncCalendarClient, calendar_id, sync_token: str):
+    """Applies the events changed since the sync token to the stored events."""
+    items, next_sync_token = await _list_pages(client, calendar_id, syncToken=sync_token)
+    await asyncio.to_thread(store_changes, calendar_id, items, next_sync_token)
+
+
+async def sync_calendar(
+    client: AsyncCalendarClient, calendar_id, force: bool = False
+) -> str:
+    """
+    Brings the stored events of the calendar up to date, see
+    src.sync.sync_calendar. Returns CACHE_HIT or CACHE_MISS.
+    Raises:
+        AsyncHttpError: If the Google Calendar API request fails.
+    """
+    async with _get_lock(calendar_id):
+        sync_token, synced_at = await asyncio.to_thread(get_sync_state, calendar_id)
+        if is_fresh(synced_at, force):
+            return CACHE_HIT
+
+        if sync_token is None:
+            await full_sync(client, calendar_id)
+            return CACHE_MISS
+
+        try:
+            await incremental_sync(client, calendar_id, sync_token)
+            return CACHE_HIT
+        except AsyncHttpError as error:
+            if error.status != 410:
+                raise
+            # The sync token is no longer valid, start over
+            logger.warning('Sync token of calendar %s expired', calendar_id)
+            await asyncio.to_thread(forget_calendar, calendar_id)
+            await full_sync(client, calendar_id)
+            return CACHE_MISS
+
+
+async def get_synced_events(
+    client: AsyncCalendarClient,
+    calendar_id,
+    start: float,
+    end: float,
+    descending: bool = False,
+):
+    """
+    Syncs the calendar and returns the stored events that overlap the time
+    range [start, end), see src.sync.get_synced_events.
+    """
+    cache_status = await sync_calendar(client, calendar_id)
+    events = await asyncio.to_thread(
+        lambda: list(read_synced_events(calendar_id, start, end, descending))
+    )
+    return events, cache_status
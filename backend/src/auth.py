@@ -1,43 +1,221 @@
 """Authorize the user to Google Calendar API."""
 
+import json
 import os
+import threading
+from datetime import datetime, timezone
 
-from google.auth.exceptions import RefreshError
+from google.auth.exceptions import RefreshError, TransportError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 
-from src.constants import SCOPES
+from src.constants import (
+    CREDENTIALS_PATH,
+    SCOPES,
+    TOKEN_PATH,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_REFRESH_RETRY,
+)
 from src.logger_config import logger
 
+# Callbacks notified with the new credentials whenever they are replaced
+_credentials_listeners = []
 
-def get_credentials() -> Credentials:
+
+def add_credentials_listener(callback):
+    """Registers a callback that is called with the new credentials on change."""
+    _credentials_listeners.append(callback)
+
+
+def _notify_credentials_listeners(creds: Credentials):
+    for callback in _credentials_listeners:
+        callback(creds)
+
+
+class CredentialManager(object):
     """
-    Get the user credentials for the Google Calendar API (OAuth 2.0).
-    The file token.json stores the user's access and refresh tokens, and is
-    created automatically when the authorization flow completes for the first
-    time.
-    """
-    creds = None
-    if os.path.exists('creds/token.json'):
-        creds = Credentials.from_authorized_user_file('creds/token.json', SCOPES)
-        logger.debug('Credentials loaded from token.json')
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            logger.error('Credentials expired, refreshing')
-            logger.debug('Credentials: %s', creds)
+    Keeps the user credentials in memory and refreshes the access token in a
+    background thread shortly before it expires, so that requests never wait
+    for a token refresh round trip or token file I/O.
+
+    A lock makes sure that only one thread loads or refreshes the credentials
+    at a time. The token file is written only when the token has changed.
+    The HTTP transports of the services refresh through the manager as well,
+    see ManagedCredentials.
+    """
+
+    def __init__(
+        self,
+        token_path: str = TOKEN_PATH,
+        refresh_margin: int = TOKEN_REFRESH_MARGIN,
+        retry_interval: int = TOKEN_REFRESH_RETRY,
+    ):
+        self.token_path = token_path
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._stored_token = None
+        self._timer = None
+
+    def get(self) -> Credentials:
+        """Returns valid credentials, loading or refreshing them only if needed."""
+        creds = self._credentials
+        if creds is not None and creds.valid:
+            return creds
+
+        with self._lock:
+            if self._credentials is None:
+                self._load()
+            if not self._credentials or not self._credentials.valid:
+                self._refresh()
+            return self._credentials
+
+    def refresh(self):
+        """
+        Refreshes the access token, called by the background timer. A failed
+        refresh is retried after retry_interval seconds, whatever the error.
+        """
+        with self._lock:
+            try:
+                self._refresh(interactive=False)
+            except (RefreshError, TransportError) as e:
+                logger.error('Background token refresh failed: %s', e)
+            except Exception as e:
+                logger.exception('Background token refresh failed: %s', e)
+            finally:
+                # A successful refresh has scheduled the next one
+                if self._timer is None or self._timer is threading.current_thread():
+                    self._schedule_refresh(self.retry_interval)
+
+    def refresh_rejected(self, token: str):
+        """
+        Refreshes the access token after the API rejected it, unless another
+        thread has already replaced it.
+        """
+        with self._lock:
+            creds = self._credentials
+            if creds is not None and creds.valid and creds.token != token:
+                return
+            self._refresh(interactive=False)
+
+    def stop(self):
+        """Cancels the scheduled background refresh."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _load(self):
+        """Loads the credentials from the token file. Caller holds the lock."""
+        if not os.path.exists(self.token_path):
+            return
+        with open(self.token_path, encoding='utf-8') as token:
+            self._stored_token = token.read()
+        self._credentials = Credentials.from_authorized_user_info(
+            json.loads(self._stored_token), SCOPES
+        )
+        logger.debug('Credentials loaded from %s', self.token_path)
+        # An expired token is refreshed by the caller, which schedules the next one
+        if self._credentials.valid:
+            self._schedule_refresh()
+
+    def _refresh(self, interactive: bool = True):
+        """
+        Refreshes the access token, or runs the authorization flow if the
+        credentials cannot be refreshed. Caller holds the lock.
+        """
+        creds = self._credentials
+        if creds and creds.refresh_token:
+            logger.info('Refreshing the access token')
             try:
                 creds.refresh(Request())
             except RefreshError as e:
+                if not interactive:
+                    raise
                 logger.error('Token has been expired or revoked. %s', e)
                 logger.info('Guiding user to authenticate again.')
                 creds = auth_flow()
-        else:
+        elif interactive:
             creds = auth_flow()
-        with open('creds/token.json', 'w') as token:
-            token.write(creds.to_json())
-            logger.debug('Credentials written to token.json')
+        else:
+            return
 
+        if creds is None:
+            return
+        if creds is not self._credentials:
+            self._credentials = creds
+            _notify_credentials_listeners(creds)
+        self._store()
+        self._schedule_refresh()
+
+    def _store(self):
+        """Writes the credentials to the token file if the token has changed."""
+        token_json = self._credentials.to_json()
+        if token_json == self._stored_token:
+            return
+        with open(self.token_path, 'w', encoding='utf-8') as token:
+            token.write(token_json)
+        self._stored_token = token_json
+        logger.debug('Credentials written to %s', self.token_path)
+
+    def _schedule_refresh(self, delay: float = None):
+        """Schedules the background refresh ahead of the token expiry."""
+        self.stop()
+        if delay is None:
+            expiry = self._credentials.expiry if self._credentials else None
+            if expiry is None or not self._credentials.refresh_token:
+                return
+            # google-auth keeps the expiry as a naive UTC datetime
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            remaining = (expiry - now).total_seconds()
+            delay = max(remaining - self.refresh_margin, 0)
+
+        self._timer = threading.Timer(delay, self.refresh)
+        self._timer.daemon = True
+        self._timer.start()
+        logger.debug('Token refresh scheduled in %d seconds', delay)
+
+
+class ManagedCredentials(object):
+    """
+    The credentials of the credential manager for an HTTP transport such as
+    google_auth_httplib2.AuthorizedHttp. The transport refreshes its
+    credentials before a request when they have expired, and after a 401
+    response. Both refreshes go through the manager, one at a time under its
+    lock, and the refreshed token is written to the token file once.
+    """
+
+    def __init__(self, manager: CredentialManager):
+        self._manager = manager
+        # The access token sent with the last request of the transport
+        self._token = None
+
+    def before_request(self, request, method, url, headers):
+        """Adds the authorization header of valid credentials to the request."""
+        creds = self._manager.get()
+        self._token = creds.token
+        creds.apply(headers)
+
+    def refresh(self, request):
+        """Refreshes the access token that the API rejected."""
+        self._manager.refresh_rejected(self._token)
+
+    def __getattr__(self, name):
+        return getattr(self._manager.get(), name)
+
+
+credential_manager = CredentialManager()
+
+
+def get_credentials() -> Credentials:
+    """
+    Get the user credentials for the Google Calendar API (OAuth 2.0).
+    The file token.json stores the user's access and refresh tokens, and is
+    created automatically when the authorization flow completes for the first
+    time. The credentials are kept in memory by the credential manager.
+    """
+    creds = credential_manager.get()
     logger.debug('Credentials fetched successfully')
     return creds
 
@@ -47,7 +225,7 @@ def auth_flow() -> Credentials:
     Run the authorization flow for the user to access Google Calendar API.
     """
     logger.debug('Running the authorization flow')
-    flow = InstalledAppFlow.from_client_secrets_file('creds/credentials.json', SCOPES)
+    flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
     creds = flow.run_local_server(open_browser=False, port=0)
     if creds and creds.valid:
         logger.info('Authorization flow completed')
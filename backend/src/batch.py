@@ -0,0 +1,70 @@
+"""
+Batching of Google Calendar API calls.
+
+Many calls are sent as batch HTTP requests, one round trip per batch instead
+of one per call. Google limits the number of calls in a single batch request.
+Reference: https://developers.google.com/calendar/api/guides/batch
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from src.constants import BATCH_SIZE
+from src.logger_config import logger
+
+
+def execute_in_batches(
+    service_factory, make_request, items, batch_size: int = None, max_workers: int = 1
+):
+    """
+    Sends one API call per item in batch requests of at most batch_size calls.
+    With max_workers > 1 up to max_workers batch requests are in flight at a
+    time, each sent from its own thread with that thread's service.
+
+    service_factory() returns the service of the calling thread, and
+    make_request(service, item) returns the unexecuted request for the item.
+
+    Returns a (response, exception) tuple for each item, in the order of the
+    items. Exactly one of the two is None.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    results = [None] * len(items)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    def execute_batch(indexes):
+        service = service_factory()
+        batch = service.new_batch_http_request(callback=callback)
+        for index in indexes:
+            batch.add(make_request(service, items[index]), request_id=str(index))
+        try:
+            batch.execute()
+        except HttpError as error:
+            # The whole batch request failed, so did every call in it
+            logger.error('Batch request of %d calls failed: %s', len(indexes), error)
+            for index in indexes:
+                results[index] = (None, error)
+        logger.debug('Batch request of %d calls executed', len(indexes))
+
+    chunks = [
+        range(offset, min(offset + batch_size, len(items)))
+        for offset in range(0, len(items), batch_size)
+    ]
+    if max_workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            execute_batch(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # list() re-raises the first exception of a worker, if any
+            list(executor.map(execute_batch, chunks))
+
+    return results
+
+
+def error_status(exception: Exception) -> int:
+    """Returns the HTTP status code of a failed call in a batch."""
+    if isinstance(exception, HttpError):
+        return exception.resp.status
+    return 500
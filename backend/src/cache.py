@@ -0,0 +1,102 @@
+"""In-process caches with time-to-live expiry and hit/miss statistics."""
+
+import threading
+import time
+
+# All caches by name, for reporting their statistics
+_caches = {}
+
+
+class TTLCache(object):
+    """
+    Thread-safe cache whose entries expire ttl seconds after they were loaded.
+    Cached values are shared between callers and must not be modified.
+
+    The entries are kept in the order they were stored, which is also the
+    order they expire in, so expired entries are dropped from the front when
+    a value is stored. With max_size the oldest entries are evicted beyond it.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key, loader, refresh: bool = False):
+        """
+        Returns the cached value of the key. Expired or missing values, and all
+        values when refresh is set, are loaded by calling loader().
+        """
+        entry = self._lookup(key, refresh)
+        if entry is not None:
+            return entry[1]
+
+        # Loaded without holding the lock, the loader usually does network I/O
+        value = loader()
+        self._store(key, value)
+        return value
+
+    async def get_async(self, key, loader, refresh: bool = False):
+        """Like get, but the value is loaded by awaiting loader()."""
+        entry = self._lookup(key, refresh)
+        if entry is not None:
+            return entry[1]
+
+        value = await loader()
+        self._store(key, value)
+        return value
+
+    def _lookup(self, key, refresh: bool):
+        # Returns the unexpired entry of the key and counts the hit or miss
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _store(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            # Moves the key to the end, the entries stay in expiry order
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl, value)
+            while self._entries:
+                oldest = next(iter(self._entries))
+                expired = self._entries[oldest][0] <= now
+                if not expired and (
+                    self.max_size is None or len(self._entries) <= self.max_size
+                ):
+                    break
+                del self._entries[oldest]
+
+    def invalidate(self, key=None):
+        """Drops one or all entries."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss statistics of the cache."""
+        requests = self.hits + self.misses
+        return {
+            'ttl': self.ttl,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else None,
+        }
+
+
+def get_cache_stats() -> dict:
+    """Returns the statistics of all caches by name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
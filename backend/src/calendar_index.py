@@ -0,0 +1,75 @@
+"""Per-calendar indexes of events, kept up to date by the event changes."""
+
+import threading
+
+
+class CalendarIndexes(object):
+    """
+    The indexes of the calendars, updated by the event changes. An index has
+    apply(changed, deleted), expired() and the number of indexed events as len().
+
+    Each index remembers the event store version it is up to date with. The
+    changes written by this process move it along, while a store version that
+    skips ahead was written by another worker sharing the store, and the index
+    is loaded again.
+    """
+
+    def __init__(self):
+        # (index, store version) by calendar ID
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, calendar_id, loader, version: int = None):
+        """
+        Returns the index of the calendar. A missing or expired index, or one
+        that is not up to date with the store version, is loaded by calling
+        loader(), without holding the lock. The version is read before the
+        index is loaded, an index loaded from a newer store is loaded again
+        on the next call.
+        """
+        with self._lock:
+            entry = self._indexes.get(calendar_id)
+        if entry is not None and not entry[0].expired() and entry[1] == version:
+            return entry[0]
+
+        index = loader()
+        with self._lock:
+            self._indexes[calendar_id] = (index, version)
+        return index
+
+    def apply_changes(
+        self, calendar_id, changed, deleted, full: bool, version: int = None
+    ):
+        """Event listener, see src.sync.add_event_listener."""
+        with self._lock:
+            entry = self._indexes.get(calendar_id)
+            if entry is None:
+                return
+            index, index_version = entry
+            # Missed changes of other workers when the version skips ahead
+            missed = (
+                version is not None
+                and index_version is not None
+                and version != index_version + 1
+            )
+            if full or missed:
+                # Loaded again from the stored events on the next query
+                del self._indexes[calendar_id]
+                return
+            if version is not None:
+                self._indexes[calendar_id] = (index, version)
+        index.apply(changed, deleted)
+
+    def clear(self):
+        """Drops the indexes of all calendars."""
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> dict:
+        """Returns the number of indexed calendars and events."""
+        with self._lock:
+            indexes = [index for index, _ in self._indexes.values()]
+        return {
+            'calendars': len(indexes),
+            'events': sum(len(index) for index in indexes),
+        }
@@ -0,0 +1,206 @@
+"""
+Negotiated gzip and brotli compression of API responses.
+
+The encoding is chosen from the Accept-Encoding header of the request. Brotli
+is only offered when the optional brotli package is installed. Buffered
+responses are compressed when they are at least COMPRESSION_MIN_SIZE bytes,
+streamed responses are compressed chunk by chunk and flushed after every chunk
+so that the client still receives the events while they are fetched.
+
+compress_response compresses the responses of the Flask app. The ASGI
+resources of src.async_api build their responses from the same negotiation
+(choose_encoding), the same checks (is_compressible) and the same buffered
+compression (compress_body).
+"""
+
+import threading
+import time
+import zlib
+
+from flask import Response, request
+from werkzeug.http import parse_accept_header
+
+from src.constants import (
+    BROTLI_QUALITY,
+    COMPRESSION,
+    COMPRESSION_MIN_SIZE,
+    GZIP_LEVEL,
+    JSON,
+    MASON,
+    NDJSON,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+ENCODINGS = (BROTLI, GZIP)
+
+COMPRESSIBLE_MIMETYPES = (MASON, JSON, NDJSON)
+
+
+class CompressionStats(object):
+    """Thread-safe counters of the compressed responses of each encoding."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.skipped = 0
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_time: float):
+        with self._lock:
+            stats = self._stats.setdefault(
+                encoding,
+                {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0},
+            )
+            stats['responses'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['cpu_seconds'] += cpu_time
+
+    def record_skipped(self):
+        with self._lock:
+            self.skipped += 1
+
+    def stats(self) -> dict:
+        """Returns the counters with the compression ratio (bytes in / bytes out)."""
+        with self._lock:
+            encodings = {
+                encoding: dict(
+                    stats,
+                    ratio=stats['bytes_in'] / stats['bytes_out']
+                    if stats['bytes_out']
+                    else None,
+                )
+                for encoding, stats in self._stats.items()
+            }
+            return {'skipped': self.skipped, 'encodings': encodings}
+
+
+compression_stats = CompressionStats()
+
+
+def get_compression_stats() -> dict:
+    """Returns the compression statistics of the process."""
+    return compression_stats.stats()
+
+
+def _compressor(encoding: str):
+    """Returns (compress, flush, finish) functions of a streaming compressor."""
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits=31 writes the gzip header and trailer
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    Returns the preferred encoding accepted by the Accept-Encoding header of
+    the client, or None.
+    """
+    available = [
+        encoding for encoding in ENCODINGS if encoding != BROTLI or brotli is not None
+    ]
+    return parse_accept_header(accept_encoding).best_match(available)
+
+
+def is_compressible(mimetype: str, status_code: int, headers) -> bool:
+    """Returns whether a response with the mimetype, status and headers is compressed."""
+    return (
+        COMPRESSION
+        and mimetype in COMPRESSIBLE_MIMETYPES
+        and status_code >= 200
+        and status_code not in (204, 304)
+        and 'Content-Encoding' not in headers
+    )
+
+
+def compress_body(data: bytes, encoding: str):
+    """
+    Returns the buffered response body compressed with the encoding, or None
+    if it is smaller than COMPRESSION_MIN_SIZE bytes.
+    """
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return None
+
+    started = time.thread_time()
+    compress, _, finish = _compressor(encoding)
+    compressed = compress(data) + finish()
+    compression_stats.record(
+        encoding, len(data), len(compressed), time.thread_time() - started
+    )
+    return compressed
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Returns the ETag (without quotes) of the representation in the encoding."""
+    # Every encoding is a different representation with its own strong ETag
+    return f'{etag}-{encoding}'
+
+
+def _compress_streamed(response: Response, encoding: str):
+    chunks = response.iter_encoded()
+
+    def generate():
+        compress, flush, finish = _compressor(encoding)
+        bytes_in = bytes_out = 0
+        cpu_time = 0.0
+        try:
+            for chunk in chunks:
+                started = time.thread_time()
+                compressed = compress(chunk) + flush()
+                cpu_time += time.thread_time() - started
+                bytes_in += len(chunk)
+                bytes_out += len(compressed)
+                yield compressed
+            started = time.thread_time()
+            compressed = finish()
+            cpu_time += time.thread_time() - started
+            bytes_out += len(compressed)
+            yield compressed
+        finally:
+            compression_stats.record(encoding, bytes_in, bytes_out, cpu_time)
+
+    response.response = generate()
+    response.headers.pop('Content-Length', None)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compresses the response body with the encoding negotiated with the client.
+    Used as an after_request handler.
+    """
+    if response.direct_passthrough or not is_compressible(
+        response.mimetype, response.status_code, response.headers
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        compression_stats.record_skipped()
+        return response
+
+    if response.is_streamed:
+        _compress_streamed(response, encoding)
+    else:
+        compressed = compress_body(response.get_data(), encoding)
+        if compressed is None:
+            compression_stats.record_skipped()
+            return response
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(encoded_etag(etag, encoding), weak=weak)
+    return response
@@ -3,13 +3,113 @@ import os
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+CREDENTIALS_PATH = 'creds/credentials.json'
+TOKEN_PATH = 'creds/token.json'
+
+# Seconds before the access token expires when it is refreshed in the background
+TOKEN_REFRESH_MARGIN = int(os.getenv('TOKEN_REFRESH_MARGIN', '300'))
+# Seconds to wait before retrying a failed background token refresh
+TOKEN_REFRESH_RETRY = int(os.getenv('TOKEN_REFRESH_RETRY', '60'))
+
 # Timezone of the calendar, default is Europe/Helsinki (+2 GMT)
 TIMEZONE = os.getenv('TZ', 'Europe/Helsinki')
 
 MASON = 'application/vnd.mason+json'
 JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
 
 ERROR_PROFILE = '/profiles/error/'
 
+TRUNCATED_HEADER = 'X-Events-Truncated'
+CACHE_HEADER = 'X-Cache'
+
 TIME_FORMAT_PROMPT = '%Y-%m-%d %H:%M'
 TIME_FORMAT_CONSOLE = '%d.%m.%Y %H.%M'
+
+# Largest page size accepted by events().list()
+MAX_RESULTS_PER_PAGE = 2500
+# Maximum number of pages fetched for a single event list, 0 for no limit
+MAX_EVENT_PAGES = int(os.getenv('MAX_EVENT_PAGES', '40'))
+
+# Number of events serialized per chunk of a streamed response
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '100'))
+
+# Serve events from the local event store kept up to date with incremental sync
+EVENT_SYNC = os.getenv('EVENT_SYNC', 'true').lower() == 'true'
+# Seconds after a sync during which the stored events are served without syncing
+SYNC_INTERVAL = int(os.getenv('SYNC_INTERVAL', '30'))
+
+# Event store backend, 'sqlite' (persistent, shared between workers) or 'memory'
+EVENT_STORE = os.getenv('EVENT_STORE', 'sqlite')
+EVENT_STORE_PATH = os.getenv('EVENT_STORE_PATH', 'src/output/events.sqlite3')
+# Seconds to wait for a lock held by another worker on the SQLite database
+SQLITE_TIMEOUT = float(os.getenv('SQLITE_TIMEOUT', '30'))
+# Number of rows fetched at a time while iterating query results
+SQLITE_FETCH_SIZE = 500
+
+# Seconds the calendar list and calendar metadata are cached
+CALENDAR_CACHE_TTL = int(os.getenv('CALENDAR_CACHE_TTL', '300'))
+
+# Maximum number of calls sent in one batch request, Google recommends at most 50
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '50'))
+# Maximum number of batch requests in flight at a time during a bulk delete
+BULK_DELETE_CONCURRENCY = int(os.getenv('BULK_DELETE_CONCURRENCY', '4'))
+# What creating an event that overlaps existing events does: ignore, flag or reject
+EVENT_CONFLICTS = os.getenv('EVENT_CONFLICTS', 'ignore')
+# Calendars fetched at the same time by a multi-calendar event list
+MULTI_CALENDAR_CONCURRENCY = int(os.getenv('MULTI_CALENDAR_CONCURRENCY', '4'))
+# Maximum number of open connections to Google of the async client (ASGI server)
+ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', '100'))
+# Seconds the async client waits for Google before the request fails
+ASYNC_TIMEOUT = float(os.getenv('ASYNC_TIMEOUT', '30'))
+
+# Time range used when a query selects events without a start or end date
+RANGE_START = '1970-01-01T00:00:00Z'
+RANGE_END = '2100-01-01T00:00:00Z'
+
+# Event fields that can be changed with a partial update (UpdateEventRequestBody)
+UPDATABLE_EVENT_FIELDS = (
+    'summary',
+    'description',
+    'location',
+    'start',
+    'end',
+    'colorId',
+    'transparency',
+    'visibility',
+    'reminders',
+)
+
+# Compress responses with gzip or brotli when the client accepts it
+COMPRESSION = os.getenv('COMPRESSION', 'true').lower() == 'true'
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+# gzip compression level (1-9) and brotli quality (0-11)
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+# Debug dumps of API results in src/output/: 'on', 'sampled' or 'off'
+OUTPUT_DUMPS = os.getenv('OUTPUT_DUMPS', 'on').lower()
+# Fraction of the dumps written in 'sampled' mode
+OUTPUT_SAMPLE_RATE = float(os.getenv('OUTPUT_SAMPLE_RATE', '0.1'))
+# Maximum number of files waiting to be written, further dumps are dropped
+OUTPUT_QUEUE_SIZE = int(os.getenv('OUTPUT_QUEUE_SIZE', '16'))
+
+# Maximum number of events on one page of a paginated event list
+MAX_EVENT_LIMIT = int(os.getenv('MAX_EVENT_LIMIT', '2500'))
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# Seconds the event statistics of a time range are cached
+EVENT_STATS_CACHE_TTL = int(os.getenv('EVENT_STATS_CACHE_TTL', '300'))
+# Maximum number of cached event statistics, the oldest are evicted beyond it
+EVENT_STATS_CACHE_SIZE = int(os.getenv('EVENT_STATS_CACHE_SIZE', '256'))
+
+# Days of past events analyzed for popular and recent event summaries
+HISTORY_DAYS = int(os.getenv('HISTORY_DAYS', '365'))
+# Seconds the summary index of a calendar is used when EVENT_SYNC is disabled
+HISTORY_CACHE_TTL = int(os.getenv('HISTORY_CACHE_TTL', '300'))
+
+# Days after which the weight of a summary in the suggestions halves
+SUGGEST_HALF_LIFE_DAYS = float(os.getenv('SUGGEST_HALF_LIFE_DAYS', '30'))
+# Maximum number of summary suggestions per request
+MAX_SUGGESTIONS = int(os.getenv('MAX_SUGGESTIONS', '50'))
@@ -1,10 +1,17 @@
-import json
-
 from flask import Response, request
 
-from src.constants import ERROR_PROFILE, MASON
+from src.constants import ERROR_PROFILE
 from src.logger_config import logger
 from src.mason import MasonBuilder
+from src.serialization import json_response
+
+
+def error_body(resource_url: str, title: str, message=None) -> MasonBuilder:
+    """Returns the Mason body of an error response of the resource."""
+    body = MasonBuilder(resource_url=resource_url)
+    body.add_error(title, message)
+    body.add_control('profile', href=ERROR_PROFILE)
+    return body
 
 
 class ServiceBuildError(Exception):
@@ -16,11 +23,8 @@ class ServiceBuildError(Exception):
         super().__init__(self.message)
 
     def to_response(self):
-        resource_url = request.path
-        body = MasonBuilder(resource_url=resource_url)
-        body.add_error('Service Build Error', self.message)
-        body.add_control('profile', href=ERROR_PROFILE)
-        return Response(json.dumps(body), status=500, mimetype=MASON)
+        body = error_body(request.path, 'Service Build Error', self.message)
+        return json_response(body, status=500)
 
 
 class ParameterError(Exception):
@@ -32,11 +36,8 @@ class ParameterError(Exception):
         super().__init__(self.message)
 
     def to_response(self):
-        resource_url = request.path
-        body = MasonBuilder(resource_url=resource_url)
-        body.add_error('Bad Request', self.message)
-        body.add_control('profile', href=ERROR_PROFILE)
-        return Response(json.dumps(body), status=400, mimetype=MASON)
+        body = error_body(request.path, 'Bad Request', self.message)
+        return json_response(body, status=400)
 
 
 class APIError(Exception):
@@ -51,11 +52,8 @@ class APIError(Exception):
 
     def to_response(self):
         logger.error('%s, %s', self.title, self.message)
-        resource_url = request.path
-        body = MasonBuilder(resource_url=resource_url)
-        body.add_error(self.title, self.message)
-        body.add_control('profile', href=ERROR_PROFILE)
-        return Response(json.dumps(body), status=self.status_code, mimetype=MASON)
+        body = error_body(request.path, self.title, self.message)
+        return json_response(body, status=self.status_code)
 
 
 def create_error_response(status_code, title, message=None) -> Response:
@@ -70,8 +68,5 @@ def create_error_response(status_code, title, message=None) -> Response:
     Returns:
     - A Response object with the error message.
     """
-    resource_url = request.path
-    body = MasonBuilder(resource_url=resource_url)
-    body.add_error(title, message)
-    body.add_control('profile', href=ERROR_PROFILE)
-    return Response(json.dumps(body), status_code, mimetype=MASON)
+    body = error_body(request.path, title, message)
+    return json_response(body, status=status_code)
@@ -0,0 +1,92 @@
+"""
+Entity tags and conditional GET requests.
+
+The ETag of a response is derived from the data it is built from, before the
+body is serialized: the etag (version) that Google keeps for every event and
+calendar list entry. A request whose If-None-Match header matches the current
+ETag gets a bodyless 304 Not Modified response.
+
+A single event is served with the etag of Google as its ETag, so a client can
+send it back as If-Match on an update, see upstream_etag.
+Reference: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/ETag
+"""
+
+import hashlib
+
+from flask import Response, request
+
+from src.compression import ENCODINGS, encoded_etag
+from src.serialization import dumps
+
+
+def _version(item: dict) -> str:
+    # Google etags change on every modification, so does the updated time
+    version = item.get('etag') or item.get('updated')
+    if version is None:
+        return dumps(item, sort_keys=True).decode()
+    return f'{item.get("id")}:{version}'
+
+
+def compute_etag(items, query: dict = None) -> str:
+    """
+    Returns a strong ETag (without quotes) for a resource or a list of them.
+    The normalized query parameters that shape the representation, such as
+    the fields projection, sorting and paging, are part of the ETag, so the
+    same events served with another projection or order get another ETag.
+    """
+    if isinstance(items, dict):
+        items = [items]
+    digest = hashlib.sha1()
+    if query:
+        digest.update(dumps(query, sort_keys=True))
+        digest.update(b'\n')
+    for item in items:
+        digest.update(_version(item).encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def event_etag(event: dict) -> str:
+    """Returns the ETag (without quotes) of a single event, the etag of Google."""
+    if event.get('etag'):
+        return event['etag'].strip('"')
+    return compute_etag(event)
+
+
+def upstream_etag(if_match: str):
+    """
+    Returns the etag of Google for an If-Match header that holds the ETag of a
+    single event, see event_etag, without the suffix of a compressed
+    representation. Returns None without a header.
+    """
+    if not if_match:
+        return None
+    etag = if_match.strip().removeprefix('W/').strip('"')
+    for encoding in ENCODINGS:
+        etag = etag.removesuffix(f'-{encoding}')
+    return f'"{etag}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Returns whether an If-None-Match header matches the ETag of any
+    representation, comparing weak and strong ETags alike.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')}
+    # Compressed representations carry the encoding as a suffix of the ETag
+    etags = [etag] + [encoded_etag(etag, encoding) for encoding in ENCODINGS]
+    return '*' in tags or any(tag in tags for tag in etags)
+
+
+def not_modified(etag: str):
+    """
+    Returns a 304 Not Modified response if the If-None-Match header of the
+    request matches the ETag of any representation, otherwise None.
+    """
+    if not etag_matches(etag, request.headers.get('If-None-Match')):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
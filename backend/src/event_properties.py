@@ -0,0 +1,92 @@
+"""
+Computed properties added to the events returned by the API.
+
+The properties of a whole event list are computed by one EventPropertiesEngine.
+The engine compiles the Babel pattern 'EEE dd.MM.yyyy HH:mm' once, split in a
+date part and a time part, and memoizes each: events of the same day share the
+formatted date, and there are only 1440 distinct times of day. Every distinct
+start or end string is parsed only once, back-to-back and all-day events share
+them. The output is the same as format_event_time_from_iso in src.utils.
+"""
+
+from datetime import datetime
+
+from babel import Locale
+from babel.dates import parse_pattern
+
+# The fields of the two parts are independent, together they format
+# 'EEE dd.MM.yyyy HH:mm' with a space in between
+DATE_PATTERN = parse_pattern('EEE dd.MM.yyyy')
+TIME_PATTERN = parse_pattern('HH:mm')
+EVENT_TIME_LOCALE = Locale.parse('en_US')
+
+
+class EventPropertiesEngine(object):
+    """
+    Adds the computed properties to events, memoizing the parsed and formatted
+    times. Use one engine per event list, the memo grows with the list.
+    """
+
+    def __init__(self):
+        self._times = {}
+        self._dates = {}
+        self._times_of_day = {}
+
+    def format_time(self, date: datetime) -> str:
+        """Formats the time as 'Day DD.MM.YYYY HH:MM'."""
+        day = date.date()
+        formatted_date = self._dates.get(day)
+        if formatted_date is None:
+            formatted_date = DATE_PATTERN.apply(date, EVENT_TIME_LOCALE)
+            self._dates[day] = formatted_date
+
+        time_of_day = (date.hour, date.minute)
+        formatted_time = self._times_of_day.get(time_of_day)
+        if formatted_time is None:
+            formatted_time = TIME_PATTERN.apply(date, EVENT_TIME_LOCALE)
+            self._times_of_day[time_of_day] = formatted_time
+
+        return f'{formatted_date} {formatted_time}'
+
+    def parse_time(self, event_time: str) -> tuple[datetime, str]:
+        """Returns the parsed and the formatted event time of an ISO string."""
+        parsed = self._times.get(event_time)
+        if parsed is None:
+            date = datetime.fromisoformat(event_time)
+            parsed = (date, self.format_time(date))
+            self._times[event_time] = parsed
+        return parsed
+
+    def update(self, event: dict) -> dict:
+        """Updates the properties of a single calendar event."""
+        start, formatted_start = self.parse_time(
+            event['start'].get('dateTime', event['start'].get('date'))
+        )
+        end, formatted_end = self.parse_time(
+            event['end'].get('dateTime', event['end'].get('date'))
+        )
+        event['formatted_start'] = formatted_start
+        event['formatted_end'] = formatted_end
+
+        # Calculate the duration of the event in hours
+        event['duration'] = (end - start).total_seconds() / 3600
+        return event
+
+
+def update_event_properties(event: dict):
+    """Updates the properties of a single calendar event."""
+    return EventPropertiesEngine().update(event)
+
+
+def update_events_properties(events) -> list[dict]:
+    """Updates the properties of every event of the list."""
+    update = EventPropertiesEngine().update
+    return [update(event) for event in events]
+
+
+def iter_event_properties(pages):
+    """Yields the events of the pages with the computed properties added."""
+    update = EventPropertiesEngine().update
+    for page in pages:
+        for event in page:
+            yield update(event)
@@ -0,0 +1,458 @@
+"""
+Local store of the events synced from the Google Calendar API.
+
+The store keeps the events of each calendar together with the sync token that
+the next incremental sync continues from. Events are stored with the computed
+properties already added. Two implementations share the same interface:
+MemoryEventStore keeps the events in process memory and SQLiteEventStore
+persists them in an SQLite database.
+
+Every write that changes the events of a calendar increments the version of
+the calendar and returns the new version. The SQLite store is shared between
+workers, so a version that moved by more than the writes of this process
+tells that another worker changed the events.
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytz
+
+from src.constants import (
+    EVENT_STORE,
+    EVENT_STORE_PATH,
+    SQLITE_FETCH_SIZE,
+    SQLITE_TIMEOUT,
+    TIMEZONE,
+)
+from src.serialization import dumps, loads
+
+
+def to_timestamp(event_time: dict) -> float:
+    """
+    Returns the POSIX timestamp of an event start or end.
+    A dateTime without an offset is local time in the timeZone of the event
+    time, or TIMEZONE. All-day events only have a date, which is taken as
+    midnight in TIMEZONE.
+    """
+    if 'dateTime' in event_time:
+        date_time = datetime.fromisoformat(event_time['dateTime'])
+        if date_time.tzinfo is None:
+            zone = pytz.timezone(event_time.get('timeZone') or TIMEZONE)
+            date_time = zone.localize(date_time)
+        return date_time.timestamp()
+    date = datetime.fromisoformat(event_time['date'])
+    return pytz.timezone(TIMEZONE).localize(date).timestamp()
+
+
+def to_rfc3339(timestamp: float) -> str:
+    """Returns the RFC3339 time in UTC of a POSIX timestamp."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+def event_time_range(event: dict) -> tuple[float, float]:
+    """Returns the start and end timestamps of the event."""
+    return to_timestamp(event['start']), to_timestamp(event['end'])
+
+
+def event_key(event: dict) -> tuple[float, float, str]:
+    """Returns the sort key of the event: start and end timestamps and ID."""
+    start, end = event_time_range(event)
+    return start, end, event['id']
+
+
+def matches_query(event: dict, search_query: str) -> bool:
+    """
+    Returns whether every word of the search query occurs in the summary,
+    description or location of the event, ignoring case. This approximates the
+    free text search (q) of the Google Calendar API for locally stored events.
+    """
+    text = ' '.join(
+        event.get(field, '') for field in ('summary', 'description', 'location')
+    ).casefold()
+    return all(word in text for word in search_query.casefold().split())
+
+
+def _start(key: tuple[float, float, str]) -> float:
+    return key[0]
+
+
+class _CalendarEvents(object):
+    """
+    The events of one calendar by ID, with their sort keys (see event_key)
+    kept sorted. An event overlaps a time range [start, end) only if it starts
+    before end and at most the longest event duration before start, so a range
+    query reads one slice of the keys found by binary search.
+    """
+
+    def __init__(self, events=()):
+        self.events = {event['id']: event for event in events}
+        self.keys = sorted(event_key(event) for event in self.events.values())
+        # Deleting events leaves it as an upper bound
+        self.max_duration = max((end - start for start, end, _ in self.keys), default=0)
+
+    def put(self, event: dict):
+        self.remove(event['id'])
+        key = event_key(event)
+        self.events[event['id']] = event
+        bisect.insort(self.keys, key)
+        self.max_duration = max(self.max_duration, key[1] - key[0])
+
+    def remove(self, event_id) -> bool:
+        event = self.events.pop(event_id, None)
+        if event is None:
+            return False
+        del self.keys[bisect.bisect_left(self.keys, event_key(event))]
+        return True
+
+    def overlapping(self, start: float, end: float, descending: bool) -> list[dict]:
+        low = bisect.bisect_left(self.keys, start - self.max_duration, key=_start)
+        high = bisect.bisect_left(self.keys, end, key=_start)
+        keys = [key for key in self.keys[low:high] if key[1] > start]
+        if descending:
+            keys.reverse()
+        return [self.events[event_id] for _, _, event_id in keys]
+
+
+class MemoryEventStore(object):
+    """
+    Event store that keeps the events in process memory.
+    The events returned by the store are shared and must not be modified.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = {}
+        self._sync_state = {}
+        self._versions = {}
+
+    def _bump_version(self, calendar_id) -> int:
+        # Called holding the lock
+        version = self._versions.get(calendar_id, 0) + 1
+        self._versions[calendar_id] = version
+        return version
+
+    def get_version(self, calendar_id) -> int:
+        """Returns the version of the stored events of the calendar, 0 if unwritten."""
+        return self._versions.get(calendar_id, 0)
+
+    def get_sync_state(self, calendar_id) -> tuple[str, float]:
+        """Returns the sync token and the time of the last sync of the calendar."""
+        return self._sync_state.get(calendar_id, (None, None))
+
+    def set_sync_state(self, calendar_id, sync_token: str):
+        """Records a completed sync of the calendar."""
+        with self._lock:
+            self._sync_state[calendar_id] = (sync_token, time.time())
+
+    def replace(self, calendar_id, events, sync_token: str) -> int:
+        """Replaces all events of the calendar after a full sync."""
+        calendar_events = _CalendarEvents(events)
+        with self._lock:
+            self._events[calendar_id] = calendar_events
+            self._sync_state[calendar_id] = (sync_token, time.time())
+            return self._bump_version(calendar_id)
+
+    def apply(self, calendar_id, changed, deleted, sync_token: str) -> int:
+        """
+        Applies the events changed and the IDs of the events deleted since the
+        last sync of a synced calendar, and records the sync.
+        """
+        with self._lock:
+            calendar_events = self._events.setdefault(calendar_id, _CalendarEvents())
+            for event_id in deleted:
+                calendar_events.remove(event_id)
+            for event in changed:
+                calendar_events.put(event)
+            self._sync_state[calendar_id] = (sync_token, time.time())
+            return self._bump_version(calendar_id)
+
+    def upsert(self, calendar_id, event: dict) -> int:
+        """
+        Inserts or replaces a single event of a synced calendar.
+        Returns None if the calendar is not synced.
+        """
+        with self._lock:
+            if calendar_id not in self._events:
+                return None
+            self._events[calendar_id].put(event)
+            return self._bump_version(calendar_id)
+
+    def delete(self, calendar_id, event_id) -> int:
+        """Deletes a single event of a synced calendar."""
+        return self.delete_many(calendar_id, [event_id])
+
+    def delete_many(self, calendar_id, event_ids) -> int:
+        """
+        Deletes events of a synced calendar by ID.
+        Returns None if none of the events is stored.
+        """
+        with self._lock:
+            calendar_events = self._events.get(calendar_id)
+            if calendar_events is None:
+                return None
+            deleted = [calendar_events.remove(event_id) for event_id in event_ids]
+            if not any(deleted):
+                return None
+            return self._bump_version(calendar_id)
+
+    def clear(self, calendar_id=None):
+        """Forgets the events and the sync state of one or all calendars."""
+        with self._lock:
+            if calendar_id is None:
+                self._events.clear()
+                self._sync_state.clear()
+                for calendar_id in self._versions:
+                    self._bump_version(calendar_id)
+            else:
+                self._events.pop(calendar_id, None)
+                self._sync_state.pop(calendar_id, None)
+                self._bump_version(calendar_id)
+
+    def query(
+        self, calendar_id, start: float, end: float, descending: bool = False
+    ) -> list[dict]:
+        """
+        Returns the events of the calendar that overlap the time range
+        [start, end), sorted by start time, end time and ID (oldest first,
+        or newest first when descending).
+        """
+        with self._lock:
+            calendar_events = self._events.get(calendar_id)
+            if calendar_events is None:
+                return []
+            return calendar_events.overlapping(start, end, descending)
+
+
+class SQLiteEventStore(object):
+    """
+    Event store that keeps the events in an SQLite database, so that the synced
+    events survive process restarts and are shared between gunicorn workers.
+
+    Events are indexed on calendar ID and start/end time for range queries.
+    The longest event duration of each calendar bounds the start of the events
+    that overlap a time range from below as well, so a query reads one range of
+    the index. Deleting events leaves the duration as an upper bound.
+    The database is opened in WAL mode so that readers never block the writer.
+    Every thread uses its own connection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            calendar_id TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            start_ts REAL NOT NULL,
+            end_ts REAL NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (calendar_id, event_id)
+        );
+        CREATE INDEX IF NOT EXISTS events_time_range
+            ON events (calendar_id, start_ts, end_ts);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            calendar_id TEXT PRIMARY KEY,
+            sync_token TEXT,
+            synced_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS versions (
+            calendar_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS durations (
+            calendar_id TEXT PRIMARY KEY,
+            max_duration REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(self.SCHEMA)
+            if connection.execute('SELECT 1 FROM durations LIMIT 1').fetchone() is None:
+                # Events stored before the durations were kept
+                connection.execute(
+                    'INSERT OR IGNORE INTO durations '
+                    'SELECT calendar_id, MAX(end_ts - start_ts) FROM events '
+                    'GROUP BY calendar_id'
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _row(calendar_id, event: dict) -> tuple:
+        start, end = event_time_range(event)
+        return calendar_id, event['id'], start, end, dumps(event).decode()
+
+    @staticmethod
+    def _bump_version(connection, calendar_id) -> int:
+        # Called in the transaction of the write
+        connection.execute(
+            'INSERT INTO versions VALUES (?, 1) '
+            'ON CONFLICT (calendar_id) DO UPDATE SET version = version + 1',
+            (calendar_id,),
+        )
+        return connection.execute(
+            'SELECT version FROM versions WHERE calendar_id = ?', (calendar_id,)
+        ).fetchone()[0]
+
+    @staticmethod
+    def _raise_max_duration(connection, calendar_id, rows):
+        # Called in the transaction of the write
+        duration = max((end - start for _, _, start, end, _ in rows), default=None)
+        if duration is None:
+            return
+        connection.execute(
+            'INSERT INTO durations VALUES (?, ?) ON CONFLICT (calendar_id) '
+            'DO UPDATE SET max_duration = MAX(max_duration, excluded.max_duration)',
+            (calendar_id, duration),
+        )
+
+    def get_version(self, calendar_id) -> int:
+        """Returns the version of the stored events of the calendar, 0 if unwritten."""
+        row = (
+            self._connect()
+            .execute('SELECT version FROM versions WHERE calendar_id = ?', (calendar_id,))
+            .fetchone()
+        )
+        return row[0] if row is not None else 0
+
+    def get_sync_state(self, calendar_id) -> tuple[str, float]:
+        """Returns the sync token and the time of the last sync of the calendar."""
+        row = (
+            self._connect()
+            .execute(
+                'SELECT sync_token, synced_at FROM sync_state WHERE calendar_id = ?',
+                (calendar_id,),
+            )
+            .fetchone()
+        )
+        return row if row is not None else (None, None)
+
+    def set_sync_state(self, calendar_id, sync_token: str):
+        """Records a completed sync of the calendar."""
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                (calendar_id, sync_token, time.time()),
+            )
+
+    def replace(self, calendar_id, events, sync_token: str) -> int:
+        """Replaces all events of the calendar after a full sync."""
+        rows = [self._row(calendar_id, event) for event in events]
+        with self._connect() as connection:
+            for table in ('events', 'durations'):
+                connection.execute(
+                    f'DELETE FROM {table} WHERE calendar_id = ?', (calendar_id,)
+                )
+            connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?)', rows)
+            self._raise_max_duration(connection, calendar_id, rows)
+            connection.execute(
+                'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                (calendar_id, sync_token, time.time()),
+            )
+            return self._bump_version(connection, calendar_id)
+
+    def apply(self, calendar_id, changed, deleted, sync_token: str) -> int:
+        """
+        Applies the events changed and the IDs of the events deleted since the
+        last sync of a synced calendar, and records the sync, in one transaction.
+        """
+        rows = [self._row(calendar_id, event) for event in changed]
+        with self._connect() as connection:
+            connection.executemany(
+                'DELETE FROM events WHERE calendar_id = ? AND event_id = ?',
+                [(calendar_id, event_id) for event_id in deleted],
+            )
+            connection.executemany(
+                'INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)', rows
+            )
+            self._raise_max_duration(connection, calendar_id, rows)
+            connection.execute(
+                'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                (calendar_id, sync_token, time.time()),
+            )
+            return self._bump_version(connection, calendar_id)
+
+    def upsert(self, calendar_id, event: dict) -> int:
+        """
+        Inserts or replaces a single event of a synced calendar.
+        Returns None if the calendar is not synced.
+        """
+        if self.get_sync_state(calendar_id) == (None, None):
+            return None
+        row = self._row(calendar_id, event)
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)', row
+            )
+            self._raise_max_duration(connection, calendar_id, [row])
+            return self._bump_version(connection, calendar_id)
+
+    def delete(self, calendar_id, event_id) -> int:
+        """Deletes a single event of a synced calendar."""
+        return self.delete_many(calendar_id, [event_id])
+
+    def delete_many(self, calendar_id, event_ids) -> int:
+        """
+        Deletes events of a synced calendar by ID in one transaction.
+        Returns None if none of the events is stored.
+        """
+        with self._connect() as connection:
+            cursor = connection.executemany(
+                'DELETE FROM events WHERE calendar_id = ? AND event_id = ?',
+                [(calendar_id, event_id) for event_id in event_ids],
+            )
+            if cursor.rowcount <= 0:
+                return None
+            return self._bump_version(connection, calendar_id)
+
+    def clear(self, calendar_id=None):
+        """Forgets the events and the sync state of one or all calendars."""
+        with self._connect() as connection:
+            if calendar_id is None:
+                for table in ('events', 'sync_state', 'durations'):
+                    connection.execute(f'DELETE FROM {table}')
+                connection.execute('UPDATE versions SET version = version + 1')
+            else:
+                for table in ('events', 'sync_state', 'durations'):
+                    connection.execute(
+                        f'DELETE FROM {table} WHERE calendar_id = ?', (calendar_id,)
+                    )
+                self._bump_version(connection, calendar_id)
+
+    def query(self, calendar_id, start: float, end: float, descending: bool = False):
+        """
+        Yields the events of the calendar that overlap the time range
+        [start, end), sorted by start time, end time and ID (oldest first,
+        or newest first when descending).
+        """
+        order = 'DESC' if descending else 'ASC'
+        cursor = self._connect().execute(
+            'SELECT data FROM events '
+            'WHERE calendar_id = ? AND start_ts < ? AND end_ts > ? AND start_ts >= ? - '
+            '(SELECT max_duration FROM durations WHERE calendar_id = ?) '
+            f'ORDER BY start_ts {order}, end_ts {order}, event_id {order}',
+            (calendar_id, end, start, start, calendar_id),
+        )
+        while rows := cursor.fetchmany(SQLITE_FETCH_SIZE):
+            for (data,) in rows:
+                yield loads(data)
+
+
+def create_event_store():
+    """Returns the event store configured with EVENT_STORE."""
+    if EVENT_STORE == 'memory':
+        return MemoryEventStore()
+    os.makedirs(os.path.dirname(EVENT_STORE_PATH) or '.', exist_ok=True)
+    return SQLiteEventStore(EVENT_STORE_PATH)
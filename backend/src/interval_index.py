@@ -0,0 +1,153 @@
+"""
+Interval index of the busy times of calendar events, for conflict detection.
+
+The events of a calendar are kept sorted by start time together with the
+running maximum of their end times. A time range [start, end) overlaps an
+event if and only if an event that starts before end ends after start, and
+the running maximum answers that with one binary search, in O(log n). The
+overlapping events themselves are found by walking back from that position
+while the running maximum still ends after start.
+
+All-day events and events marked as free (transparent) do not conflict and
+are not indexed.
+"""
+
+import bisect
+import heapq
+import threading
+from itertools import accumulate
+
+from src.calendar_index import CalendarIndexes
+from src.event_store import event_time_range
+from src.sync import add_event_listener
+
+
+def _start(key: tuple[float, float, str]) -> float:
+    return key[0]
+
+
+def busy_interval(event: dict, all_day: bool = False):
+    """
+    Returns the start and end timestamps of the time the event blocks,
+    or None if it does not block time. All-day events only block time with
+    all_day, from midnight to midnight in TIMEZONE, as the freebusy API
+    counts them.
+    """
+    if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+        return None
+    if not all_day and (
+        'dateTime' not in event['start'] or 'dateTime' not in event['end']
+    ):
+        return None
+    start, end = event_time_range(event)
+    return (start, end) if end > start else None
+
+
+def _brief(event: dict) -> dict:
+    # What is reported of an overlapping event
+    return {
+        'id': event['id'],
+        'summary': event.get('summary', 'Untitled Event'),
+        'start': event['start'],
+        'end': event['end'],
+    }
+
+
+class IntervalIndex(object):
+    """Interval index of the busy events of one calendar."""
+
+    def __init__(self, events=()):
+        self._lock = threading.Lock()
+        # (start, end, ID) of every indexed event, sorted
+        self._keys = []
+        # The maximum end of the events up to each position
+        self._max_ends = []
+        # Sort key and brief of every indexed event by ID
+        self._events = {}
+        for event in events:
+            interval = busy_interval(event)
+            if interval is not None:
+                key = (*interval, event['id'])
+                self._events[event['id']] = (key, _brief(event))
+        self._keys = sorted(key for key, _ in self._events.values())
+        self._update_max_ends(0)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def expired(self) -> bool:
+        """The index is kept up to date by the event changes, it never expires."""
+        return False
+
+    def _update_max_ends(self, position: int):
+        # Recomputes the running maximum from the position onwards
+        initial = self._max_ends[position - 1] if position else float('-inf')
+        ends = (end for _, end, _ in self._keys[position:])
+        self._max_ends[position:] = list(accumulate(ends, max, initial=initial))[1:]
+
+    def apply(self, changed=(), deleted=()):
+        """Applies created or updated events and the IDs of deleted events."""
+        with self._lock:
+            position = len(self._keys)
+            for event_id in list(deleted) + [event['id'] for event in changed]:
+                if event_id in self._events:
+                    key, _ = self._events.pop(event_id)
+                    index = bisect.bisect_left(self._keys, key)
+                    del self._keys[index]
+                    position = min(position, index)
+            for event in changed:
+                interval = busy_interval(event)
+                if interval is not None:
+                    key = (*interval, event['id'])
+                    self._events[event['id']] = (key, _brief(event))
+                    index = bisect.bisect_left(self._keys, key)
+                    self._keys.insert(index, key)
+                    position = min(position, index)
+            del self._max_ends[len(self._keys) :]
+            self._update_max_ends(position)
+
+    def has_conflict(self, start: float, end: float) -> bool:
+        """Returns whether any event overlaps [start, end), in O(log n)."""
+        with self._lock:
+            high = bisect.bisect_left(self._keys, end, key=_start)
+            return high > 0 and self._max_ends[high - 1] > start
+
+    def conflicts(self, start: float, end: float) -> list[dict]:
+        """Returns the events that overlap [start, end), oldest first."""
+        with self._lock:
+            conflicts = []
+            position = bisect.bisect_left(self._keys, end, key=_start) - 1
+            while position >= 0 and self._max_ends[position] > start:
+                key = self._keys[position]
+                if key[1] > start:
+                    conflicts.append(self._events[key[2]][1])
+                position -= 1
+            return conflicts[::-1]
+
+    def overlapping_pairs(self, start: float, end: float) -> list[tuple[dict, dict]]:
+        """
+        Returns the pairs of events that overlap each other and [start, end),
+        ordered by the start of the later and then of the earlier event. A
+        sweep over the events in start order keeps the events that have not
+        ended yet in a heap, in O(n log n + pairs).
+        """
+        with self._lock:
+            # Every event before low ends before the range
+            low = bisect.bisect_right(self._max_ends, start)
+            high = bisect.bisect_left(self._keys, end, key=_start)
+            active = []
+            pairs = []
+            for key in self._keys[low:high]:
+                if key[1] <= start:
+                    continue
+                while active and active[0][0] <= key[0]:
+                    heapq.heappop(active)
+                brief = self._events[key[2]][1]
+                for _, other in sorted(active, key=lambda item: item[1]):
+                    pairs.append((self._events[other[2]][1], brief))
+                heapq.heappush(active, (key[1], key))
+            return pairs
+
+
+interval_indexes = CalendarIndexes()
+add_event_listener(interval_indexes.apply_changes)
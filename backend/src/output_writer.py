@@ -0,0 +1,117 @@
+"""
+Background writer of the debug dumps in src/output/.
+
+The services hand their results to the writer instead of writing them while
+the request waits. A single daemon thread writes the files. Only the latest
+dump of each file name is kept while it waits, and when OUTPUT_QUEUE_SIZE
+files are already waiting, dumps of other files are dropped instead of
+blocking the request. OUTPUT_DUMPS selects whether every dump is written
+('on'), a random OUTPUT_SAMPLE_RATE fraction of them ('sampled') or none ('off').
+"""
+
+import random
+import threading
+
+from src.constants import OUTPUT_DUMPS, OUTPUT_QUEUE_SIZE, OUTPUT_SAMPLE_RATE
+from src.logger_config import logger
+from src.utils import write_to_output_file
+
+DUMPS_ON = 'on'
+DUMPS_SAMPLED = 'sampled'
+DUMPS_OFF = 'off'
+
+
+class OutputWriter(object):
+    """
+    Writes queued dumps in a background thread. The queued data is written
+    later and must not be modified after it has been queued.
+    """
+
+    def __init__(self, mode: str = None, max_pending: int = None):
+        self.mode = mode or OUTPUT_DUMPS
+        self.max_pending = max_pending or OUTPUT_QUEUE_SIZE
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self._pending = {}
+        self._writing = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def queue(self, file_name: str, data):
+        """Queues the data to be written to the output file, never blocks."""
+        if self.mode == DUMPS_OFF:
+            return
+        if self.mode == DUMPS_SAMPLED and random.random() >= OUTPUT_SAMPLE_RATE:
+            self.sampled_out += 1
+            return
+
+        with self._condition:
+            if file_name in self._pending:
+                # Only the latest dump of the file is worth writing
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                logger.warning('Output queue full, dropped dump of %s', file_name)
+                return
+            self._pending[file_name] = data
+            self._start()
+            self._condition.notify()
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name='output-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._writing = False
+                    self._condition.notify_all()
+                    self._condition.wait()
+                self._writing = True
+                # Dicts keep insertion order, the oldest dump is written first
+                file_name = next(iter(self._pending))
+                data = self._pending.pop(file_name)
+
+            try:
+                write_to_output_file(file_name, data)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error('Failed to write output file %s: %s', file_name, e)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Waits until every queued dump has been written.
+        Returns False if the timeout expired first.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._writing, timeout
+            )
+
+    def stats(self) -> dict:
+        """Returns the counters of the writer."""
+        return {
+            'mode': self.mode,
+            'pending': len(self._pending),
+            'written': self.written,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+            'failed': self.failed,
+        }
+
+
+output_writer = OutputWriter()
+
+
+def queue_output_file(file_name: str, data):
+    """Queues the data to be written to src/output/ by the background writer."""
+    output_writer.queue(file_name, data)
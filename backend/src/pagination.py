@@ -0,0 +1,100 @@
+"""
+Pagination of Google Calendar API list requests, and cursor pagination of the
+event lists returned by our API.
+
+Our cursors are keyset cursors: an opaque token holding the sort key (start,
+end, ID) of the last event of the page and the sort order. The next page
+continues after that key, so pages stay consistent while events are added or
+removed, and the time range of the next query is narrowed to the cursor.
+"""
+
+import base64
+import binascii
+
+from src.constants import MAX_EVENT_PAGES, MAX_RESULTS_PER_PAGE
+from src.error import ParameterError
+from src.event_store import event_key
+from src.logger_config import logger
+from src.serialization import dumps, loads
+
+
+class EventPages(object):
+    """
+    Iterates the pages of an events().list() query, following nextPageToken
+    until the last page or until max_pages pages have been fetched.
+    Each page is requested with the largest allowed page size.
+    Reference: https://developers.google.com/calendar/api/v3/pagination
+    """
+
+    def __init__(self, service, max_pages: int = MAX_EVENT_PAGES, **list_params):
+        self.service = service
+        self.max_pages = max_pages
+        self.list_params = list_params
+        self.page_count = 0
+        self.truncated = False
+        self.next_sync_token = None
+
+    def __iter__(self):
+        page_token = None
+        while True:
+            result = (
+                self.service.events()
+                .list(
+                    maxResults=MAX_RESULTS_PER_PAGE,
+                    pageToken=page_token,
+                    **self.list_params,
+                )
+                .execute()
+            )
+            self.page_count += 1
+            yield result.get('items', [])
+
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                self.next_sync_token = result.get('nextSyncToken')
+                return
+            if self.max_pages and self.page_count >= self.max_pages:
+                logger.warning('Event list truncated after %d pages', self.page_count)
+                self.truncated = True
+                return
+
+
+def encode_cursor(key: tuple, sort: str) -> str:
+    """Returns the opaque cursor of a page that ends at the event sort key."""
+    token = dumps({'key': list(key), 'sort': sort})
+    return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """
+    Returns the event sort key of the cursor.
+    Raises:
+        ParameterError: If the cursor is malformed or was made for another sort.
+    """
+    try:
+        token = loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        start, end, event_id = token['key']
+        cursor_sort = token['sort']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ParameterError('Invalid cursor')
+    if cursor_sort != sort:
+        raise ParameterError('Cursor was created for a different sort order')
+    return float(start), float(end), str(event_id)
+
+
+def paginate(events, limit: int = None, after: tuple = None, descending=False):
+    """
+    Returns the events that come after the sort key in the sort order, at most
+    limit of them, and the sort key of the last returned event if more events
+    follow, otherwise None. The events must be sorted by their sort key.
+    Consumes the events only up to the first event of the next page.
+    """
+    page = []
+    for event in events:
+        key = event_key(event)
+        if after is not None and (key >= after if descending else key <= after):
+            continue
+        if limit is not None and len(page) == limit:
+            return page, event_key(page[-1])
+        page.append(event)
+    return page, None
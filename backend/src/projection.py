@@ -0,0 +1,86 @@
+"""
+Partial responses: projections of events to a subset of their fields.
+
+A projection is a comma separated list of top-level event fields, for example
+'id,summary,start,duration'. Fields may select subfields in Google's syntax,
+such as 'start(dateTime)', which is passed upstream as is. Upstream requests
+only ask Google for the selected fields, and the computed properties are only
+added when selected.
+Reference: https://developers.google.com/calendar/api/guides/performance#partial
+"""
+
+import re
+
+from src.error import ParameterError
+
+COMPUTED_PROPERTIES = ('formatted_start', 'formatted_end', 'duration')
+
+# The computed properties are derived from these fields
+COMPUTED_FROM = ('start', 'end')
+
+FIELD_REGEX = re.compile(r'^[A-Za-z_]\w*(\(.+\))?$')
+
+
+def parse_fields(fields: str):
+    """
+    Parses the projection of a fields query parameter into a tuple of field
+    selectors. Returns None for a missing or empty parameter (all fields).
+    Raises:
+        ParameterError: If the projection is malformed.
+    """
+    if fields is None or not fields.strip():
+        return None
+
+    selectors = []
+    depth = 0
+    selector = ''
+    for char in fields:
+        if char == ',' and depth == 0:
+            selectors.append(selector.strip())
+            selector = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if depth < 0:
+            break
+        selector += char
+    selectors.append(selector.strip())
+
+    if depth != 0 or not all(FIELD_REGEX.match(selector) for selector in selectors):
+        raise ParameterError(f'Invalid fields projection "{fields}"')
+    return tuple(dict.fromkeys(selectors))
+
+
+def field_names(fields) -> tuple[str, ...]:
+    """Returns the top-level field names of the projection, in order."""
+    return tuple(dict.fromkeys(selector.split('(', 1)[0] for selector in fields))
+
+
+def needs_computed_properties(fields) -> bool:
+    """Returns whether the projection selects any computed property."""
+    return fields is None or not set(field_names(fields)).isdisjoint(COMPUTED_PROPERTIES)
+
+
+def upstream_fields(fields) -> str:
+    """
+    Returns the Google fields selector for an events().list() request of the
+    projection. The page and sync tokens are always selected, and the start
+    and end times are selected when a computed property needs them.
+    """
+    excluded = COMPUTED_PROPERTIES
+    selectors = []
+    if needs_computed_properties(fields):
+        # The computed properties need the complete start and end times
+        excluded += COMPUTED_FROM
+        selectors += COMPUTED_FROM
+    selectors = [
+        selector for selector in fields if selector.split('(', 1)[0] not in excluded
+    ] + selectors
+    items = ','.join(dict.fromkeys(selectors))
+    return f'nextPageToken,nextSyncToken,items({items})'
+
+
+def project_events(events, fields):
+    """Yields the projections of the events, the events are not modified."""
+    names = field_names(fields)
+    for event in events:
+        yield {name: event[name] for name in names if name in event}
@@ -1,22 +1,31 @@
-import json
-
-from flask import Response
+from flask import Response, request
 from flask_restful import Resource
 
-from src.constants import MASON
 from src.error import APIError, create_error_response
+from src.etag import compute_etag, not_modified
 from src.logger_config import logger
+from src.serialization import json_response
 from src.services.calendar import get_calendar_list
 
 
+def _refresh_requested() -> bool:
+    return request.args.get('refresh', 'false').lower() == 'true'
+
+
 class CalendarList(Resource):
     def get(self) -> Response:
         """
         Returns the list of calendars.
+        The cached list is reloaded with the refresh=true query parameter.
         """
         try:
-            calendars = get_calendar_list()
-            return Response(json.dumps(calendars), status=200, mimetype=MASON)
+            calendars = get_calendar_list(refresh=_refresh_requested())
+            etag = compute_etag(calendars)
+            if (response := not_modified(etag)) is not None:
+                return response
+            response = json_response(calendars)
+            response.set_etag(etag)
+            return response
         except APIError as e:
             return e.to_response()
         except Exception as e:
@@ -28,14 +37,20 @@ class CalendarListId(Resource):
     def get(self) -> Response:
         """
         Returns the list of calendar IDs: /api/calendars/id
+        The cached list is reloaded with the refresh=true query parameter.
         """
         try:
-            calendars = get_calendar_list()
+            calendars = get_calendar_list(refresh=_refresh_requested())
+            etag = compute_etag(calendars)
+            if (response := not_modified(etag)) is not None:
+                return response
             calendar_ids = [
                 {'summary': calendar['summary'], 'id': calendar['id']}
                 for calendar in calendars
             ]
-            return Response(json.dumps(calendar_ids), status=200, mimetype=MASON)
+            response = json_response(calendar_ids)
+            response.set_etag(etag)
+            return response
         except APIError as e:
             return e.to_response()
         except Exception as e:
@@ -1,19 +1,30 @@
-import json
-
-from flask import Response, jsonify, make_response, request
+from flask import Response, make_response, request
 from flask_restful import Resource
 from gcalcli.utils import get_time_from_str
 
-from src.constants import JSON, MASON
+from src.constants import CACHE_HEADER, JSON, NEXT_CURSOR_HEADER, TRUNCATED_HEADER
 from src.error import APIError, ParameterError, create_error_response
+from src.etag import compute_etag, event_etag, not_modified, upstream_etag
 from src.logger_config import logger
+from src.projection import parse_fields
+from src.serialization import json_response
+from src.services.conflicts import get_overlapping_events
 from src.services.event import (
+    SORT_NEWEST_FIRST,
     create_event,
+    create_events,
     delete_event,
+    delete_events,
     get_event,
     get_events,
+    get_events_from_calendars,
+    parse_calendar_ids,
+    stream_events,
+    suggest_summaries,
     update_event,
 )
+from src.services.stats import get_event_stats
+from src.streaming import get_stream_format, stream_response
 
 
 def _build_cors_preflight_response() -> Response:
@@ -29,6 +40,55 @@ def _corsify_actual_response(response: Response) -> Response:
     return response
 
 
+def get_page_params(args) -> dict:
+    """
+    Returns the paging, sorting and filtering query parameters of the event
+    list that are present in the query parameters (args).
+    Raises:
+        ParameterError: If the limit is not an integer.
+    """
+    params = {}
+    for name in ('cursor', 'sort', 'summary_contains'):
+        if args.get(name):
+            params[name] = args[name]
+    if args.get('limit'):
+        try:
+            params['limit'] = int(args['limit'])
+        except ValueError:
+            raise ParameterError('Limit must be an integer')
+    if args.get('future_only', 'false').lower() == 'true':
+        params['future_only'] = True
+    return params
+
+
+def get_list_query(fields, page_params: dict) -> dict:
+    """
+    Returns the normalized query parameters that shape an event list, the
+    projection and the paging, sorting and filtering, for its ETag.
+    """
+    return dict(
+        page_params, fields=fields, sort=page_params.get('sort', SORT_NEWEST_FIRST)
+    )
+
+
+def get_time_range(args) -> tuple[str, str]:
+    """
+    Returns the start_date and end_date query parameters (args) as RFC3339 timestamps.
+    Raises:
+        ParameterError: If either is missing or cannot be parsed.
+    """
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    if start_date is None or end_date is None:
+        raise ParameterError('Start date and end date are required')
+    try:
+        start_date = get_time_from_str(start_date).replace(tzinfo=None).isoformat() + 'Z'
+        end_date = get_time_from_str(end_date).replace(tzinfo=None).isoformat() + 'Z'
+    except ValueError as e:
+        raise ParameterError(str(e))
+    return start_date, end_date
+
+
 class EventList(Resource):
     """Resource for a list of calendar events."""
 
@@ -69,13 +129,55 @@ class EventList(Resource):
             return create_error_response(400, 'Invalid query parameters', str(e))
 
         try:
+            # Optional projection of the event fields, e.g. fields=id,summary,start
+            fields = parse_fields(request.args.get('fields'))
+            page_params = get_page_params(request.args)
+            stream_format = get_stream_format()
+            calendar_ids = parse_calendar_ids(calendar_id)
+            if calendar_ids is not None:
+                if stream_format is not None:
+                    raise ParameterError(
+                        'Streaming is not supported for multiple calendars'
+                    )
+                return self._get_from_calendars(
+                    calendar_ids, start_date, end_date, search_query, fields, page_params
+                )
+            if stream_format is not None:
+                if page_params:
+                    raise ParameterError(
+                        'Paging, sorting and filtering are not supported when streaming'
+                    )
+                # Events are written to the response while the pages arrive
+                events = stream_events(
+                    calendar_id=calendar_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    search_query=search_query,
+                    fields=fields,
+                )
+                return stream_response(events, stream_format)
+
             events = get_events(
                 calendar_id=calendar_id,
                 start_date=start_date,
                 end_date=end_date,
                 search_query=search_query,
+                fields=fields,
+                **page_params,
             )
-            return Response(json.dumps(events), status=200, mimetype=MASON)
+            etag = compute_etag(events, get_list_query(fields, page_params))
+            if (response := not_modified(etag)) is not None:
+                return response
+            response = json_response(events)
+            response.set_etag(etag)
+            if events.truncated:
+                # The page limit was reached before the end of the time range
+                response.headers[TRUNCATED_HEADER] = 'true'
+            if events.cache_status is not None:
+                response.headers[CACHE_HEADER] = events.cache_status.upper()
+            if events.next_cursor is not None:
+                response.headers[NEXT_CURSOR_HEADER] = events.next_cursor
+            return response
         except APIError as e:
             return e.to_response()
         except ParameterError as e:
@@ -84,6 +186,34 @@ class EventList(Resource):
             logger.error('An unhandled error occurred: %s', e)
             return create_error_response(500, 'Internal Server Error', str(e))
 
+    @staticmethod
+    def _get_from_calendars(
+        calendar_ids, start_date, end_date, search_query, fields, page_params
+    ) -> Response:
+        """
+        Returns the merged events of several calendars with the errors of the
+        calendars that failed.
+        """
+        events = get_events_from_calendars(
+            calendar_ids,
+            start_date=start_date,
+            end_date=end_date,
+            search_query=search_query,
+            fields=fields,
+            **page_params,
+        )
+        body = {'items': events, 'errors': events.errors or {}}
+        etag = compute_etag(events + [body['errors']], dict(page_params, fields=fields))
+        if (response := not_modified(etag)) is not None:
+            return response
+        response = json_response(body)
+        response.set_etag(etag)
+        if events.truncated:
+            response.headers[TRUNCATED_HEADER] = 'true'
+        if events.next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = events.next_cursor
+        return response
+
     def post(self, calendar_id) -> Response:
         """
         Creates a new calendar event.
@@ -97,7 +227,12 @@ class EventList(Resource):
             )
 
         try:
-            response = jsonify(create_event(calendar_id, event_body=request.get_json()))
+            event = create_event(
+                calendar_id,
+                event_body=request.get_json(),
+                conflicts=request.args.get('conflicts'),
+            )
+            response = json_response(event, mimetype=JSON)
             return _corsify_actual_response(response)
             # return create_event(calendar_id, event_body=request.get_json())
         except APIError as e:
@@ -109,6 +244,163 @@ class EventList(Resource):
             return create_error_response(500, 'Internal Server Error', str(e))
 
 
+class EventStats(Resource):
+    """Resource for the per-summary statistics of calendar events."""
+
+    def get(self, calendar_id) -> Response:
+        """
+        Returns the number of events, total and mean hours and the first and last
+        start of each event summary in the time range.
+        """
+        try:
+            start_date, end_date = get_time_range(request.args)
+            stats = get_event_stats(
+                calendar_id,
+                start_date=start_date,
+                end_date=end_date,
+                search_query=request.args.get('search_query'),
+            )
+            etag = compute_etag(stats)
+            if (response := not_modified(etag)) is not None:
+                return response
+            response = json_response(stats)
+            response.set_etag(etag)
+            return response
+        except APIError as e:
+            return e.to_response()
+        except ParameterError as e:
+            return e.to_response()
+        except Exception as e:
+            logger.error('An unhandled error occurred: %s', e)
+            return create_error_response(500, 'Internal Server Error', str(e))
+
+
+class EventOverlaps(Resource):
+    """Resource for the overlapping events of a calendar."""
+
+    def get(self, calendar_id) -> Response:
+        """Returns the pairs of events that overlap each other in the time range."""
+        try:
+            start_date, end_date = get_time_range(request.args)
+            pairs = get_overlapping_events(calendar_id, start_date, end_date)
+            return json_response(
+                {'start_date': start_date, 'end_date': end_date, 'pairs': pairs}
+            )
+        except APIError as e:
+            return e.to_response()
+        except ParameterError as e:
+            return e.to_response()
+        except Exception as e:
+            logger.error('An unhandled error occurred: %s', e)
+            return create_error_response(500, 'Internal Server Error', str(e))
+
+
+class EventSuggest(Resource):
+    """Resource for the autocompletion of event summaries."""
+
+    def get(self, calendar_id) -> Response:
+        """
+        Returns the event summaries with a word that starts with the prefix,
+        ranked by frequency and recency.
+        """
+        try:
+            prefix = request.args.get('prefix', '')
+            try:
+                limit = int(request.args.get('limit', '10'))
+            except ValueError:
+                raise ParameterError('Limit must be an integer')
+            suggestions = suggest_summaries(calendar_id, prefix, limit)
+            return json_response({'prefix': prefix, 'suggestions': suggestions})
+        except APIError as e:
+            return e.to_response()
+        except ParameterError as e:
+            return e.to_response()
+        except Exception as e:
+            logger.error('An unhandled error occurred: %s', e)
+            return create_error_response(500, 'Internal Server Error', str(e))
+
+
+class EventBatch(Resource):
+    """Resource for creating many calendar events in one request."""
+
+    def post(self, calendar_id) -> Response:
+        """
+        Creates the calendar events of the request body array with batch requests.
+        Returns the result of each event in the order of the request body.
+        """
+        if request.content_type != JSON:
+            return create_error_response(
+                415, 'Unsupported Media Type', 'Request type must be JSON'
+            )
+
+        try:
+            results = create_events(calendar_id, event_bodies=request.get_json())
+            return json_response(results)
+        except APIError as e:
+            return e.to_response()
+        except ParameterError as e:
+            return e.to_response()
+        except Exception as e:
+            logger.error('An unhandled error occurred: %s', e)
+            return create_error_response(500, 'Internal Server Error', str(e))
+
+
+class EventBulkDelete(Resource):
+    """Resource for deleting many calendar events in one request."""
+
+    def post(self, calendar_id) -> Response:
+        """
+        Deletes the calendar events selected by the request body, either by
+        event IDs or by time range and search query. Returns a per-event report.
+        """
+        if request.content_type != JSON:
+            return create_error_response(
+                415, 'Unsupported Media Type', 'Request type must be JSON'
+            )
+
+        body = request.get_json()
+        if not isinstance(body, dict):
+            return create_error_response(
+                400, 'Bad Request', 'Request body must be an object'
+            )
+
+        try:
+            start_date = body.get('start_date')
+            end_date = body.get('end_date')
+            if start_date:
+                start_date = (
+                    get_time_from_str(start_date).replace(tzinfo=None).isoformat() + 'Z'
+                )
+            if end_date:
+                end_date = (
+                    get_time_from_str(end_date).replace(tzinfo=None).isoformat() + 'Z'
+                )
+        except ValueError as e:
+            return create_error_response(400, 'Invalid request body', str(e))
+
+        try:
+            report = delete_events(
+                calendar_id,
+                event_ids=body.get('event_ids'),
+                start_date=start_date,
+                end_date=end_date,
+                search_query=body.get('search_query'),
+                dry_run=bool(body.get('dry_run', False)),
+            )
+            response = json_response(report)
+            if report.get('truncated'):
+                # More events match than were listed and deleted
+                response.headers[TRUNCATED_HEADER] = 'true'
+            return response
+        except APIError as e:
+            return e.to_response()
+        except ParameterError as e:
+            return e.to_response()
+        except Exception as e:
+            logger.error('An unhandled error occurred: %s', e)
+            return create_error_response(500, 'Internal Server Error', str(e))
+
+
 class EventItem(Resource):
     """Resource for a single calendar event."""
 
@@ -116,7 +408,12 @@ class EventItem(Resource):
         """Returns a single calendar event by ID."""
         try:
             event = get_event(calendar_id, event_id)
-            return Response(json.dumps(event), status=200, mimetype=MASON)
+            etag = event_etag(event)
+            if (response := not_modified(etag)) is not None:
+                return response
+            response = json_response(event)
+            response.set_etag(etag)
+            return response
         except ParameterError as e:
             return e.to_response()
         except APIError as e:
@@ -127,19 +424,46 @@ class EventItem(Resource):
 
     def put(self, calendar_id, event_id) -> Response:
         """
-        Updates a calendar event.
-        https://developers.google.com/calendar/api/v3/reference/events/update#python
-        PUT https://www.googleapis.com/calendar/v3/calendars/calendarId/events/eventId
+        Replaces a calendar event with the request body, the updatable fields
+        that the body leaves out are cleared. The body must hold the start and end.
+        https://developers.google.com/calendar/api/v3/reference/events/update
+
+        Returns: Response object
+        """
+        return self._update(calendar_id, event_id, replace=True)
+
+    def patch(self, calendar_id, event_id) -> Response:
+        """
+        Updates the fields of the request body on a calendar event.
+        https://developers.google.com/calendar/api/v3/reference/events/patch
 
         Returns: Response object
         """
+        return self._update(calendar_id, event_id, replace=False)
+
+    @staticmethod
+    def _update(calendar_id, event_id, replace: bool) -> Response:
+        """
+        Updates a calendar event with the request body. An If-Match header with
+        the ETag of the event, as returned by GET, makes the update conditional,
+        a concurrent modification fails with 412.
+        """
         if request.content_type != JSON:
             return create_error_response(
                 415, 'Unsupported Media Type', 'Request type must be JSON'
             )
 
         try:
-            return update_event(calendar_id, event_id, event_body=request.get_json())
+            event = update_event(
+                calendar_id,
+                event_id,
+                event_body=request.get_json(),
+                etag=upstream_etag(request.headers.get('If-Match')),
+                replace=replace,
+            )
+            response = json_response(event)
+            response.set_etag(event_etag(event))
+            return response
         except ParameterError as e:
             return e.to_response()
         except APIError as e:
@@ -0,0 +1,57 @@
+from flask import Response, request
+from flask_restful import Resource
+from gcalcli.utils import get_time_from_str
+
+from src.error import APIError, ParameterError, create_error_response
+from src.logger_config import logger
+from src.serialization import json_response
+from src.services.event import parse_calendar_ids
+from src.services.freeslots import get_free_slots
+
+
+def _get_int(name: str, default: int) -> int:
+    try:
+        return int(request.args.get(name, default))
+    except ValueError:
+        raise ParameterError(f'{name} must be an integer')
+
+
+class FreeSlots(Resource):
+    """Resource for the free time slots of calendars."""
+
+    def get(self) -> Response:
+        """
+        Returns the free slots that every calendar has within the working hours
+        of the time range.
+        """
+        try:
+            calendar_id = request.args.get('calendar_ids', 'primary')
+            calendar_ids = parse_calendar_ids(calendar_id) or [calendar_id]
+            start_date = request.args.get('start_date')
+            end_date = request.args.get('end_date')
+            if start_date is None or end_date is None:
+                raise ParameterError('Start date and end date are required')
+            try:
+                start_date = get_time_from_str(start_date).isoformat()
+                end_date = get_time_from_str(end_date).isoformat()
+            except ValueError as e:
+                raise ParameterError(str(e))
+
+            free_slots = get_free_slots(
+                calendar_ids,
+                start_date,
+                end_date,
+                min_minutes=_get_int('min_minutes', 30),
+                work_start=request.args.get('work_start', '09:00'),
+                work_end=request.args.get('work_end', '17:00'),
+                interval_minutes=_get_int('interval', 15),
+                weekends=request.args.get('weekends', 'false').lower() == 'true',
+            )
+            return json_response(free_slots)
+        except APIError as e:
+            return e.to_response()
+        except ParameterError as e:
+            return e.to_response()
+        except Exception as e:
+            logger.error('An unhandled error occurred: %s', e)
+            return create_error_response(500, 'Internal Server Error', str(e))
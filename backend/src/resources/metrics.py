@@ -0,0 +1,25 @@
+from flask import Response
+from flask_restful import Resource
+
+from src.cache import get_cache_stats
+from src.compression import get_compression_stats
+from src.interval_index import interval_indexes
+from src.output_writer import output_writer
+from src.serialization import json_response
+from src.summary_index import summary_indexes
+
+
+class Metrics(Resource):
+    def get(self) -> Response:
+        """
+        Returns runtime metrics of the backend, such as cache hit rates and
+        compression ratios.
+        """
+        metrics = {
+            'caches': get_cache_stats(),
+            'compression': get_compression_stats(),
+            'output_writer': output_writer.stats(),
+            'summary_indexes': summary_indexes.stats(),
+            'interval_indexes': interval_indexes.stats(),
+        }
+        return json_response(metrics)
@@ -0,0 +1,46 @@
+"""
+JSON serialization of responses, stored events and output files.
+
+orjson is used when it is installed, it is several times faster than the
+standard library json module on large event lists. Without it the standard
+library produces the same compact documents.
+"""
+
+import json
+
+from flask import Response
+
+from src.constants import MASON
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data, sort_keys: bool = False) -> bytes:
+    """Serializes the data as compact UTF-8 encoded JSON."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(
+        data, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys
+    ).encode()
+
+
+def dumps_pretty(data) -> bytes:
+    """Serializes the data as UTF-8 encoded JSON indented with two spaces."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+
+def loads(data):
+    """Deserializes a JSON document from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(data, status: int = 200, mimetype: str = MASON) -> Response:
+    """Returns a response with the data serialized as the body."""
+    return Response(dumps(data), status=status, mimetype=mimetype)
@@ -0,0 +1,131 @@
+"""
+Process-wide pool of Google Calendar API services.
+
+Building a service with googleapiclient.discovery.build() reads the credentials
+and parses the discovery document every time. The pool parses the discovery
+document once and hands out one service per thread, so each waitress/gunicorn
+thread gets its own HTTP transport (httplib2.Http is not thread-safe) and no
+build cost is paid on the request path after warmup.
+"""
+
+import json
+import threading
+
+import google_auth_httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import build_http
+
+from src.auth import (
+    ManagedCredentials,
+    add_credentials_listener,
+    credential_manager,
+    get_credentials,
+)
+from src.error import ServiceBuildError
+from src.logger_config import logger
+
+API_NAME = 'calendar'
+API_VERSION = 'v3'
+
+# Guards the shared pool state below. Re-entrant because loading the credentials
+# may notify the credentials listeners, which invalidate the pool.
+_lock = threading.RLock()
+_local = threading.local()
+
+_discovery_document = None
+_credentials = None
+_generation = 0
+
+
+def _get_discovery_document() -> dict:
+    """Returns the parsed Calendar API discovery document, parsing it only once."""
+    global _discovery_document
+    with _lock:
+        if _discovery_document is None:
+            content = get_static_doc(API_NAME, API_VERSION)
+            if content is None:
+                raise ServiceBuildError(
+                    f'Discovery document for {API_NAME} {API_VERSION} not found.'
+                )
+            _discovery_document = json.loads(content)
+            logger.debug('Discovery document for %s %s parsed', API_NAME, API_VERSION)
+        return _discovery_document
+
+
+def _get_pool_credentials():
+    """Returns the credentials shared by the pool and the current generation."""
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            credentials = get_credentials()
+            if not credentials:
+                raise ServiceBuildError(
+                    'Missing credentials for building the Calendar API service.'
+                )
+            _credentials = credentials
+        return _credentials, _generation
+
+
+def _build_service():
+    """
+    Builds a new service with its own HTTP transport. The transport refreshes
+    the token through the credential manager, see ManagedCredentials.
+    """
+    document = _get_discovery_document()
+    http = google_auth_httplib2.AuthorizedHttp(
+        ManagedCredentials(credential_manager), http=build_http()
+    )
+    # build_from_document fixes up the method descriptions of the shared
+    # document in place, so builds are serialized.
+    with _lock:
+        return build_from_document(document, http=http)
+
+
+def get_service():
+    """
+    Returns the Google Calendar API service of the current thread.
+    The service is built on first use and reused until the pool is invalidated.
+    Raises:
+        ServiceBuildError: If credentials are missing or the service cannot be built.
+    """
+    service = getattr(_local, 'service', None)
+    if service is not None and _local.generation == _generation:
+        return service
+
+    try:
+        _, generation = _get_pool_credentials()
+        logger.info(
+            'Building the Google Calendar API service for thread %s',
+            threading.current_thread().name,
+        )
+        service = _build_service()
+    except ServiceBuildError:
+        raise
+    except Exception as e:
+        logger.error('Unexpected error during service build: %s', e)
+        raise ServiceBuildError(f'Unexpected error during service build: {e}')
+
+    _local.service = service
+    _local.generation = generation
+    return service
+
+
+def invalidate_service_pool(*_):
+    """Drops the pooled credentials, every thread rebuilds its service on next use."""
+    global _credentials, _generation
+    with _lock:
+        _credentials = None
+        _generation += 1
+    logger.info('Service pool invalidated')
+
+
+def warm_up_service_pool():
+    """Parses the discovery document ahead of the first request."""
+    try:
+        _get_discovery_document()
+    except ServiceBuildError as e:
+        logger.error('Service pool warmup failed: %s', e)
+
+
+add_credentials_listener(invalidate_service_pool)
@@ -0,0 +1,71 @@
+"""
+Asyncio variant of src.services.calendar, see src.async_client.
+The calendar metadata is cached in the same calendar_cache.
+"""
+
+from urllib.parse import quote
+
+from src.async_client import AsyncCalendarClient, AsyncHttpError, get_async_client
+from src.error import APIError, ServiceBuildError
+from src.logger_config import logger
+from src.output_writer import queue_output_file
+from src.services.calendar import CALENDAR_LIST_KEY, calendar_cache
+
+
+async def _fetch_calendar_list(client: AsyncCalendarClient):
+    calendar_list = await client.request('GET', 'users/me/calendarList')
+    calendars = calendar_list.get('items', [])
+    calendar_summaries = [calendar['summary'] for calendar in calendars]
+
+    queue_output_file('calendars.json', calendars)
+    logger.info('Found %d calendars', len(calendars))
+    logger.debug('Calendars: %s', ', '.join(calendar_summaries))
+
+    return calendars
+
+
+async def get_calendar_list(refresh: bool = False):
+    """
+    Fetches the list of calendars from the Google Calendar API.
+    The list is cached for CALENDAR_CACHE_TTL seconds, refresh reloads it.
+    """
+    try:
+        client = get_async_client()
+    except ServiceBuildError as e:
+        raise APIError(
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
+        )
+
+    try:
+        return await calendar_cache.get_async(
+            CALENDAR_LIST_KEY, lambda: _fetch_calendar_list(client), refresh=refresh
+        )
+    except (AsyncHttpError, ServiceBuildError) as error:
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to fetch the calendar list. {error}',
+        )
+
+
+async def get_calendar_summary(client: AsyncCalendarClient, calendar_id) -> str:
+    """
+    Returns the summary (title) of the calendar from the cached calendar list.
+    Calendars missing from the list are looked up once and cached separately.
+    Raises:
+        AsyncHttpError: If the Google Calendar API request fails.
+    """
+    calendars = await calendar_cache.get_async(
+        CALENDAR_LIST_KEY, lambda: _fetch_calendar_list(client)
+    )
+    for calendar in calendars:
+        if calendar.get('id') == calendar_id or (
+            calendar_id == 'primary' and calendar.get('primary')
+        ):
+            return calendar.get('summary')
+
+    calendar = await calendar_cache.get_async(
+        calendar_id,
+        lambda: client.request('GET', f'calendars/{quote(calendar_id, safe="")}'),
+    )
+    return calendar.get('summary')
@@ -0,0 +1,385 @@
+"""
+Asyncio variant of src.services.event, see src.async_client.
+
+The events are fetched from the REST API with the async client and go through
+the same validation, filtering, sorting, pagination and projection as in
+src.services.event, so both return the same results. Created, updated and
+deleted events are applied to the event store like by the threaded services.
+Writing to the store and notifying its listeners blocks (SQLite writes, index
+updates), so it runs in a worker thread and never on the event loop.
+
+With EVENT_SYNC the event lists are served from the event store. The calendar
+is synced with the async client on the event loop, see src.async_sync, and
+only the reads of the store run in a worker thread.
+"""
+
+import asyncio
+
+from gcalcli.utils import get_time_from_str
+
+from src.async_client import (
+    AsyncCalendarClient,
+    AsyncHttpError,
+    events_path,
+    fetch_event_pages,
+    get_async_client,
+)
+from src.async_sync import get_synced_events, sync_calendar
+from src.constants import EVENT_CONFLICTS, EVENT_SYNC, MULTI_CALENDAR_CONCURRENCY
+from src.error import APIError, ParameterError, ServiceBuildError
+from src.event_properties import update_event_properties, update_events_properties
+from src.event_store import event_key, matches_query
+from src.logger_config import logger
+from src.output_writer import queue_output_file
+from src.projection import needs_computed_properties, project_events, upstream_fields
+from src.services import event as event_service
+from src.services.async_calendar import get_calendar_list, get_calendar_summary
+from src.services.conflicts import check_conflicts, checks_conflicts
+from src.services.event import (
+    ALL_CALENDARS,
+    SORT_NEWEST_FIRST,
+    EventResult,
+    _filter_events,
+    _list_fields,
+    _prepare_query,
+    api_error,
+    calendar_page,
+    created_event,
+    merge_calendar_events,
+    page_events,
+    properties_error,
+    update_error,
+    validate_event_id,
+    validate_event_range,
+    validate_event_update,
+    validate_new_event,
+)
+from src.sync import forget_event, store_event
+
+
+def _get_client() -> AsyncCalendarClient:
+    try:
+        return get_async_client()
+    except ServiceBuildError as e:
+        raise APIError(
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
+        )
+
+
+async def list_events(
+    client: AsyncCalendarClient,
+    calendar_id,
+    start_date,
+    end_date,
+    search_query=None,
+    fields=None,
+    descending=False,
+):
+    """
+    Lists the events of the time range, oldest first, with the computed
+    properties added, see src.services.event.list_events. The events are read
+    from the synced event store, newest first when descending, or when
+    EVENT_SYNC is disabled, fetched from the API.
+    Returns the events, whether the page limit truncated them and the cache
+    status of the event store.
+    Raises:
+        AsyncHttpError: If the Google Calendar API request fails.
+    """
+    if EVENT_SYNC:
+        events, cache_status = await get_synced_events(
+            client,
+            calendar_id,
+            get_time_from_str(start_date).timestamp(),
+            get_time_from_str(end_date).timestamp(),
+            descending,
+        )
+        if search_query:
+            events = (event for event in events if matches_query(event, search_query))
+        if fields is not None:
+            events = project_events(events, fields)
+        return events, False, cache_status
+
+    list_params = {}
+    if fields is not None:
+        # Google only sends the selected fields of each event
+        list_params['fields'] = upstream_fields(fields)
+    events, truncated, _ = await fetch_event_pages(
+        client,
+        calendar_id,
+        timeMin=start_date,
+        timeMax=end_date,
+        q=search_query,
+        singleEvents='true',
+        orderBy='startTime',
+        **list_params,
+    )
+    if fields is None or needs_computed_properties(fields):
+        events = update_events_properties(events)
+    if fields is not None:
+        events = project_events(events, fields)
+    return events, truncated, None
+
+
+async def _list_sorted_events(
+    client,
+    calendar_id,
+    start_date,
+    end_date,
+    search_query,
+    list_fields,
+    descending,
+    summary_contains,
+    future_only,
+):
+    """
+    Lists the filtered events of the time range sorted by their sort key,
+    see list_events.
+    """
+    events, truncated, cache_status = await list_events(
+        client, calendar_id, start_date, end_date, search_query, list_fields, descending
+    )
+    events = _filter_events(events, summary_contains, future_only)
+    if cache_status is None:
+        # Upstream pages are only ordered by start time
+        events = sorted(events, key=event_key, reverse=descending)
+    return events, truncated, cache_status
+
+
+async def get_event(calendar_id, event_id):
+    """Fetches a single calendar event by ID."""
+    validate_event_id(calendar_id, event_id)
+
+    client = _get_client()
+    try:
+        event = await client.request('GET', events_path(calendar_id, event_id))
+
+        # Add computed properties to the event
+        event = update_event_properties(event)
+
+        logger.info('Found event with ID %s', event_id)
+        return event
+    except AsyncHttpError as error:
+        raise api_error('Failed to fetch the event', error)
+    except KeyError as e:
+        raise properties_error(e)
+
+
+async def get_events(
+    calendar_id,
+    start_date,
+    end_date,
+    search_query: str = None,
+    fields: tuple = None,
+    limit: int = None,
+    cursor: str = None,
+    sort: str = SORT_NEWEST_FIRST,
+    summary_contains: str = None,
+    future_only: bool = False,
+):
+    """
+    Fetches Google Calendar events for the specified time range, see
+    src.services.event.get_events for the parameters.
+    """
+    logger.info(
+        'Fetching events from %s between %s and %s',
+        calendar_id,
+        start_date,
+        end_date,
+    )
+    start_date, end_date = validate_event_range(calendar_id, start_date, end_date)
+    query = _prepare_query(start_date, end_date, limit, cursor, sort, future_only)
+    if query is None:
+        return EventResult()
+    start_date, end_date, descending, after = query
+    list_fields = _list_fields(fields, summary_contains)
+
+    client = _get_client()
+    try:
+        events, truncated, cache_status = await _list_sorted_events(
+            client,
+            calendar_id,
+            start_date,
+            end_date,
+            search_query,
+            list_fields,
+            descending,
+            summary_contains,
+            future_only,
+        )
+        events = page_events(events, limit, after, descending, fields, sort)
+        events.truncated = truncated
+        events.cache_status = cache_status
+        calendar_summary = await get_calendar_summary(client, calendar_id)
+        logger.info(
+            'Found %d events from %s between %s and %s with search query "%s"',
+            len(events),
+            calendar_summary,
+            start_date,
+            end_date,
+            search_query,
+        )
+    except AsyncHttpError as error:
+        raise api_error('Failed to fetch the calendar events', error)
+    except (KeyError, AttributeError) as e:
+        raise properties_error(e)
+
+    queue_output_file('events.json', events)
+    return events
+
+
+async def parse_calendar_ids(calendar_id: str):
+    """
+    Returns the calendar IDs of a multi-calendar query, or None for a single
+    calendar ID, see src.services.event.parse_calendar_ids.
+    """
+    if calendar_id == ALL_CALENDARS:
+        return [calendar['id'] for calendar in await get_calendar_list()]
+    return event_service.parse_calendar_ids(calendar_id)
+
+
+async def get_events_from_calendars(
+    calendar_ids,
+    start_date,
+    end_date,
+    search_query: str = None,
+    fields: tuple = None,
+    limit: int = None,
+    cursor: str = None,
+    sort: str = SORT_NEWEST_FIRST,
+    summary_contains: str = None,
+    future_only: bool = False,
+):
+    """
+    Fetches the events of several calendars, see
+    src.services.event.get_events_from_calendars. The calendars are fetched
+    concurrently on the event loop, at most MULTI_CALENDAR_CONCURRENCY at a
+    time.
+    """
+    if not calendar_ids:
+        raise ParameterError('Calendar ID is missing')
+    start_date, end_date = validate_event_range(calendar_ids[0], start_date, end_date)
+    query = _prepare_query(start_date, end_date, limit, cursor, sort, future_only)
+    if query is None:
+        return EventResult()
+    start_date, end_date, descending, after = query
+    list_fields = _list_fields(fields, summary_contains)
+    client = _get_client()
+    semaphore = asyncio.Semaphore(MULTI_CALENDAR_CONCURRENCY)
+
+    async def fetch(calendar_id):
+        try:
+            async with semaphore:
+                events, truncated, _ = await _list_sorted_events(
+                    client,
+                    calendar_id,
+                    start_date,
+                    end_date,
+                    search_query,
+                    list_fields,
+                    descending,
+                    summary_contains,
+                    future_only,
+                )
+            events = calendar_page(calendar_id, events, limit, after, descending)
+            return events, truncated, None
+        except AsyncHttpError as e:
+            logger.warning('Failed to fetch the events of %s: %s', calendar_id, e)
+            return [], False, {'status': e.status, 'message': str(e)}
+        except (ServiceBuildError, KeyError, AttributeError) as e:
+            logger.warning('Failed to fetch the events of %s: %s', calendar_id, e)
+            return [], False, {'status': 500, 'message': str(e)}
+
+    logger.info(
+        'Fetching events from %d calendars between %s and %s',
+        len(calendar_ids),
+        start_date,
+        end_date,
+    )
+    results = await asyncio.gather(*(fetch(calendar_id) for calendar_id in calendar_ids))
+    return merge_calendar_events(calendar_ids, results, limit, descending, fields, sort)
+
+
+async def create_event(calendar_id, event_body, conflicts: str = None):
+    """
+    Creates a new calendar event, see src.services.event.create_event.
+    With EVENT_SYNC the calendar is synced on the event loop before the
+    conflicts are checked in a worker thread, with the interval index of the
+    calendar read from the stored events.
+    """
+    validate_new_event(calendar_id, event_body)
+
+    logger.debug('Calendar ID: %s', calendar_id)
+    logger.debug('Event body: %s', event_body)
+
+    client = _get_client()
+    mode = conflicts or EVENT_CONFLICTS
+    found_conflicts = []
+    if checks_conflicts(mode):
+        if EVENT_SYNC:
+            try:
+                await sync_calendar(client, calendar_id)
+            except AsyncHttpError as error:
+                raise api_error('Failed to fetch the calendar events', error)
+        found_conflicts = await asyncio.to_thread(
+            check_conflicts, calendar_id, event_body, mode, synced=True
+        )
+
+    try:
+        event = await client.request('POST', events_path(calendar_id), json=event_body)
+
+        # Add computed properties to the event
+        event = update_event_properties(event)
+
+        await asyncio.to_thread(store_event, calendar_id, event)
+        return created_event(event, found_conflicts)
+    except AsyncHttpError as error:
+        raise api_error('Failed to create the event', error)
+    except KeyError as e:
+        raise properties_error(e)
+
+
+async def delete_event(calendar_id, event_id):
+    """Deletes a single calendar event."""
+    validate_event_id(calendar_id, event_id)
+
+    client = _get_client()
+    try:
+        await client.request('DELETE', events_path(calendar_id, event_id))
+        await asyncio.to_thread(forget_event, calendar_id, event_id)
+        logger.info('Event with ID %s deleted successfully', event_id)
+    except AsyncHttpError as error:
+        raise api_error('Failed to delete the event', error)
+
+
+async def update_event(
+    calendar_id, event_id, event_body, etag: str = None, replace: bool = False
+):
+    """
+    Updates the given fields of a calendar event with a partial (PATCH) update,
+    or replaces the event (PUT), see src.services.event.update_event.
+    """
+    validate_event_update(calendar_id, event_id, event_body, replace)
+
+    logger.debug('Calendar ID: %s', calendar_id)
+    logger.debug('Event ID: %s', event_id)
+    logger.debug('Event body: %s', event_body)
+
+    client = _get_client()
+    try:
+        updated_event = await client.request(
+            'PUT' if replace else 'PATCH',
+            events_path(calendar_id, event_id),
+            json=event_body,
+            # Google rejects the update if the event has changed since
+            headers={'If-Match': etag} if etag else None,
+        )
+
+        updated_event = update_event_properties(updated_event)
+        await asyncio.to_thread(store_event, calendar_id, updated_event)
+
+        logger.info('Event with ID %s updated successfully', event_id)
+        return updated_event
+    except AsyncHttpError as error:
+        raise update_error(error.status, event_id, error)
+    except KeyError as e:
+        raise properties_error(e)
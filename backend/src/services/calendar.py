@@ -1,29 +1,46 @@
 from googleapiclient.errors import HttpError
 
+from src.cache import TTLCache
+from src.constants import CALENDAR_CACHE_TTL
 from src.error import APIError, ServiceBuildError
 from src.logger_config import logger
-from src.utils import build_service, write_to_output_file
+from src.output_writer import queue_output_file
+from src.service_pool import get_service
 
+# Calendar list and calendar metadata, shared by every caller
+calendar_cache = TTLCache('calendars', ttl=CALENDAR_CACHE_TTL)
 
-def get_calendar_list():
-    """Fetches the list of calendars from the Google Calendar API."""
+CALENDAR_LIST_KEY = 'calendar_list'
+
+
+def _fetch_calendar_list(service):
+    calendar_list = service.calendarList().list().execute()
+    calendars = calendar_list.get('items', [])
+    calendar_summaries = [calendar['summary'] for calendar in calendars]
+
+    queue_output_file('calendars.json', calendars)
+    logger.info('Found %d calendars', len(calendars))
+    logger.debug('Calendars: %s', ', '.join(calendar_summaries))
+
+    return calendars
+
+
+def get_calendar_list(refresh: bool = False):
+    """
+    Fetches the list of calendars from the Google Calendar API.
+    The list is cached for CALENDAR_CACHE_TTL seconds, refresh reloads it.
+    """
     try:
-        service = build_service()
+        service = get_service()
     except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
         )
 
     try:
-        calendar_list = service.calendarList().list().execute()
-        calendars = calendar_list.get('items', [])
-        calendar_summaries = [calendar['summary'] for calendar in calendars]
-
-        write_to_output_file('calendars.json', calendars)
-        logger.info('Found %d calendars', len(calendars))
-        logger.debug('Calendars: %s', ', '.join(calendar_summaries))
-
-        return calendars
+        return calendar_cache.get(
+            CALENDAR_LIST_KEY, lambda: _fetch_calendar_list(service), refresh=refresh
+        )
     except HttpError as error:
         raise APIError(
             500,
@@ -36,3 +53,32 @@ def get_calendar_list():
             'Internal Server Error',
             f'Unexpected error occurred while fetching the calendar list. {e}',
         )
+
+
+def get_calendar_summary(service, calendar_id) -> str:
+    """
+    Returns the summary (title) of the calendar from the cached calendar list.
+    Calendars missing from the list are looked up once and cached separately.
+    Raises:
+        HttpError: If the Google Calendar API request fails.
+    """
+    calendars = calendar_cache.get(
+        CALENDAR_LIST_KEY, lambda: _fetch_calendar_list(service)
+    )
+    for calendar in calendars:
+        if calendar.get('id') == calendar_id or (
+            calendar_id == 'primary' and calendar.get('primary')
+        ):
+            return calendar.get('summary')
+
+    calendar = calendar_cache.get(
+        calendar_id,
+        lambda: service.calendars().get(calendarId=calendar_id).execute(),
+    )
+    return calendar.get('summary')
+
+
+def refresh_calendar_cache():
+    """Drops the cached calendar metadata, the next request reloads it."""
+    calendar_cache.invalidate()
+    logger.info('Calendar cache invalidated')
@@ -0,0 +1,165 @@
+"""
+Conflicts between calendar events, see src.interval_index.
+
+With the event sync the interval index of a calendar is built once from the
+synced events and kept up to date by the event changes. The changes written
+by other workers sharing the SQLite event store move the store version past
+the index, which is then built again. Without the event sync, an index of the
+events of the requested time range is fetched for every request.
+"""
+
+from gcalcli.utils import get_time_from_str
+from googleapiclient.errors import HttpError
+
+from src.constants import EVENT_SYNC, RANGE_END, RANGE_START
+from src.error import APIError, ParameterError, ServiceBuildError
+from src.event_store import to_rfc3339
+from src.interval_index import IntervalIndex, busy_interval, interval_indexes
+from src.logger_config import logger
+from src.pagination import EventPages
+from src.service_pool import get_service
+from src.sync import get_store_version, read_synced_events, sync_calendar
+
+# What create_event does when the new event overlaps existing events
+CONFLICTS_IGNORE = 'ignore'
+CONFLICTS_FLAG = 'flag'
+CONFLICTS_REJECT = 'reject'
+CONFLICT_MODES = (CONFLICTS_IGNORE, CONFLICTS_FLAG, CONFLICTS_REJECT)
+
+
+def _load_interval_index(calendar_id) -> IntervalIndex:
+    events = read_synced_events(
+        calendar_id,
+        get_time_from_str(RANGE_START).timestamp(),
+        get_time_from_str(RANGE_END).timestamp(),
+    )
+    index = IntervalIndex(events)
+    logger.info('Indexed %d busy events of %s', len(index), calendar_id)
+    return index
+
+
+def _get_interval_index(
+    calendar_id, start: float, end: float, synced: bool = False
+) -> IntervalIndex:
+    """
+    Returns an interval index that has at least the events of the calendar
+    that overlap the time range [start, end). With synced, the event sync of
+    the calendar has just run and the index is read from the stored events.
+    """
+    service = None
+    if not (EVENT_SYNC and synced):
+        try:
+            service = get_service()
+        except ServiceBuildError as e:
+            raise APIError(
+                500, 'Service Build Error', f'Failed to build the service: {str(e)}'
+            )
+
+    try:
+        if not EVENT_SYNC:
+            pages = EventPages(
+                service,
+                calendarId=calendar_id,
+                timeMin=to_rfc3339(start),
+                timeMax=to_rfc3339(end),
+                singleEvents=True,
+                orderBy='startTime',
+            )
+            return IntervalIndex(event for page in pages for event in page)
+
+        if not synced:
+            # Applies the changes made outside our services to the index
+            sync_calendar(service, calendar_id)
+        return interval_indexes.get(
+            calendar_id,
+            lambda: _load_interval_index(calendar_id),
+            get_store_version(calendar_id),
+        )
+    except HttpError as error:
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to fetch the calendar events. {error}',
+        )
+    except KeyError as e:
+        raise APIError(
+            500,
+            'Event Properties Error',
+            f'Failed to index the calendar events. {str(e)}',
+        )
+
+
+def find_conflicts(calendar_id, event: dict, synced: bool = False) -> list[dict]:
+    """
+    Returns the events of the calendar that overlap the time of the event,
+    oldest first. Events that do not block time never conflict, see
+    busy_interval. With synced the calendar is not synced again, see
+    _get_interval_index.
+    """
+    interval = busy_interval(event)
+    if interval is None:
+        return []
+    index = _get_interval_index(calendar_id, *interval, synced=synced)
+    if not index.has_conflict(*interval):
+        return []
+    return index.conflicts(*interval)
+
+
+def checks_conflicts(mode: str) -> bool:
+    """
+    Returns whether the conflicts mode checks new events for conflicts.
+    Raises:
+        ParameterError: If the mode is unknown.
+    """
+    if mode not in CONFLICT_MODES:
+        raise ParameterError(f'Conflicts must be one of: {", ".join(CONFLICT_MODES)}')
+    return mode != CONFLICTS_IGNORE
+
+
+def check_conflicts(
+    calendar_id, event_body: dict, mode: str, synced: bool = False
+) -> list[dict]:
+    """
+    Checks a new event for conflicts with the existing events of the calendar.
+    Returns the conflicting events, always empty when conflicts are ignored.
+    With synced the calendar is not synced again, see _get_interval_index.
+    Raises:
+        ParameterError: If the mode is unknown.
+        APIError: If the mode rejects conflicts and the event has any.
+    """
+    if not checks_conflicts(mode):
+        return []
+
+    try:
+        conflicts = find_conflicts(calendar_id, event_body, synced)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ParameterError(f'Invalid event start or end: {str(e)}')
+    if conflicts and mode == CONFLICTS_REJECT:
+        raise APIError(
+            409,
+            'Conflict',
+            f'The event overlaps {len(conflicts)} events: '
+            + ', '.join(conflict['summary'] for conflict in conflicts),
+        )
+    return conflicts
+
+
+def get_overlapping_events(calendar_id, start_date, end_date) -> list[dict]:
+    """
+    Returns the pairs of events of the calendar that overlap each other in the
+    time range, each as a dict of the first and the second event.
+    """
+    start = get_time_from_str(start_date).timestamp()
+    end = get_time_from_str(end_date).timestamp()
+    if start > end:
+        raise ParameterError('Start date is after the end date')
+
+    pairs = _get_interval_index(calendar_id, start, end).overlapping_pairs(start, end)
+    logger.info(
+        'Found %d overlapping event pairs of %s between %s and %s',
+        len(pairs),
+        calendar_id,
+        start_date,
+        end_date,
+    )
+    return [{'first': first, 'second': second} for first, second in pairs]
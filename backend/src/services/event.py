@@ -1,22 +1,69 @@
-from collections import Counter
-from datetime import datetime, timedelta
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 from gcalcli.utils import get_time_from_str
 from gcalcli.validators import parsable_date_validator
 from googleapiclient.errors import HttpError
 
+from src.batch import error_status, execute_in_batches
+from src.constants import (
+    BULK_DELETE_CONCURRENCY,
+    EVENT_CONFLICTS,
+    EVENT_SYNC,
+    HISTORY_CACHE_TTL,
+    HISTORY_DAYS,
+    MAX_EVENT_LIMIT,
+    MAX_SUGGESTIONS,
+    MULTI_CALENDAR_CONCURRENCY,
+    RANGE_END,
+    RANGE_START,
+    UPDATABLE_EVENT_FIELDS,
+)
 from src.error import APIError, ParameterError, ServiceBuildError
+from src.event_properties import (
+    EventPropertiesEngine,
+    iter_event_properties,
+    update_event_properties,
+)
+from src.event_store import event_key, matches_query, to_rfc3339, to_timestamp
 from src.logger_config import logger
-from src.utils import build_service, format_event_time_from_iso, write_to_output_file
+from src.output_writer import queue_output_file
+from src.pagination import EventPages, decode_cursor, encode_cursor, paginate
+from src.projection import needs_computed_properties, project_events, upstream_fields
+from src.service_pool import get_service
+from src.services.calendar import get_calendar_list, get_calendar_summary
+from src.services.conflicts import check_conflicts
+from src.summary_index import SummaryIndex, summary_indexes
+from src.sync import (
+    forget_event,
+    forget_events,
+    get_store_version,
+    get_synced_events,
+    store_event,
+    sync_calendar,
+)
+
+# The fields of the events needed by the summary index
+HISTORY_FIELDS = ('id', 'summary', 'start')
+
+# The calendar_id of a multi-calendar query of every calendar
+ALL_CALENDARS = 'all'
+# The calendar of each event of a multi-calendar query
+CALENDAR_ID_FIELD = 'calendarId'
+
+SORT_OLDEST_FIRST = 'start'
+SORT_NEWEST_FIRST = '-start'
+SORT_ORDERS = (SORT_NEWEST_FIRST, SORT_OLDEST_FIRST)
 
 
 def get_event(calendar_id, event_id):
     """Fetches a single calendar event by ID."""
-    if calendar_id is None or event_id is None:
-        raise ParameterError('Calendar ID or event ID is missing')
+    validate_event_id(calendar_id, event_id)
 
     try:
-        service = build_service()
+        service = get_service()
     except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
@@ -31,21 +78,239 @@ def get_event(calendar_id, event_id):
         logger.info('Found event with ID %s', event_id)
         return event
     except HttpError as error:
-        raise APIError(
-            500,
-            'Google Calendar API Error',
-            f'Failed to fetch the event. {error}',
-        )
+        raise api_error('Failed to fetch the event', error)
     except KeyError as e:
-        raise APIError(
-            500,
-            'Event Properties Error',
-            f'Failed to update computed event properties. {str(e)}',
+        raise properties_error(e)
+
+
+class EventResult(list):
+    """
+    A list of events that records whether a page limit truncated it, whether
+    it was served from the event store (cache hit) or not, and the cursor of
+    the next page of a paginated list.
+    """
+
+    truncated = False
+    cache_status = None
+    next_cursor = None
+    # Errors of the calendars of a multi-calendar list by calendar ID
+    errors = None
+
+
+def _filter_events(events, summary_contains: str = None, future_only: bool = False):
+    """Filters the events by a summary substring (ignoring case) and start time."""
+    if summary_contains:
+        summary_contains = summary_contains.casefold()
+        events = (
+            event
+            for event in events
+            if summary_contains in event.get('summary', '').casefold()
         )
+    if future_only:
+        now = time.time()
+        events = (event for event in events if to_timestamp(event['start']) > now)
+    return events
+
+
+def validate_event_range(calendar_id, start_date, end_date):
+    """Validates the calendar ID and the time range, returns the parsed dates."""
+    if calendar_id is None:
+        raise ParameterError('Calendar ID is missing')
+    if start_date is None or end_date is None:
+        raise ParameterError('Start date or end date is missing')
+    if (
+        get_time_from_str(start_date).timestamp()
+        > get_time_from_str(end_date).timestamp()
+    ):
+        raise ParameterError('Start date is after the end date')
+
+    # Validate and parse the start_date and end_date
+    try:
+        start_date = parsable_date_validator(start_date)
+        end_date = parsable_date_validator(end_date)
+    except ValueError as e:
+        raise ParameterError(f'Invalid date format: {str(e)}')
+
+    return start_date, end_date
+
+
+def validate_event_id(calendar_id, event_id):
+    """Validates the IDs of a single event."""
+    if calendar_id is None or event_id is None:
+        raise ParameterError('Calendar ID or event ID is missing')
+
+
+def validate_new_event(calendar_id, event_body):
+    """Validates the calendar ID and the body of a new event."""
+    if calendar_id is None or event_body is None:
+        raise ParameterError('Calendar ID or event body is missing')
+
+
+def api_error(failure: str, error) -> APIError:
+    """
+    Returns the APIError of a failed Google Calendar API request, the failure
+    describes what failed. Shared by the threaded and the asyncio services.
+    """
+    return APIError(500, 'Google Calendar API Error', f'{failure}. {error}')
+
+
+def properties_error(error) -> APIError:
+    """Returns the APIError of events whose computed properties failed."""
+    return APIError(
+        500,
+        'Event Properties Error',
+        f'Failed to update computed event properties. {str(error)}',
+    )
+
+
+def created_event(event: dict, found_conflicts: list) -> dict:
+    """Returns the response of a created and stored event with its conflicts."""
+    logger.info('Event created successfully: %s', event.get('id'))
+    if not found_conflicts:
+        return event
+    logger.warning('Event %s overlaps %d events', event.get('id'), len(found_conflicts))
+    # The stored event is shared, the conflicts only belong to the response
+    return dict(event, conflicts=found_conflicts)
+
+
+def list_events(
+    service,
+    calendar_id,
+    start_date,
+    end_date,
+    search_query=None,
+    fields=None,
+    descending=False,
+):
+    """
+    Lists the events of the time range, oldest first, with the computed
+    properties added. The events are read from the synced event store, or when
+    EVENT_SYNC is disabled, fetched page by page from the API. The event store
+    returns the events newest first when descending, the API only ascending.
+
+    With a fields projection (see src.projection) only the selected fields are
+    fetched from the API and returned, and the computed properties are only
+    added when selected.
+
+    Returns the events, the EventPages that fetch them, which is None for
+    events read from the event store, and the cache status of the event store.
+    Raises:
+        HttpError: If the Google Calendar API request fails.
+    """
+    if EVENT_SYNC:
+        events, cache_status = get_synced_events(
+            service,
+            calendar_id,
+            get_time_from_str(start_date).timestamp(),
+            get_time_from_str(end_date).timestamp(),
+            descending,
+        )
+        if search_query:
+            events = (event for event in events if matches_query(event, search_query))
+        if fields is not None:
+            events = project_events(events, fields)
+        return events, None, cache_status
+
+    list_params = {}
+    if fields is not None:
+        # Google only sends the selected fields of each event
+        list_params['fields'] = upstream_fields(fields)
+    pages = EventPages(
+        service,
+        calendarId=calendar_id,  # Default is 'primary'
+        timeMin=start_date,  # RFC3339 timestamp, 2011-06-03T10:00:00Z
+        timeMax=end_date,  # RFC3339 timestamp, 2011-06-03T10:00:00Z
+        q=search_query,  # Optional search query
+        singleEvents=True,
+        orderBy='startTime',
+        **list_params,
+    )
+    if fields is None:
+        return iter_event_properties(pages), pages, None
+    if needs_computed_properties(fields):
+        events = iter_event_properties(pages)
+    else:
+        events = (event for page in pages for event in page)
+    return project_events(events, fields), pages, None
+
+
+def _prepare_query(start_date, end_date, limit, cursor, sort, future_only):
+    """
+    Validates the paging parameters of an event list and returns the time
+    range to read, whether the events are sorted newest first and the sort
+    key of the cursor, or None if no events can follow the cursor.
+    Raises:
+        ParameterError: If the sort, limit or cursor is invalid.
+    """
+    if sort not in SORT_ORDERS:
+        raise ParameterError(f'Sort must be one of: {", ".join(SORT_ORDERS)}')
+    if limit is not None and not 1 <= limit <= MAX_EVENT_LIMIT:
+        raise ParameterError(f'Limit must be between 1 and {MAX_EVENT_LIMIT}')
+    descending = sort == SORT_NEWEST_FIRST
+    after = decode_cursor(cursor, sort) if cursor else None
+
+    # Only the part of the time range after the cursor has to be read
+    range_start = get_time_from_str(start_date).timestamp()
+    range_end = get_time_from_str(end_date).timestamp()
+    if after is not None and not descending:
+        range_start = max(range_start, after[0] - 1)
+    if after is not None and descending:
+        range_end = min(range_end, after[0] + 1)
+    if future_only:
+        range_start = max(range_start, time.time())
+    if range_start >= range_end:
+        return None
+    start_date = to_rfc3339(range_start)
+    end_date = to_rfc3339(range_end)
+    return start_date, end_date, descending, after
+
+
+def _list_fields(fields, summary_contains: str = None):
+    if fields is None:
+        return None
+    # Sorting and filtering need these fields, the projection drops them
+    list_fields = fields + ('id', 'start', 'end')
+    if summary_contains:
+        list_fields += ('summary',)
+    return list_fields
+
+
+def _list_sorted_events(
+    service,
+    calendar_id,
+    start_date,
+    end_date,
+    search_query,
+    list_fields,
+    descending,
+    summary_contains,
+    future_only,
+):
+    """
+    Lists the filtered events of the time range sorted by their sort key,
+    see list_events.
+    """
+    events, pages, cache_status = list_events(
+        service, calendar_id, start_date, end_date, search_query, list_fields, descending
+    )
+    events = _filter_events(events, summary_contains, future_only)
+    if pages is not None:
+        # Upstream pages are only ordered by start time
+        events = sorted(events, key=event_key, reverse=descending)
+    return events, pages, cache_status
 
 
 def get_events(
-    calendar_id, start_date: datetime, end_date: datetime, search_query: str = None
+    calendar_id,
+    start_date: datetime,
+    end_date: datetime,
+    search_query: str = None,
+    fields: tuple = None,
+    limit: int = None,
+    cursor: str = None,
+    sort: str = SORT_NEWEST_FIRST,
+    summary_contains: str = None,
+    future_only: bool = False,
 ):
     """
     Fetches Google Calendar events for the specified time range.
@@ -57,6 +322,13 @@ def get_events(
     2011-06-03, 2011-06-03T10:00:00-07:00, 2011-06-03T10:00:00Z.
 
     search_query: Optional search query to filter events by title or description.
+    fields: Optional projection of the event fields, see src.projection.
+    limit: Optional maximum number of events, the result has a next_cursor
+    when more events follow.
+    cursor: Optional cursor of the next page from a previous result.
+    sort: '-start' for newest first (default) or 'start' for oldest first.
+    summary_contains: Optional substring of the summary, ignoring case.
+    future_only: Only return events that start in the future.
     """
     logger.info(
         'Fetching events from %s between %s and %s',
@@ -65,47 +337,36 @@ def get_events(
         end_date,
     )
 
-    if calendar_id is None:
-        raise ParameterError('Calendar ID is missing')
-    if start_date is None or end_date is None:
-        raise ParameterError('Start date or end date is missing')
-    if (
-        get_time_from_str(start_date).timestamp()
-        > get_time_from_str(end_date).timestamp()
-    ):
-        raise ParameterError('Start date is after the end date')
-
-    # Validate and parse the start_date and end_date
-    try:
-        start_date = parsable_date_validator(start_date)
-        end_date = parsable_date_validator(end_date)
-    except ValueError as e:
-        raise ParameterError(f'Invalid date format: {str(e)}')
+    start_date, end_date = validate_event_range(calendar_id, start_date, end_date)
+    query = _prepare_query(start_date, end_date, limit, cursor, sort, future_only)
+    if query is None:
+        return EventResult()
+    start_date, end_date, descending, after = query
+    list_fields = _list_fields(fields, summary_contains)
 
     try:
-        service = build_service()
+        service = get_service()
     except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
         )
 
     try:
-        events_result = (
-            service.events()
-            .list(
-                calendarId=calendar_id,  # Default is 'primary'
-                timeMin=start_date,  # RFC3339 timestamp, 2011-06-03T10:00:00Z
-                timeMax=end_date,  # RFC3339 timestamp, 2011-06-03T10:00:00Z
-                q=search_query,  # Optional search query
-                singleEvents=True,
-                orderBy='startTime',
-            )
-            .execute()
-        )
-        events = events_result.get('items', [])
-        calendar_summary = (
-            service.calendars().get(calendarId=calendar_id).execute().get('summary')
+        events, pages, cache_status = _list_sorted_events(
+            service,
+            calendar_id,
+            start_date,
+            end_date,
+            search_query,
+            list_fields,
+            descending,
+            summary_contains,
+            future_only,
         )
+        events = page_events(events, limit, after, descending, fields, sort)
+        events.truncated = pages is not None and pages.truncated
+        events.cache_status = cache_status
+        calendar_summary = get_calendar_summary(service, calendar_id)
         logger.info(
             'Found %d events from %s between %s and %s with search query "%s"',
             len(events),
@@ -114,20 +375,218 @@ def get_events(
             end_date,
             search_query,
         )
+    except HttpError as error:
+        raise api_error('Failed to fetch the calendar events', error)
+    except (KeyError, AttributeError) as e:
+        raise properties_error(e)
+
+    queue_output_file('events.json', events)
+    return events
+
+
+def parse_calendar_ids(calendar_id: str):
+    """
+    Returns the calendar IDs of a multi-calendar query: 'all' for every
+    calendar of the calendar list, or a comma separated list of calendar IDs.
+    Returns None for a single calendar ID.
+    """
+    if calendar_id == ALL_CALENDARS:
+        return [calendar['id'] for calendar in get_calendar_list()]
+    if ',' not in calendar_id:
+        return None
+    calendar_ids = [part.strip() for part in calendar_id.split(',') if part.strip()]
+    if not calendar_ids:
+        raise ParameterError('Calendar ID is missing')
+    return list(dict.fromkeys(calendar_ids))
+
+
+def get_events_from_calendars(
+    calendar_ids,
+    start_date,
+    end_date,
+    search_query: str = None,
+    fields: tuple = None,
+    limit: int = None,
+    cursor: str = None,
+    sort: str = SORT_NEWEST_FIRST,
+    summary_contains: str = None,
+    future_only: bool = False,
+):
+    """
+    Fetches the events of several calendars, see get_events for the parameters.
+    The calendars are read concurrently, at most MULTI_CALENDAR_CONCURRENCY at
+    a time, and their sorted events are merged lazily in the sort order, so
+    only the first limit + 1 events of each calendar are needed. Every event
+    has the ID of its calendar as calendarId.
+
+    Calendars that fail are left out and reported in the errors of the result
+    by calendar ID, with the status code and message of the error.
+    Raises:
+        APIError: If every calendar fails.
+    """
+    if not calendar_ids:
+        raise ParameterError('Calendar ID is missing')
+    start_date, end_date = validate_event_range(calendar_ids[0], start_date, end_date)
+    query = _prepare_query(start_date, end_date, limit, cursor, sort, future_only)
+    if query is None:
+        return EventResult()
+    start_date, end_date, descending, after = query
+    list_fields = _list_fields(fields, summary_contains)
+
+    def fetch(calendar_id):
+        try:
+            events, pages, _ = _list_sorted_events(
+                get_service(),
+                calendar_id,
+                start_date,
+                end_date,
+                search_query,
+                list_fields,
+                descending,
+                summary_contains,
+                future_only,
+            )
+            events = calendar_page(calendar_id, events, limit, after, descending)
+            return events, pages is not None and pages.truncated, None
+        except (HttpError, ServiceBuildError, KeyError, AttributeError) as e:
+            logger.warning('Failed to fetch the events of %s: %s', calendar_id, e)
+            return [], False, {'status': error_status(e), 'message': str(e)}
+
+    logger.info(
+        'Fetching events from %d calendars between %s and %s',
+        len(calendar_ids),
+        start_date,
+        end_date,
+    )
+    max_workers = min(MULTI_CALENDAR_CONCURRENCY, len(calendar_ids))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch, calendar_ids))
+
+    events = merge_calendar_events(calendar_ids, results, limit, descending, fields, sort)
+    queue_output_file('events.json', events)
+    return events
+
+
+def page_events(
+    events, limit: int, after, descending: bool, fields: tuple, sort: str
+) -> EventResult:
+    """
+    Returns the page of the sorted events that follows the sort key after,
+    projected on the fields, with the cursor of the next page if more events
+    follow. Shared by the threaded and the asyncio services.
+    """
+    # The events are read only up to the first event of the next page
+    events, next_key = paginate(events, limit, after, descending)
+    if fields is not None:
+        events = project_events(events, fields)
+
+    events = EventResult(events)
+    if next_key is not None:
+        events.next_cursor = encode_cursor(next_key, sort)
+    return events
+
+
+def calendar_page(calendar_id, events, limit: int, after, descending: bool):
+    """
+    Returns the sorted events of one calendar of a multi-calendar query that
+    can be on the page, each with the ID of the calendar as calendarId.
+    """
+    # One more event than the limit tells whether more events follow
+    events, _ = paginate(
+        events, limit + 1 if limit is not None else None, after, descending
+    )
+    return [dict(event, calendarId=calendar_id) for event in events]
+
+
+def merge_calendar_events(
+    calendar_ids, results, limit: int, descending: bool, fields: tuple, sort: str
+) -> EventResult:
+    """
+    Merges the results of a multi-calendar query, (events, truncated, error)
+    of every calendar with the events from calendar_page, into one page.
+    Shared by the threaded and the asyncio services.
+    Raises:
+        APIError: If every calendar failed.
+    """
+    errors = {
+        calendar_id: error
+        for calendar_id, (_, _, error) in zip(calendar_ids, results)
+        if error is not None
+    }
+    if len(errors) == len(calendar_ids):
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to fetch the events of every calendar. {errors}',
+        )
+
+    merged = heapq.merge(
+        *(events for events, _, _ in results), key=event_key, reverse=descending
+    )
+    if fields is not None:
+        fields = fields + (CALENDAR_ID_FIELD,)
+    events = page_events(merged, limit, None, descending, fields, sort)
+    events.truncated = any(truncated for _, truncated, _ in results)
+    events.errors = errors
+    logger.info(
+        'Found %d events from %d calendars, %d failed',
+        len(events),
+        len(calendar_ids),
+        len(errors),
+    )
+    return events
+
+
+def stream_events(
+    calendar_id, start_date, end_date, search_query: str = None, fields: tuple = None
+):
+    """
+    Returns an iterator over the Google Calendar events of the time range in
+    upstream order (oldest first). Without the event store, the events are
+    fetched page by page while the iterator is consumed, so the whole result
+    never sits in memory.
+
+    The parameters are validated and the service is acquired immediately, so
+    those errors are raised before the iteration begins. Errors during the
+    iteration are raised as APIError.
+    """
+    logger.info(
+        'Streaming events from %s between %s and %s',
+        calendar_id,
+        start_date,
+        end_date,
+    )
+    start_date, end_date = validate_event_range(calendar_id, start_date, end_date)
+
+    try:
+        service = get_service()
+    except ServiceBuildError as e:
+        raise APIError(
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
+        )
+
+    try:
+        events, _, _ = list_events(
+            service, calendar_id, start_date, end_date, search_query, fields
+        )
     except HttpError as error:
         raise APIError(
             500,
             'Google Calendar API Error',
             f'Failed to fetch the calendar events. {error}',
         )
+    return _iter_streamed_events(events)
 
-    # Sort events by start time in descending order (newest first)
-    events.reverse()
 
+def _iter_streamed_events(events):
     try:
-        # Add computed properties to each event
-        for event in events:
-            event = update_event_properties(event)
+        yield from events
+    except HttpError as error:
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to fetch the calendar events. {error}',
+        )
     except (KeyError, AttributeError) as e:
         raise APIError(
             500,
@@ -135,64 +594,79 @@ def get_events(
             f'Failed to update computed event properties. {str(e)}',
         )
 
-    write_to_output_file('events.json', events)
-    return events
 
+def _load_summary_index(service, calendar_id) -> SummaryIndex:
+    now = time.time()
+    window = HISTORY_DAYS * 24 * 3600
+    # With the event sync the index is loaded again when the store version
+    # moves past it, and once the loaded future events no longer cover the
+    # window. Without it external changes never reach the index, which is
+    # loaded again after HISTORY_CACHE_TTL seconds.
+    expires_at = now + (window if EVENT_SYNC else HISTORY_CACHE_TTL)
+    events, pages, _ = list_events(
+        service,
+        calendar_id,
+        to_rfc3339(now - window),
+        to_rfc3339(expires_at),
+        fields=HISTORY_FIELDS,
+    )
+    index = SummaryIndex(window, expires_at, events, now)
+    if pages is not None and pages.truncated:
+        logger.warning(
+            'Summary index of %s truncated to %d events', calendar_id, len(index)
+        )
+    logger.info('Indexed the summaries of %d events of %s', len(index), calendar_id)
+    return index
 
-def get_popular_events(calendar_id):
+
+def get_summary_index(calendar_id) -> SummaryIndex:
     """
-    Fetches the summaries and counts of the maximum of 10 most frequently occurring events
-    from the past in selected calendar.
+    Returns the summary index of the events of the trailing HISTORY_DAYS days
+    of the calendar. The index is loaded once and then kept up to date by the
+    events created, updated and deleted through our services and the event sync.
+    Changes written to the shared event store by other workers are not applied
+    one by one, the index is loaded again when the store version moves past it.
     """
     try:
-        service = build_service()
-    except Exception as e:
+        service = get_service()
+    except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
         )
 
     try:
-        # Fetch all events from the calendar
-        now = datetime.now()
-        events_result = (
-            service.events()
-            .list(
-                calendarId=calendar_id,
-                timeMin=(now - timedelta(days=365)).isoformat() + 'Z',
-                timeMax=now.isoformat() + 'Z',
-                maxResults=1000,  # Fetch a larger dataset for frequency analysis
-                singleEvents=True,
-                orderBy='startTime',
-            )
-            .execute()
+        version = None
+        if EVENT_SYNC:
+            # Applies the changes made outside our services to the index
+            sync_calendar(service, calendar_id)
+            version = get_store_version(calendar_id)
+        return summary_indexes.get(
+            calendar_id, lambda: _load_summary_index(service, calendar_id), version
         )
-        events = events_result.get('items', [])
-        logger.info('Found %d events in the calendar', len(events))
     except HttpError as error:
         raise APIError(
             500,
             'Google Calendar API Error',
             f'Failed to fetch events from the calendar. {error}',
         )
-
-    # Analyze and find the top 10 most frequent event summaries
-    try:
-        # Count the frequency of each event summary
-        summaries = [event.get('summary', 'Untitled Event') for event in events]
-        summary_counts = Counter(summaries)
-
-        # Get the top 10 most common summaries and their frequencies
-        top_summary_counts = summary_counts.most_common(10)
-        logger.info('Top 10 popular events with counts: %s', top_summary_counts)
     except KeyError as e:
         raise APIError(
             500,
             'Event Analysis Error',
-            f'Failed to analyze event frequencies. {str(e)}',
+            f'Failed to index event summaries. {str(e)}',
         )
 
-    # Write detailed events to a file (optional for debugging)
-    write_to_output_file('popular_events.json', events)
+
+def get_popular_events(calendar_id):
+    """
+    Fetches the summaries and counts of the maximum of 10 most frequently occurring events
+    from the past in selected calendar.
+    """
+    top_summary_counts = get_summary_index(calendar_id).top(10)
+    logger.info('Top 10 popular events with counts: %s', top_summary_counts)
+
+    # Write the results to a file (optional for debugging)
+    queue_output_file('popular_events.json', top_summary_counts)
 
     # Return a dictionary of the top 10 summaries with their counts
     return {summary: count for summary, count in top_summary_counts}
@@ -204,68 +678,39 @@ def get_recent_unique_events(calendar_id) -> list[str]:
     from the selected calendar.
     Prioritizes recency while filtering out duplicate summaries.
     """
-    try:
-        service = build_service()
-    except Exception as e:
-        raise APIError(
-            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
-        )
-
-    try:
-        # Fetch events ordered by start time, descending
-        now = datetime.now()
-        events_result = (
-            service.events()
-            .list(
-                calendarId=calendar_id,
-                timeMin=(now - timedelta(days=365)).isoformat() + 'Z',
-                timeMax=now.isoformat() + 'Z',
-                maxResults=1000,  # Fetch a larger dataset to ensure uniqueness
-                singleEvents=True,
-                orderBy='startTime',
-            )
-            .execute()
-        )
-        events = events_result.get('items', [])
-        logger.info('Found %d events in the calendar', len(events))
-    except HttpError as error:
-        raise APIError(
-            500,
-            'Google Calendar API Error',
-            f'Failed to fetch events from the calendar. {error}',
-        )
+    summaries = get_summary_index(calendar_id).recent(10)
+    logger.info('Found %d unique recent events', len(summaries))
 
-    # Extract and filter unique summaries by recency
-    try:
-        unique_events = {}
-        recent_events = []
+    # Write the results to a file (optional for debugging)
+    queue_output_file('recent_unique_events.json', summaries)
 
-        # Reverse to prioritize more recent events (descending)
-        for event in reversed(events):
-            summary = event.get('summary', 'Untitled Event')
-            if summary not in unique_events:
-                unique_events[summary] = event
-                recent_events.append(event)
+    return summaries
 
-            if len(recent_events) == 10:  # Stop once we have 10 unique events
-                break
 
-        logger.info('Found %d unique recent events', len(recent_events))
-    except KeyError as e:
-        raise APIError(
-            500,
-            'Event Processing Error',
-            f'Failed to process unique events. {str(e)}',
-        )
-
-    # Write detailed events to a file (optional for debugging)
-    write_to_output_file('recent_unique_events.json', recent_events)
+def suggest_summaries(calendar_id, prefix: str = '', limit: int = 10) -> list[dict]:
+    """
+    Returns the summaries of the events of the trailing HISTORY_DAYS days that
+    have a word starting with the prefix, ignoring case, ranked by frequency
+    and recency, see SummaryIndex.suggest. Each suggestion has the summary,
+    its number of events and the start of its latest event.
+    Raises:
+        ParameterError: If the limit is not between 1 and MAX_SUGGESTIONS.
+    """
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        raise ParameterError(f'Limit must be between 1 and {MAX_SUGGESTIONS}')
 
-    # Return the summaries of the 10 most recent unique events
-    return [event.get('summary', 'Untitled Event') for event in recent_events]
+    suggestions = get_summary_index(calendar_id).suggest(prefix or '', limit)
+    return [
+        {
+            'summary': summary,
+            'count': count,
+            'last_start': to_rfc3339(last_start),
+        }
+        for summary, count, last_start in suggestions
+    ]
 
 
-def create_event(calendar_id, event_body):
+def create_event(calendar_id, event_body, conflicts: str = None):
     """
     Creates a new calendar event.
     POST https://www.googleapis.com/calendar/v3/calendars/calendarId/events
@@ -274,15 +719,22 @@ def create_event(calendar_id, event_body):
     Required properties in the event body:
     - end: The end time of the event.
     - start: The start time of the event.
+
+    conflicts: What to do when the event overlaps existing events, 'ignore',
+    'flag' to list them as conflicts of the created event, or 'reject' to
+    fail with 409 Conflict. Defaults to EVENT_CONFLICTS.
     """
-    if calendar_id is None or event_body is None:
-        raise ParameterError('Calendar ID or event body is missing')
+    validate_new_event(calendar_id, event_body)
 
     logger.debug('Calendar ID: %s', calendar_id)
     logger.debug('Event body: %s', event_body)
 
+    found_conflicts = check_conflicts(
+        calendar_id, event_body, conflicts or EVENT_CONFLICTS
+    )
+
     try:
-        service = build_service()
+        service = get_service()
     except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
@@ -294,32 +746,204 @@ def create_event(calendar_id, event_body):
         # Add computed properties to the event
         event = update_event_properties(event)
 
-        logger.info('Event created successfully: %s', event.get('id'))
-        return event
+        store_event(calendar_id, event)
+        return created_event(event, found_conflicts)
     except HttpError as error:
+        raise api_error('Failed to create the event', error)
+    except KeyError as e:
+        raise properties_error(e)
+
+
+def create_events(calendar_id, event_bodies):
+    """
+    Creates many calendar events with batch requests, BATCH_SIZE events per
+    round trip. A failed event does not stop the others from being created.
+    https://developers.google.com/calendar/api/guides/batch
+
+    Returns a result for each event body, in the order of the event bodies:
+    - {'index': i, 'status': 201, 'event': created event} or
+    - {'index': i, 'status': error status, 'error': error message}
+    """
+    if calendar_id is None:
+        raise ParameterError('Calendar ID is missing')
+    if not isinstance(event_bodies, list) or not event_bodies:
+        raise ParameterError('Request body must be a non-empty array of events')
+    if not all(isinstance(event_body, dict) for event_body in event_bodies):
+        raise ParameterError('Every event in the array must be an object')
+
+    logger.debug('Calendar ID: %s', calendar_id)
+    logger.debug('Creating %d events', len(event_bodies))
+
+    def insert(service, event_body):
+        return service.events().insert(calendarId=calendar_id, body=event_body)
+
+    try:
+        batch_results = execute_in_batches(get_service, insert, event_bodies)
+    except ServiceBuildError as e:
         raise APIError(
-            500,
-            'Google Calendar API Error',
-            f'Failed to create the event. {error}',
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
         )
-    except KeyError as e:
+
+    update_properties = EventPropertiesEngine().update
+    results = []
+    for index, (event, exception) in enumerate(batch_results):
+        if exception is not None:
+            results.append(
+                {
+                    'index': index,
+                    'status': error_status(exception),
+                    'error': str(exception),
+                }
+            )
+            continue
+        try:
+            event = update_properties(event)
+        except KeyError as e:
+            logger.error('Failed to update computed event properties. %s', e)
+        store_event(calendar_id, event)
+        results.append({'index': index, 'status': 201, 'event': event})
+
+    created = sum(result['status'] == 201 for result in results)
+    logger.info('Created %d of %d events', created, len(event_bodies))
+    return results
+
+
+def delete_events(
+    calendar_id,
+    event_ids: list = None,
+    start_date=None,
+    end_date=None,
+    search_query: str = None,
+    dry_run: bool = False,
+):
+    """
+    Deletes many calendar events with batch requests. The events are selected
+    by an explicit list of event IDs, or by a time range and/or a search query.
+    Up to BULK_DELETE_CONCURRENCY batch requests of BATCH_SIZE deletes are in
+    flight at a time. With dry_run nothing is deleted, the report only lists
+    the events that would be deleted.
+
+    Returns a report with a result for each selected event:
+    - {'id': event ID, 'status': 204} or
+    - {'id': event ID, 'status': error status, 'error': error message}
+    The report is truncated when the events of the time range and query were
+    listed up to MAX_EVENT_PAGES pages, the events beyond are not selected and
+    a repeated request continues with them.
+    """
+    if calendar_id is None:
+        raise ParameterError('Calendar ID is missing')
+    if event_ids is not None and (start_date or end_date or search_query):
+        raise ParameterError('Select events either by IDs or by range and query')
+    if event_ids is None and not (start_date or end_date or search_query):
+        raise ParameterError('Event IDs, a time range or a search query is required')
+    if event_ids is not None and (
+        not isinstance(event_ids, list)
+        or not all(isinstance(event_id, str) for event_id in event_ids)
+    ):
+        raise ParameterError('Event IDs must be an array of strings')
+
+    try:
+        service = get_service()
+    except ServiceBuildError as e:
         raise APIError(
-            500,
-            'Event Properties Error',
-            f'Failed to update computed event properties. {str(e)}',
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
         )
 
+    truncated = False
+    if event_ids is None:
+        start_date, end_date = validate_event_range(
+            calendar_id, start_date or RANGE_START, end_date or RANGE_END
+        )
+        try:
+            events, pages, _ = list_events(
+                service,
+                calendar_id,
+                start_date,
+                end_date,
+                search_query,
+                fields=('id', 'summary', 'start'),
+            )
+            selected = [
+                {
+                    'id': event['id'],
+                    'summary': event.get('summary'),
+                    'start': event['start'],
+                }
+                for event in events
+            ]
+            # The pages are read once the events are selected
+            truncated = pages is not None and pages.truncated
+        except HttpError as error:
+            raise APIError(
+                500,
+                'Google Calendar API Error',
+                f'Failed to select the events to delete. {error}',
+            )
+        if truncated:
+            logger.warning(
+                'Selected the first %d events to delete of %s', len(selected), calendar_id
+            )
+    else:
+        selected = [{'id': event_id} for event_id in dict.fromkeys(event_ids)]
+
+    logger.info(
+        '%s %d events of %s',
+        'Dry run of deleting' if dry_run else 'Deleting',
+        len(selected),
+        calendar_id,
+    )
+    if dry_run:
+        return {
+            'dry_run': True,
+            'matched': len(selected),
+            'truncated': truncated,
+            'results': selected,
+        }
+
+    def delete(service, event):
+        return service.events().delete(calendarId=calendar_id, eventId=event['id'])
+
+    batch_results = execute_in_batches(
+        get_service, delete, selected, max_workers=BULK_DELETE_CONCURRENCY
+    )
+    results = []
+    for event, (_, exception) in zip(selected, batch_results):
+        if exception is None:
+            results.append({'id': event['id'], 'status': 204})
+        else:
+            results.append(
+                {
+                    'id': event['id'],
+                    'status': error_status(exception),
+                    'error': str(exception),
+                }
+            )
+
+    # One store transaction and one index update for all deleted events
+    forget_events(
+        calendar_id, [result['id'] for result in results if result['status'] == 204]
+    )
+    deleted = sum(result['status'] == 204 for result in results)
+    logger.info('Deleted %d of %d events', deleted, len(selected))
+    return {
+        'dry_run': False,
+        'matched': len(selected),
+        'truncated': truncated,
+        'deleted': deleted,
+        'failed': len(selected) - deleted,
+        'results': results,
+    }
+
 
 def delete_event(calendar_id, event_id):
     """
     Deletes a single calendar event.
     DELETE https://www.googleapis.com/calendar/v3/calendars/calendarId/events/eventId
     """
-    if calendar_id is None or event_id is None:
-        raise ParameterError('Calendar ID or event ID is missing')
+    validate_event_id(calendar_id, event_id)
 
     try:
-        service = build_service()
+        service = get_service()
     except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
@@ -327,77 +951,89 @@ def delete_event(calendar_id, event_id):
 
     try:
         service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        forget_event(calendar_id, event_id)
         logger.info('Event with ID %s deleted successfully', event_id)
     except HttpError as error:
-        raise APIError(
-            500,
-            'Google Calendar API Error',
-            f'Failed to delete the event. {error}',
-        )
+        raise api_error('Failed to delete the event', error)
 
 
-def update_event(calendar_id, event_id, event_body):
+def validate_event_update(calendar_id, event_id, event_body, replace: bool = False):
     """
-    Updates a calendar event.
-    PUT https://www.googleapis.com/calendar/v3/calendars/calendarId/events/eventId
-    https://developers.google.com/calendar/api/v3/reference/events/update
+    Validates the body of an update of a calendar event. A replacement must
+    hold the start and end of the event.
+    Raises:
+        ParameterError: If the IDs or the body are missing or invalid.
     """
     if calendar_id is None or event_id is None or event_body is None:
         raise ParameterError('Calendar ID or event ID or event body is missing')
+    if not isinstance(event_body, dict) or not event_body:
+        raise ParameterError('Event body must be an object with fields to update')
+
+    unknown_fields = set(event_body) - set(UPDATABLE_EVENT_FIELDS)
+    if unknown_fields:
+        raise ParameterError(
+            f'Fields cannot be updated: {", ".join(sorted(unknown_fields))}'
+        )
+    missing_fields = {'start', 'end'} - set(event_body) if replace else set()
+    if missing_fields:
+        raise ParameterError(
+            f'Replaced event is missing fields: {", ".join(sorted(missing_fields))}'
+        )
+
+
+def update_error(status: int, event_id, error) -> APIError:
+    """Returns the APIError of an update of an event that Google failed with status."""
+    if status == 412:
+        return APIError(
+            412,
+            'Precondition Failed',
+            f'Event with ID {event_id} has been modified since it was read',
+        )
+    if status == 404:
+        return APIError(404, 'Not Found', f'Event with ID {event_id} not found')
+    return api_error('Failed to update the event', error)
+
+
+def update_event(
+    calendar_id, event_id, event_body, etag: str = None, replace: bool = False
+):
+    """
+    Updates the given fields of a calendar event with a partial (PATCH) update,
+    or with replace, replaces the event with the body (PUT), which clears the
+    updatable fields that the body leaves out.
+    With an etag the update only succeeds if the event has not been modified
+    since the etag was read, otherwise it fails with 412 Precondition Failed.
+    https://developers.google.com/calendar/api/v3/reference/events/patch
+    https://developers.google.com/calendar/api/v3/reference/events/update
+    """
+    validate_event_update(calendar_id, event_id, event_body, replace)
 
     logger.debug('Calendar ID: %s', calendar_id)
     logger.debug('Event ID: %s', event_id)
     logger.debug('Event body: %s', event_body)
 
     try:
-        service = build_service()
+        service = get_service()
     except ServiceBuildError as e:
         raise APIError(
             500, 'Service Build Error', f'Failed to build the service: {str(e)}'
         )
 
     try:
-        # First retrieve the event from the API
-        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-
-        # Update the event with the new body
-        event['summary'] = event_body['summary']
-
-        # Update the event with the new body
-        updated_event = (
-            service.events()
-            .update(calendarId=calendar_id, eventId=event['id'], body=event)
-            .execute()
-        )
+        write = service.events().update if replace else service.events().patch
+        update_request = write(calendarId=calendar_id, eventId=event_id, body=event_body)
+        if etag:
+            # Google rejects the update if the event has changed since
+            update_request.headers['If-Match'] = etag
+        updated_event = update_request.execute()
 
         updated_event = update_event_properties(updated_event)
+        store_event(calendar_id, updated_event)
 
         logger.info('Event with ID %s updated successfully', event_id)
         logger.info('Event body: %s', event_body)
         return updated_event
     except HttpError as error:
-        raise APIError(
-            500,
-            'Google Calendar API Error',
-            f'Failed to update computed event properties. {error}',
-        )
+        raise update_error(error.resp.status, event_id, error)
     except KeyError as e:
-        raise APIError(
-            500,
-            'Event Properties Error',
-            f'Failed to update computed event properties. {str(e)}',
-        )
-
-
-def update_event_properties(event: dict):
-    """Updates the properties of a single calendar event."""
-    start = event['start'].get('dateTime', event['start'].get('date'))
-    end = event['end'].get('dateTime', event['end'].get('date'))
-    event['formatted_start'] = format_event_time_from_iso(start)
-    event['formatted_end'] = format_event_time_from_iso(end)
-
-    # Calculate the duration of the event in hours
-    time_difference = datetime.fromisoformat(end) - datetime.fromisoformat(start)
-    event['duration'] = time_difference.total_seconds() / 3600
-
-    return event
+        raise properties_error(e)
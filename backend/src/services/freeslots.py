@@ -0,0 +1,269 @@
+"""
+Free time slots of one or more calendars within working hours.
+
+The busy intervals of every calendar are merged into one sorted list of
+disjoint intervals, in O(n log n), and the gaps between them within the
+working hours of each day are the free slots. Slot boundaries are aligned to
+whole intervals with round_to_nearest_interval: the start is rounded up and
+the end down, so a slot never overlaps a busy interval.
+
+With the event sync the busy intervals come from the synced events, see
+src.interval_index.busy_interval. Without it they are queried from the
+freebusy API in one request for all calendars. Both count the events marked
+as busy (opaque), all-day events included.
+Reference: https://developers.google.com/calendar/api/v3/reference/freebusy/query
+"""
+
+from datetime import datetime, time, timedelta
+
+import pytz
+from gcalcli.utils import get_time_from_str
+from googleapiclient.errors import HttpError
+
+from src.batch import error_status
+from src.constants import EVENT_SYNC, TIMEZONE
+from src.error import APIError, ParameterError, ServiceBuildError
+from src.interval_index import busy_interval
+from src.logger_config import logger
+from src.service_pool import get_service
+from src.sync import get_synced_events
+from src.utils import round_to_nearest_interval
+
+# Longest time range searched for free slots
+MAX_FREE_SLOT_DAYS = 90
+
+
+def merge_intervals(intervals) -> list[tuple[float, float]]:
+    """Returns the union of the intervals as sorted disjoint intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def working_hours(
+    start: float,
+    end: float,
+    work_start: time,
+    work_end: time,
+    weekends: bool = False,
+    timezone: str = TIMEZONE,
+) -> list[tuple[float, float]]:
+    """
+    Returns the working hours of each day of the time range in the time zone,
+    clipped to the range. Saturdays and Sundays are skipped unless weekends.
+    """
+    tz = pytz.timezone(timezone)
+    windows = []
+    day = datetime.fromtimestamp(start, tz).date()
+    last_day = datetime.fromtimestamp(end, tz).date()
+    while day <= last_day:
+        if weekends or day.weekday() < 5:
+            window_start = tz.localize(datetime.combine(day, work_start)).timestamp()
+            window_end = tz.localize(datetime.combine(day, work_end)).timestamp()
+            window_start, window_end = max(window_start, start), min(window_end, end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += timedelta(days=1)
+    return windows
+
+
+def _align(start: float, end: float, interval_minutes: int, tz):
+    # Rounds the start up and the end down to whole intervals
+    aligned_start = round_to_nearest_interval(
+        datetime.fromtimestamp(start, tz), interval_minutes
+    )
+    if aligned_start.timestamp() < start:
+        aligned_start += timedelta(minutes=interval_minutes)
+    aligned_end = round_to_nearest_interval(
+        datetime.fromtimestamp(end, tz), interval_minutes
+    )
+    if aligned_end.timestamp() > end:
+        aligned_end -= timedelta(minutes=interval_minutes)
+    return aligned_start, aligned_end
+
+
+def find_free_slots(
+    busy,
+    windows,
+    min_minutes: int,
+    interval_minutes: int = 15,
+    timezone: str = TIMEZONE,
+) -> list[dict]:
+    """
+    Returns the free slots of at least min_minutes within the windows, which
+    must be sorted and disjoint, between the busy intervals. Each slot has the
+    aligned start and end in the time zone and its length in minutes.
+    """
+    tz = pytz.timezone(timezone)
+    busy = merge_intervals(busy)
+    slots = []
+    position = 0
+    for window_start, window_end in windows:
+        # Busy intervals that end before the window do not matter to later windows
+        while position < len(busy) and busy[position][1] <= window_start:
+            position += 1
+        free_start = window_start
+        index = position
+        while free_start < window_end:
+            if index < len(busy) and busy[index][0] < window_end:
+                free_end = max(busy[index][0], free_start)
+                next_start = busy[index][1]
+                index += 1
+            else:
+                free_end = next_start = window_end
+            slot_start, slot_end = _align(free_start, free_end, interval_minutes, tz)
+            minutes = (slot_end - slot_start).total_seconds() / 60
+            if minutes >= min_minutes:
+                slots.append(
+                    {
+                        'start': slot_start.isoformat(),
+                        'end': slot_end.isoformat(),
+                        'minutes': minutes,
+                    }
+                )
+            free_start = next_start
+    return slots
+
+
+def _query_free_busy(service, calendar_ids, start_date, end_date):
+    response = (
+        service.freebusy()
+        .query(
+            body={
+                'timeMin': start_date,
+                'timeMax': end_date,
+                'items': [{'id': calendar_id} for calendar_id in calendar_ids],
+            }
+        )
+        .execute()
+    )
+    busy = []
+    errors = {}
+    for calendar_id in calendar_ids:
+        calendar = response.get('calendars', {}).get(calendar_id, {})
+        if calendar.get('errors'):
+            reason = calendar['errors'][0].get('reason', 'unknown')
+            errors[calendar_id] = {
+                'status': 404 if reason == 'notFound' else 500,
+                'message': reason,
+            }
+            continue
+        busy.extend(
+            (
+                get_time_from_str(interval['start']).timestamp(),
+                get_time_from_str(interval['end']).timestamp(),
+            )
+            for interval in calendar.get('busy', [])
+        )
+    return busy, errors
+
+
+def _read_synced_busy(service, calendar_ids, start: float, end: float):
+    busy = []
+    errors = {}
+    for calendar_id in calendar_ids:
+        try:
+            events, _ = get_synced_events(service, calendar_id, start, end)
+            busy.extend(
+                interval
+                for interval in (busy_interval(event, all_day=True) for event in events)
+                if interval is not None
+            )
+        except HttpError as e:
+            logger.warning('Failed to sync the events of %s: %s', calendar_id, e)
+            errors[calendar_id] = {'status': error_status(e), 'message': str(e)}
+    return busy, errors
+
+
+def get_busy_intervals(calendar_ids, start_date, end_date):
+    """
+    Returns the busy intervals of the calendars in the time range as start and
+    end timestamps, unmerged, and the errors of the calendars that failed.
+    """
+    try:
+        service = get_service()
+    except ServiceBuildError as e:
+        raise APIError(
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
+        )
+
+    try:
+        if EVENT_SYNC:
+            start = get_time_from_str(start_date).timestamp()
+            end = get_time_from_str(end_date).timestamp()
+            return _read_synced_busy(service, calendar_ids, start, end)
+        return _query_free_busy(service, calendar_ids, start_date, end_date)
+    except HttpError as error:
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to query the busy times of the calendars. {error}',
+        )
+
+
+def get_free_slots(
+    calendar_ids,
+    start_date,
+    end_date,
+    min_minutes: int = 30,
+    work_start: str = '09:00',
+    work_end: str = '17:00',
+    interval_minutes: int = 15,
+    weekends: bool = False,
+) -> dict:
+    """
+    Returns the free slots of at least min_minutes that every calendar has
+    within the working hours of the time range, see find_free_slots, and the
+    errors of the calendars whose busy times could not be read.
+    Raises:
+        ParameterError: If a parameter is invalid.
+        APIError: If the busy times of every calendar failed.
+    """
+    if not calendar_ids:
+        raise ParameterError('Calendar IDs are missing')
+    if not 1 <= interval_minutes <= 60 or 60 % interval_minutes:
+        raise ParameterError('Interval must be a divisor of 60 minutes')
+    if min_minutes < 1:
+        raise ParameterError('Minimum slot length must be at least 1 minute')
+    try:
+        work_start = time.fromisoformat(work_start)
+        work_end = time.fromisoformat(work_end)
+        start = get_time_from_str(start_date).timestamp()
+        end = get_time_from_str(end_date).timestamp()
+    except ValueError as e:
+        raise ParameterError(str(e))
+    if work_start >= work_end:
+        raise ParameterError('Working hours must start before they end')
+    if start >= end:
+        raise ParameterError('Start date must be before the end date')
+    if end - start > MAX_FREE_SLOT_DAYS * 24 * 3600:
+        raise ParameterError(f'Time range must be at most {MAX_FREE_SLOT_DAYS} days')
+
+    busy, errors = get_busy_intervals(calendar_ids, start_date, end_date)
+    if len(errors) == len(calendar_ids):
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to read the busy times of every calendar. {errors}',
+        )
+
+    windows = working_hours(start, end, work_start, work_end, weekends)
+    slots = find_free_slots(busy, windows, min_minutes, interval_minutes)
+    logger.info(
+        'Found %d free slots in %d calendars between %s and %s',
+        len(slots),
+        len(calendar_ids),
+        start_date,
+        end_date,
+    )
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'slots': slots,
+        'errors': errors,
+    }
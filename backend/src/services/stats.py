@@ -0,0 +1,115 @@
+"""
+Per-summary statistics of the events of a time range.
+
+The statistics are computed in a single pass over the events, using the
+duration that the computed event properties already hold, and cached by
+calendar, time range and search query for EVENT_STATS_CACHE_TTL seconds, at
+most EVENT_STATS_CACHE_SIZE of them.
+The cache key holds the version of the stored events of the calendar, read
+after the sync, so a change to the events made by any worker sharing the event
+store makes the cached statistics stale.
+"""
+
+from googleapiclient.errors import HttpError
+
+from src.cache import TTLCache
+from src.constants import EVENT_STATS_CACHE_SIZE, EVENT_STATS_CACHE_TTL, EVENT_SYNC
+from src.error import APIError, ServiceBuildError
+from src.logger_config import logger
+from src.service_pool import get_service
+from src.services.event import list_events, validate_event_range
+from src.sync import get_store_version, sync_calendar
+
+stats_cache = TTLCache(
+    'event_stats', ttl=EVENT_STATS_CACHE_TTL, max_size=EVENT_STATS_CACHE_SIZE
+)
+
+# The events needed for the statistics
+STATS_FIELDS = ('summary', 'start', 'duration')
+
+
+def compute_event_stats(events) -> dict:
+    """
+    Returns the number of events and hours of each summary, with the first
+    and last start and the mean duration, sorted by the number of events.
+    The events must be sorted by start time, oldest first.
+    """
+    summaries = {}
+    total_events = 0
+    total_hours = 0.0
+    for event in events:
+        summary = event.get('summary', 'Untitled Event')
+        duration = event.get('duration', 0)
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        stats = summaries.get(summary)
+        if stats is None:
+            summaries[summary] = stats = {
+                'summary': summary,
+                'count': 0,
+                'total_hours': 0.0,
+                'first_start': start,
+            }
+        stats['count'] += 1
+        stats['total_hours'] += duration
+        stats['last_start'] = start
+        total_events += 1
+        total_hours += duration
+
+    for stats in summaries.values():
+        stats['mean_hours'] = stats['total_hours'] / stats['count']
+    return {
+        'total_events': total_events,
+        'total_hours': total_hours,
+        'summaries': sorted(
+            summaries.values(), key=lambda stats: (-stats['count'], stats['summary'])
+        ),
+    }
+
+
+def get_event_stats(calendar_id, start_date, end_date, search_query: str = None):
+    """
+    Returns the per-summary statistics of the calendar events of the time range,
+    see compute_event_stats.
+    """
+    start_date, end_date = validate_event_range(calendar_id, start_date, end_date)
+
+    try:
+        service = get_service()
+    except ServiceBuildError as e:
+        raise APIError(
+            500, 'Service Build Error', f'Failed to build the service: {str(e)}'
+        )
+
+    def load():
+        events, _, _ = list_events(
+            service, calendar_id, start_date, end_date, search_query, STATS_FIELDS
+        )
+        stats = compute_event_stats(events)
+        logger.info(
+            'Computed statistics of %d events of %s between %s and %s',
+            stats['total_events'],
+            calendar_id,
+            start_date,
+            end_date,
+        )
+        return dict(stats, start_date=start_date, end_date=end_date)
+
+    try:
+        if EVENT_SYNC:
+            # The version read after the sync covers the changes it brought in
+            sync_calendar(service, calendar_id)
+        version = get_store_version(calendar_id)
+        key = (calendar_id, version, start_date, end_date, search_query)
+        return stats_cache.get(key, load)
+    except HttpError as error:
+        raise APIError(
+            500,
+            'Google Calendar API Error',
+            f'Failed to fetch the calendar events. {error}',
+        )
+    except (KeyError, AttributeError) as e:
+        raise APIError(
+            500,
+            'Event Properties Error',
+            f'Failed to compute event statistics. {str(e)}',
+        )
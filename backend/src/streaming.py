@@ -0,0 +1,107 @@
+"""
+Chunked streaming responses for large event lists.
+
+The events are written to the response as a JSON array or as NDJSON (one JSON
+document per line) while they are fetched from the Google Calendar API.
+"""
+
+from itertools import chain, islice
+
+from flask import Response, request, stream_with_context
+
+from src.constants import ERROR_PROFILE, MASON, NDJSON, STREAM_CHUNK_SIZE
+from src.error import APIError, ParameterError
+from src.logger_config import logger
+from src.mason import MasonBuilder
+from src.serialization import dumps
+
+STREAM_JSON = 'json'
+STREAM_NDJSON = 'ndjson'
+STREAM_FORMATS = (STREAM_JSON, STREAM_NDJSON)
+
+
+def get_stream_format():
+    """
+    Returns the requested stream format, or None if streaming was not requested.
+    Streaming is requested with the stream=json|ndjson query parameter or with
+    an Accept header that prefers application/x-ndjson.
+    Raises:
+        ParameterError: If the stream query parameter has an unknown value.
+    """
+    stream_format = request.args.get('stream')
+    if stream_format is not None:
+        if stream_format not in STREAM_FORMATS:
+            raise ParameterError(
+                f'Unknown stream format "{stream_format}", '
+                f'expected one of: {", ".join(STREAM_FORMATS)}'
+            )
+        return stream_format
+    if request.accept_mimetypes.best == NDJSON:
+        return STREAM_NDJSON
+    return None
+
+
+def _error_body(error: Exception) -> MasonBuilder:
+    body = MasonBuilder(resource_url=request.path)
+    if isinstance(error, APIError):
+        body.add_error(error.title, error.message)
+    else:
+        body.add_error('Internal Server Error', str(error))
+    body.add_control('profile', href=ERROR_PROFILE)
+    return body
+
+
+def _iter_chunks(items, chunk_size: int):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def stream_response(items, stream_format: str) -> Response:
+    """
+    Returns a chunked response that serializes the items while they are consumed.
+
+    The first item is fetched before the response is returned, so errors that
+    happen before any data is available still produce a regular error response.
+    An error after the stream has started can no longer change the status code,
+    so the stream is ended with a Mason error object instead: as the last line
+    in NDJSON, or as the last element of the JSON array, which keeps the
+    document valid.
+    """
+    items = iter(items)
+    first = next(items, None)
+    if first is not None:
+        items = chain((first,), items)
+
+    def generate():
+        error = None
+
+        def guarded():
+            nonlocal error
+            try:
+                yield from items
+            except Exception as e:
+                logger.error('Error after the stream has started: %s', e)
+                error = e
+
+        if stream_format == STREAM_NDJSON:
+            for chunk in _iter_chunks(guarded(), STREAM_CHUNK_SIZE):
+                yield b''.join(dumps(item) + b'\n' for item in chunk)
+            if error is not None:
+                yield dumps(_error_body(error)) + b'\n'
+            return
+
+        separator = b'['
+        for chunk in _iter_chunks(guarded(), STREAM_CHUNK_SIZE):
+            yield separator + b','.join(dumps(item) for item in chunk)
+            separator = b','
+        if error is not None:
+            yield separator + dumps(_error_body(error))
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+    mimetype = NDJSON if stream_format == STREAM_NDJSON else MASON
+    response = Response(stream_with_context(generate()), status=200, mimetype=mimetype)
+    # Ask nginx to pass the chunks through instead of buffering the response
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
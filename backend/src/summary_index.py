@@ -0,0 +1,258 @@
+"""
+Incrementally maintained frequency and recency index of event summaries.
+
+A SummaryIndex counts the summaries of the events of one calendar that start
+within a sliding window of the past. Events created, updated and deleted
+through our services or by the event sync are applied to the index one by one,
+and events entering or leaving the window as time passes are applied when the
+index is queried, so the summaries are never recounted.
+
+Summaries are kept in buckets by their count, and by the start of their most
+recent event, which answers the top-k and the k most recent summaries in O(k).
+For autocompletion the summaries are also kept in a sorted prefix index: every
+word of a summary starts a key, and the keys that start with a prefix form one
+contiguous range that is found by binary search.
+"""
+
+import bisect
+import heapq
+import threading
+import time
+
+from src.calendar_index import CalendarIndexes
+from src.constants import SUGGEST_HALF_LIFE_DAYS
+from src.event_store import to_timestamp
+from src.sync import add_event_listener
+
+UNTITLED_EVENT = 'Untitled Event'
+
+
+def _start(item: tuple[float, str]) -> float:
+    return item[0]
+
+
+def _key(item: tuple[str, str]) -> str:
+    return item[0]
+
+
+def _prefix_keys(summary: str) -> set[str]:
+    # The summary from the start of each of its words, ignoring case
+    folded = summary.casefold()
+    return {
+        folded[i:]
+        for i, char in enumerate(folded)
+        if not char.isspace() and (i == 0 or folded[i - 1].isspace())
+    }
+
+
+def event_summary(event: dict) -> str:
+    """Returns the summary of the event, or 'Untitled Event'."""
+    return event.get('summary', UNTITLED_EVENT)
+
+
+class SummaryIndex(object):
+    """
+    Frequency and recency index of the summaries of the events that started
+    within the last window seconds. Events that start later are tracked and
+    enter the window once they start. The index expires at expires_at, when
+    the events it was loaded with no longer cover the window.
+    """
+
+    def __init__(self, window: float, expires_at: float, events=(), now: float = None):
+        self.window = window
+        self.expires_at = expires_at
+        self._lock = threading.Lock()
+        # Start and summary of every tracked event by ID
+        self._events = {}
+        # (start, ID) of every tracked event, sorted
+        self._timeline = []
+        # Sorted starts of the events of each summary within the window
+        self._starts = {}
+        # Summaries by their count, in the order they reached the count
+        self._buckets = {}
+        # Sorted counts of the non-empty buckets
+        self._counts = []
+        # (latest start, summary) of each summary within the window, sorted
+        self._recent = []
+        # (prefix key, summary) of each summary within the window, sorted
+        self._prefixes = []
+        now = time.time() if now is None else now
+        self._window_start = now - window
+        self._window_end = now
+        self._build(events)
+
+    def __len__(self):
+        return len(self._events)
+
+    def expired(self, now: float = None) -> bool:
+        """Returns whether the index must be loaded again."""
+        return (time.time() if now is None else now) >= self.expires_at
+
+    def _in_window(self, start: float) -> bool:
+        return self._window_start <= start <= self._window_end
+
+    def _move(self, summary: str, old_count: int, new_count: int):
+        if old_count:
+            bucket = self._buckets[old_count]
+            del bucket[summary]
+            if not bucket:
+                del self._buckets[old_count]
+                del self._counts[bisect.bisect_left(self._counts, old_count)]
+        if new_count:
+            bucket = self._buckets.get(new_count)
+            if bucket is None:
+                bucket = self._buckets[new_count] = {}
+                bisect.insort(self._counts, new_count)
+            bucket[summary] = None
+
+    def _count(self, start: float, summary: str):
+        starts = self._starts.get(summary)
+        if starts is None:
+            starts = self._starts[summary] = []
+            for key in _prefix_keys(summary):
+                bisect.insort(self._prefixes, (key, summary))
+        latest = starts[-1] if starts else None
+        bisect.insort(starts, start)
+        self._move(summary, len(starts) - 1, len(starts))
+        if latest is None or start > latest:
+            if latest is not None:
+                self._recent.remove((latest, summary))
+            bisect.insort(self._recent, (start, summary))
+
+    def _uncount(self, start: float, summary: str):
+        starts = self._starts[summary]
+        latest = starts[-1]
+        del starts[bisect.bisect_left(starts, start)]
+        self._move(summary, len(starts) + 1, len(starts))
+        if start == latest and (not starts or starts[-1] != latest):
+            self._recent.remove((latest, summary))
+            if starts:
+                bisect.insort(self._recent, (starts[-1], summary))
+        if not starts:
+            del self._starts[summary]
+            for key in _prefix_keys(summary):
+                del self._prefixes[bisect.bisect_left(self._prefixes, (key, summary))]
+
+    def _build(self, events):
+        # Sorts each structure once instead of inserting the events one by one
+        for event in events:
+            self._events[event['id']] = (
+                to_timestamp(event['start']),
+                event_summary(event),
+            )
+        self._timeline = sorted(
+            (start, event_id) for event_id, (start, _) in self._events.items()
+        )
+        for start, event_id in self._timeline:
+            if self._in_window(start):
+                self._starts.setdefault(self._events[event_id][1], []).append(start)
+        self._recent = sorted(
+            (starts[-1], summary) for summary, starts in self._starts.items()
+        )
+        self._prefixes = sorted(
+            (key, summary) for summary in self._starts for key in _prefix_keys(summary)
+        )
+        # A summary reached its count with its latest event
+        for _, summary in self._recent:
+            self._buckets.setdefault(len(self._starts[summary]), {})[summary] = None
+        self._counts = sorted(self._buckets)
+
+    def _add(self, event_id: str, start: float, summary: str):
+        self._events[event_id] = (start, summary)
+        bisect.insort(self._timeline, (start, event_id))
+        if self._in_window(start):
+            self._count(start, summary)
+
+    def _remove(self, event_id: str):
+        start, summary = self._events.pop(event_id)
+        del self._timeline[bisect.bisect_left(self._timeline, (start, event_id))]
+        if self._in_window(start):
+            self._uncount(start, summary)
+
+    def apply(self, changed=(), deleted=()):
+        """Applies created or updated events and the IDs of deleted events."""
+        with self._lock:
+            for event_id in deleted:
+                if event_id in self._events:
+                    self._remove(event_id)
+            for event in changed:
+                if event['id'] in self._events:
+                    self._remove(event['id'])
+                if event.get('status') != 'cancelled':
+                    self._add(
+                        event['id'], to_timestamp(event['start']), event_summary(event)
+                    )
+
+    def _advance(self, now: float):
+        window_start = now - self.window
+        if window_start > self._window_start:
+            # Events that started before the new window age out
+            low = bisect.bisect_left(self._timeline, self._window_start, key=_start)
+            high = bisect.bisect_left(self._timeline, window_start, key=_start)
+            for start, event_id in self._timeline[low:high]:
+                if start <= self._window_end:
+                    self._uncount(start, self._events[event_id][1])
+            self._window_start = window_start
+        if now > self._window_end:
+            # Events that started since the last query enter the window
+            low = bisect.bisect_right(self._timeline, self._window_end, key=_start)
+            high = bisect.bisect_right(self._timeline, now, key=_start)
+            for start, event_id in self._timeline[low:high]:
+                if start >= self._window_start:
+                    self._count(start, self._events[event_id][1])
+            self._window_end = now
+
+    def top(self, k: int, now: float = None) -> list[tuple[str, int]]:
+        """Returns the k most frequent summaries with their counts, in O(k)."""
+        with self._lock:
+            self._advance(time.time() if now is None else now)
+            top = []
+            for count in reversed(self._counts):
+                for summary in self._buckets[count]:
+                    if len(top) == k:
+                        return top
+                    top.append((summary, count))
+            return top
+
+    def recent(self, k: int, now: float = None) -> list[str]:
+        """Returns the k summaries that occurred most recently, in O(k)."""
+        with self._lock:
+            self._advance(time.time() if now is None else now)
+            recent = self._recent[max(len(self._recent) - k, 0) :]
+            return [summary for _, summary in reversed(recent)]
+
+    def suggest(self, prefix: str, k: int, now: float = None) -> list[tuple]:
+        """
+        Returns the summary, count and latest start of the k best summaries
+        with a word that starts with the prefix, ignoring case. Summaries are
+        ranked by their count, halved for every SUGGEST_HALF_LIFE_DAYS days
+        since their latest event. An empty prefix matches every summary.
+        """
+        now = time.time() if now is None else now
+        half_life = SUGGEST_HALF_LIFE_DAYS * 24 * 3600
+        prefix = prefix.strip().casefold()
+        with self._lock:
+            self._advance(now)
+            if prefix:
+                low = bisect.bisect_left(self._prefixes, prefix, key=_key)
+                # The first key after every key that starts with the prefix
+                end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                high = bisect.bisect_left(self._prefixes, end, key=_key)
+                matches = dict.fromkeys(
+                    summary for _, summary in self._prefixes[low:high]
+                )
+            else:
+                matches = self._starts
+
+            def score(summary):
+                starts = self._starts[summary]
+                return len(starts) * 0.5 ** ((now - starts[-1]) / half_life)
+
+            return [
+                (summary, len(self._starts[summary]), self._starts[summary][-1])
+                for summary in heapq.nlargest(k, matches, key=score)
+            ]
+
+
+summary_indexes = CalendarIndexes()
+add_event_listener(summary_indexes.apply_changes)
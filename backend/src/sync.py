@@ -0,0 +1,233 @@
+"""
+Incremental sync of calendar events into the local event store.
+
+The first sync of a calendar downloads all of its events and stores the
+nextSyncToken returned by the last page. Later syncs send the token and only
+receive the events that changed since, including cancelled (deleted) events.
+When Google invalidates the token (410 GONE) the calendar is fully synced again.
+Reference: https://developers.google.com/calendar/api/guides/sync
+"""
+
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from src.constants import SYNC_INTERVAL
+from src.event_properties import EventPropertiesEngine, update_events_properties
+from src.event_store import create_event_store
+from src.logger_config import logger
+from src.pagination import EventPages
+
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+
+event_store = create_event_store()
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+# Called with the calendar ID after the stored events of a calendar changed
+_change_listeners = []
+# Called with the calendar ID and the changed events, see add_event_listener
+_event_listeners = []
+
+
+def add_change_listener(listener):
+    """Registers a function to call with the calendar ID when its events change."""
+    _change_listeners.append(listener)
+
+
+def add_event_listener(listener):
+    """
+    Registers a function to call with the changes to the events of a calendar,
+    as listener(calendar_id, changed, deleted, full, version): the created or
+    updated events, the IDs of the deleted events, whether the changed events
+    replace all events of the calendar, and the store version the changes
+    were written as (None if they were not stored).
+    """
+    _event_listeners.append(listener)
+
+
+def _notify_change(
+    calendar_id, changed=(), deleted=(), full: bool = False, version: int = None
+):
+    for listener in _event_listeners:
+        listener(calendar_id, changed, deleted, full, version)
+    for listener in _change_listeners:
+        listener(calendar_id)
+
+
+def _get_lock(calendar_id) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(calendar_id, threading.Lock())
+
+
+def _list_pages(service, **list_params) -> EventPages:
+    # A sync must see every page, the page limit does not apply
+    return EventPages(service, max_pages=0, singleEvents=True, **list_params)
+
+
+def store_full_sync(calendar_id, items, sync_token: str):
+    """
+    Replaces the stored events of the calendar with the events listed by a
+    full sync and records the sync token of its last page.
+    """
+    events = update_events_properties(
+        event for event in items if event.get('status') != 'cancelled'
+    )
+    version = event_store.replace(calendar_id, events, sync_token)
+    _notify_change(calendar_id, events, full=True, version=version)
+    logger.info('Full sync of calendar %s stored %d events', calendar_id, len(events))
+
+
+def store_changes(calendar_id, items, sync_token: str):
+    """
+    Applies the events listed by an incremental sync, cancelled events are
+    deleted, and records the sync token of its last page.
+    """
+    update_properties = EventPropertiesEngine().update
+    updated = []
+    deleted = []
+    for event in items:
+        if event.get('status') == 'cancelled':
+            deleted.append(event['id'])
+        else:
+            updated.append(update_properties(event))
+    if updated or deleted:
+        # One transaction and one store version for all changes
+        version = event_store.apply(calendar_id, updated, deleted, sync_token)
+        _notify_change(calendar_id, updated, deleted, version=version)
+    else:
+        event_store.set_sync_state(calendar_id, sync_token)
+    logger.info(
+        'Incremental sync of calendar %s: %d updated, %d deleted events',
+        calendar_id,
+        len(updated),
+        len(deleted),
+    )
+
+
+def full_sync(service, calendar_id):
+    """Downloads all events of the calendar and replaces the stored events."""
+    logger.info('Full sync of calendar %s', calendar_id)
+    pages = _list_pages(service, calendarId=calendar_id)
+    items = [event for page in pages for event in page]
+    store_full_sync(calendar_id, items, pages.next_sync_token)
+
+
+def incremental_sync(service, calendar_id, sync_token: str):
+    """Applies the events changed since the sync token to the stored events."""
+    pages = _list_pages(service, calendarId=calendar_id, syncToken=sync_token)
+    items = [event for page in pages for event in page]
+    store_changes(calendar_id, items, pages.next_sync_token)
+
+
+def get_sync_state(calendar_id) -> tuple[str, float]:
+    """Returns the sync token and the time of the last sync of the calendar."""
+    return event_store.get_sync_state(calendar_id)
+
+
+def is_fresh(synced_at: float, force: bool = False) -> bool:
+    """Returns whether a calendar synced at synced_at is not synced again yet."""
+    return not force and synced_at is not None and time.time() - synced_at < SYNC_INTERVAL
+
+
+def forget_calendar(calendar_id):
+    """Forgets the stored events of the calendar, the next sync is a full sync."""
+    event_store.clear(calendar_id)
+
+
+def sync_calendar(service, calendar_id, force: bool = False) -> str:
+    """
+    Brings the stored events of the calendar up to date. Calendars synced less
+    than SYNC_INTERVAL seconds ago are not synced again unless forced.
+
+    Returns CACHE_HIT if the stored events could be used, possibly after an
+    incremental sync, or CACHE_MISS if the calendar had to be fully synced.
+    Raises:
+        HttpError: If the Google Calendar API request fails.
+    """
+    with _get_lock(calendar_id):
+        sync_token, synced_at = get_sync_state(calendar_id)
+        if is_fresh(synced_at, force):
+            return CACHE_HIT
+
+        if sync_token is None:
+            full_sync(service, calendar_id)
+            return CACHE_MISS
+
+        try:
+            incremental_sync(service, calendar_id, sync_token)
+            return CACHE_HIT
+        except HttpError as error:
+            if error.resp.status != 410:
+                raise
+            # The sync token is no longer valid, start over
+            logger.warning('Sync token of calendar %s expired', calendar_id)
+            forget_calendar(calendar_id)
+            full_sync(service, calendar_id)
+            return CACHE_MISS
+
+
+def get_synced_events(
+    service, calendar_id, start: float, end: float, descending: bool = False
+):
+    """
+    Syncs the calendar and returns the stored events that overlap the time
+    range [start, end), sorted by start time (oldest first, or newest first
+    when descending), together with the cache status of the sync.
+    """
+    cache_status = sync_calendar(service, calendar_id)
+    return read_synced_events(calendar_id, start, end, descending), cache_status
+
+
+def read_synced_events(calendar_id, start: float, end: float, descending: bool = False):
+    """
+    Returns the stored events that overlap the time range [start, end), sorted
+    by start time (oldest first, or newest first when descending), without a sync.
+    """
+    return event_store.query(calendar_id, start, end, descending)
+
+
+def store_event(calendar_id, event: dict):
+    """
+    Writes an event created or updated through our services to the store.
+    The store holds the instances of recurring events (singleEvents), so a
+    recurring event is not written, the next sync brings in its instances.
+    """
+    if event.get('recurrence'):
+        logger.debug('Recurring event %s is left to the sync', event.get('id'))
+        return
+    version = event_store.upsert(calendar_id, event)
+    _notify_change(calendar_id, [event], version=version)
+
+
+def forget_event(calendar_id, event_id):
+    """Removes an event deleted through our services from the store."""
+    forget_events(calendar_id, [event_id])
+
+
+def forget_events(calendar_id, event_ids):
+    """
+    Removes events deleted through our services from the store in one
+    transaction, the listeners are notified once for all of them.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return
+    version = event_store.delete_many(calendar_id, event_ids)
+    _notify_change(calendar_id, deleted=event_ids, version=version)
+
+
+def get_store_version(calendar_id) -> int:
+    """
+    Returns the version of the stored events of the calendar. It moves with
+    every write, including the writes of the other workers sharing the store.
+    """
+    return event_store.get_version(calendar_id)
+
+
+def reset_sync():
+    """Forgets all synced events, the next sync of each calendar is a full sync."""
+    event_store.clear()
@@ -1,21 +1,19 @@
 import calendar
 import csv
-import json
+import os
 import re
+import threading
 from datetime import datetime
 
 import pytz
 from babel.dates import format_datetime
 from gcalcli.utils import get_timedelta_from_str
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from parsedatetime.parsedatetime import Calendar
 from typeguard import typechecked
 
-from src.auth import get_credentials
 from src.constants import TIME_FORMAT_PROMPT
-from src.error import ServiceBuildError
 from src.logger_config import logger
+from src.serialization import dumps_pretty
 
 fuzzy_date_parse = Calendar().parse
 fuzzy_datetime_parse = Calendar().parseDT
@@ -35,8 +33,11 @@ def write_to_output_file(file_name, data):
     path = 'src/output/' + file_name
 
     if file_name.endswith('.json'):
-        with open(path, 'w', encoding='utf-8') as file:
-            file.write(json.dumps(data, indent=2, ensure_ascii=False))
+        # Written next to the target and renamed, readers never see a partial file
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(dumps_pretty(data))
+        os.replace(temp_path, path)
         logger.info('Data written to %s', file_name)
     elif file_name.endswith('.csv'):
         with open(path, 'w', encoding='utf-8') as file:
@@ -53,32 +54,6 @@ def write_to_output_file(file_name, data):
         logger.error('Unsupported file format')
 
 
-def build_service() -> build:
-    """
-    Build and return the Google Calendar API service.
-    Raises:
-        ServiceBuildError: If credentials are missing or the service cannot be built.
-    """
-    try:
-        logger.debug('Building the Google Calendar API service.')
-        creds = get_credentials()
-        if not creds:
-            logger.error('Credentials not found for building the service.')
-            raise ServiceBuildError(
-                'Missing credentials for building the Calendar API service.'
-            )
-
-        logger.info('Building the Google Calendar API service.')
-        service = build('calendar', 'v3', credentials=creds)
-        return service
-    except HttpError as e:
-        logger.error('HTTP Error while building the service: %s', e)
-        raise ServiceBuildError(f'Failed to build service due to an HTTP error: {e}')
-    except Exception as e:
-        logger.error('Unexpected error during service build: %s', e)
-        raise ServiceBuildError(f'Unexpected error during service build: {e}')
-
-
 def round_to_nearest_interval(
     timestamp: datetime, interval_minutes: int = 15
 ) -> datetime:
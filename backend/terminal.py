@@ -5,12 +5,15 @@ from gcalcli.utils import get_time_from_str
 from gcalcli.validators import PARSABLE_DATE, PARSABLE_DURATION, get_input
 from InquirerPy import inquirer
 from InquirerPy.validator import EmptyInputValidator
+from prompt_toolkit.completion import Completer, Completion
 
 from src.constants import TIMEZONE
+from src.error import APIError
 from src.logger_config import logger
 from src.printer import Printer
 from src.services.calendar import get_calendar_list
-from src.services.event import create_event, get_recent_unique_events
+from src.services.event import create_event, get_summary_index
+from src.summary_index import SummaryIndex
 from src.utils import (
     get_timedelta_from_str,
     print_event_details,
@@ -19,6 +22,9 @@ from src.utils import (
 
 PRINTER = Printer()
 
+# Number of summaries suggested while typing the summary of an event
+SUGGESTION_COUNT = 10
+
 
 def main():
     # Fetch calendar list
@@ -63,26 +69,51 @@ def get_duration_legacy() -> int:
     ).execute()
 
 
-def get_duration():
-    return get_input(PRINTER, 'Duration (human readable): ', PARSABLE_DURATION)
+class SummaryCompleter(Completer):
+    """
+    Completes event summaries from a loaded summary index. Every key press
+    queries the index in memory, without a sync or a request to Google.
+    """
 
+    def __init__(self, index: SummaryIndex):
+        self.index = index
 
-def fast(selected_calendar_id: str):
-    duration = get_duration()
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        for summary, _, _ in self.index.suggest(text, SUGGESTION_COUNT):
+            yield Completion(summary, start_position=-len(text))
 
-    events = get_recent_unique_events(selected_calendar_id)
-    for event in events:
-        print(event)
-    popular_events_summaries = {event: None for event in events}
 
-    # Event summary with auto-complete from popular events
+def get_summary(calendar_id: str) -> str:
+    # Loads the summary index once, before the first key press
+    try:
+        index = get_summary_index(calendar_id)
+    except APIError as e:
+        logger.warning('Summary suggestions are not available: %s', e.message)
+        completer = None
+    else:
+        for summary, _, _ in index.suggest('', SUGGESTION_COUNT):
+            print(summary)
+        completer = SummaryCompleter(index)
+
+    # Event summary with auto-complete from the summaries of past events
     # https://inquirerpy.readthedocs.io/en/latest/pages/prompts/input.html#auto-completion
-    summary = inquirer.text(
+    return inquirer.text(
         message='Summary',
-        completer=popular_events_summaries,
+        completer=completer,
         validate=EmptyInputValidator(),
     ).execute()
 
+
+def get_duration():
+    return get_input(PRINTER, 'Duration (human readable): ', PARSABLE_DURATION)
+
+
+def fast(selected_calendar_id: str):
+    duration = get_duration()
+
+    summary = get_summary(selected_calendar_id)
+
     # Event description
     description = inquirer.text(
         message='Description',
@@ -113,18 +144,7 @@ def fast(selected_calendar_id: str):
 
 
 def custom(selected_calendar_id: str):
-    events = get_recent_unique_events(selected_calendar_id)
-    for event in events:
-        print(event)
-    popular_events_summaries = {event: None for event in events}
-
-    # Event summary with auto-complete from popular events
-    # https://inquirerpy.readthedocs.io/en/latest/pages/prompts/input.html#auto-completion
-    summary = inquirer.text(
-        message='Summary',
-        completer=popular_events_summaries,
-        validate=EmptyInputValidator(),
-    ).execute()
+    summary = get_summary(selected_calendar_id)
 
     # Event description
     description = inquirer.text(
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.event_store import MemoryEventStore
+from src.interval_index import interval_indexes
+from src.services.calendar import calendar_cache
+from src.services.stats import stats_cache
+from src.summary_index import summary_indexes
+
+
+@pytest.fixture(autouse=True)
+def event_store():
+    """Give every test an empty in-memory event store."""
+    store = MemoryEventStore()
+    with patch('src.sync.event_store', store):
+        yield store
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Start every test without cached calendar metadata or event analyses."""
+    caches = (calendar_cache, stats_cache)
+    for cache in caches:
+        cache.invalidate()
+    summary_indexes.clear()
+    interval_indexes.clear()
+    yield
+    for cache in caches:
+        cache.invalidate()
+    summary_indexes.clear()
+    interval_indexes.clear()
+
+
+@pytest.fixture
+def make_event():
+    """
+    Factory of test events: make_event(event_id, start, hours=1, **properties)
+    returns an event that starts at start, a datetime or a day of February 2025
+    at 10:00 (+02:00), and lasts the hours. The summary is 'Event <event_id>'
+    unless given in the properties.
+    """
+
+    def make_event(event_id, start, hours: float = 1, **properties) -> dict:
+        if not isinstance(start, datetime):
+            start = datetime(2025, 2, start, 10, tzinfo=timezone(timedelta(hours=2)))
+        return {
+            'id': event_id,
+            'summary': f'Event {event_id}',
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': (start + timedelta(hours=hours)).isoformat()},
+            **properties,
+        }
+
+    return make_event
@@ -0,0 +1,330 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('starlette')
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+from src.async_api import CalendarList, EventItem, EventList  # noqa: E402
+from src import async_sync  # noqa: E402
+from src.async_client import API_ROOT, AsyncCalendarClient, AsyncHttpError  # noqa: E402
+from src.error import APIError  # noqa: E402
+from src.services import async_event  # noqa: E402
+from src.sync import CACHE_MISS  # noqa: E402
+
+
+def make_client(handler) -> AsyncCalendarClient:
+    """Returns a client whose requests are answered by the handler."""
+    http = httpx.AsyncClient(base_url=API_ROOT, transport=httpx.MockTransport(handler))
+    return AsyncCalendarClient(http)
+
+
+@pytest.fixture(autouse=True)
+def credentials():
+    """Authorize every request with a fixed access token."""
+    with patch('src.async_client._credentials', MagicMock(valid=True, token='token')):
+        yield
+
+
+class TestAsyncClient(object):
+    """Tests for src.async_client"""
+
+    def test_request_is_authorized(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={'items': []})
+
+        result = asyncio.run(
+            make_client(handler).request(
+                'GET', 'users/me/calendarList', params={'q': None, 'maxResults': 10}
+            )
+        )
+
+        assert result == {'items': []}
+        assert requests[0].headers['Authorization'] == 'Bearer token'
+        assert str(requests[0].url) == f'{API_ROOT}users/me/calendarList?maxResults=10'
+
+    def test_error_response(self):
+        def handler(request):
+            return httpx.Response(404, json={'error': {'code': 404, 'message': 'Gone'}})
+
+        with pytest.raises(AsyncHttpError) as error:
+            asyncio.run(make_client(handler).request('GET', 'calendars/x'))
+        assert error.value.status == 404
+        assert error.value.message == 'Gone'
+
+
+@patch('src.services.async_event.EVENT_SYNC', False)
+@patch(
+    'src.services.async_calendar.calendar_cache.get_async',
+    new_callable=AsyncMock,
+    return_value=[{'id': 'work@example.com', 'summary': 'Work'}],
+)
+class TestAsyncServicesEvent(object):
+    """Tests for src.services.async_event"""
+
+    def test_get_events_follows_next_page_token(self, _, make_event):
+        pages = {
+            None: {
+                'items': [make_event('a', 1), make_event('b', 2)],
+                'nextPageToken': 'p2',
+            },
+            'p2': {'items': [make_event('c', 3)]},
+        }
+
+        def handler(request):
+            assert request.url.raw_path.startswith(
+                b'/calendar/v3/calendars/work%40example.com/'
+            )
+            return httpx.Response(200, json=pages[request.url.params.get('pageToken')])
+
+        with patch.object(
+            async_event, 'get_async_client', return_value=make_client(handler)
+        ):
+            events = asyncio.run(
+                async_event.get_events(
+                    'work@example.com',
+                    '2025-02-01T00:00:00Z',
+                    '2025-03-01T00:00:00Z',
+                    limit=2,
+                )
+            )
+
+        # Newest first, the third event is on the next page
+        assert [event['id'] for event in events] == ['c', 'b']
+        assert events.next_cursor is not None
+        assert not events.truncated
+        assert 'duration' in events[0]
+
+    def test_get_events_from_calendars_reports_failures(self, _, make_event):
+        def handler(request):
+            if '/calendars/gone/' in request.url.path:
+                return httpx.Response(404, json={'error': {'message': 'Not Found'}})
+            return httpx.Response(200, json={'items': [make_event('a', 1)]})
+
+        with patch.object(
+            async_event, 'get_async_client', return_value=make_client(handler)
+        ):
+            events = asyncio.run(
+                async_event.get_events_from_calendars(
+                    ['work', 'gone'], '2025-02-01T00:00:00Z', '2025-03-01T00:00:00Z'
+                )
+            )
+
+        assert [(event['id'], event['calendarId']) for event in events] == [('a', 'work')]
+        assert events.errors == {'gone': {'status': 404, 'message': '404 Not Found'}}
+
+    def test_update_event_precondition_failed(self, _):
+        def handler(request):
+            assert request.headers['If-Match'] == '"1"'
+            return httpx.Response(412, json={'error': {'message': 'Precondition'}})
+
+        with patch.object(
+            async_event, 'get_async_client', return_value=make_client(handler)
+        ):
+            with pytest.raises(APIError) as error:
+                asyncio.run(
+                    async_event.update_event('work', 'a', {'summary': 'New'}, etag='"1"')
+                )
+        assert error.value.status_code == 412
+
+    def test_create_event_stores_event_off_the_event_loop(self, _, make_event):
+        event = make_event('a', 1)
+        store_threads = []
+
+        def handler(request):
+            return httpx.Response(200, json=event)
+
+        def store_event(calendar_id, stored_event):
+            store_threads.append(threading.get_ident())
+
+        with (
+            patch.object(
+                async_event, 'get_async_client', return_value=make_client(handler)
+            ),
+            patch.object(async_event, 'store_event', side_effect=store_event),
+        ):
+            created = asyncio.run(
+                async_event.create_event('work', {'summary': 'Event a'}, 'ignore')
+            )
+
+        assert created['id'] == 'a'
+        assert store_threads and store_threads[0] != threading.get_ident()
+
+
+@patch('src.services.async_event.EVENT_SYNC', True)
+@patch('src.services.conflicts.EVENT_SYNC', True)
+@patch('src.services.conflicts.get_service', side_effect=AssertionError('threaded API'))
+@patch(
+    'src.services.async_calendar.calendar_cache.get_async',
+    new_callable=AsyncMock,
+    return_value=[{'id': 'work', 'summary': 'Work'}],
+)
+class TestAsyncSync(object):
+    """Tests for src.async_sync"""
+
+    def test_get_events_syncs_the_store(self, _, __, make_event, event_store):
+        pages = {
+            None: {'items': [make_event('a', 1)], 'nextPageToken': 'p2'},
+            'p2': {'items': [make_event('b', 2)], 'nextSyncToken': 'token'},
+        }
+
+        def handler(request):
+            assert request.url.params['singleEvents'] == 'true'
+            return httpx.Response(200, json=pages[request.url.params.get('pageToken')])
+
+        with patch.object(
+            async_event, 'get_async_client', return_value=make_client(handler)
+        ):
+            events = asyncio.run(
+                async_event.get_events(
+                    'work', '2025-02-01T00:00:00Z', '2025-03-01T00:00:00Z'
+                )
+            )
+
+        assert [event['id'] for event in events] == ['b', 'a']
+        assert events.cache_status == CACHE_MISS
+        assert event_store.get_sync_state('work')[0] == 'token'
+
+    def test_expired_sync_token_starts_over(self, _, __, make_event, event_store):
+        event_store.replace('work', [make_event('a', 1)], 'old')
+
+        def handler(request):
+            if 'syncToken' in request.url.params:
+                return httpx.Response(410, json={'error': {'message': 'Gone'}})
+            return httpx.Response(
+                200, json={'items': [make_event('b', 2)], 'nextSyncToken': 'new'}
+            )
+
+        status = asyncio.run(
+            async_sync.sync_calendar(make_client(handler), 'work', force=True)
+        )
+
+        assert status == CACHE_MISS
+        assert event_store.get_sync_state('work')[0] == 'new'
+        assert [event['id'] for event in event_store.query('work', 0, 2e9)] == ['b']
+
+    def test_create_event_checks_conflicts_with_synced_events(
+        self, _, __, make_event, event_store
+    ):
+        existing = make_event('a', 1)
+
+        def handler(request):
+            if request.method == 'GET':
+                return httpx.Response(
+                    200, json={'items': [existing], 'nextSyncToken': 'token'}
+                )
+            return httpx.Response(200, json=make_event('b', 1))
+
+        with patch.object(
+            async_event, 'get_async_client', return_value=make_client(handler)
+        ):
+            created = asyncio.run(
+                async_event.create_event(
+                    'work',
+                    {'start': existing['start'], 'end': existing['end']},
+                    'flag',
+                )
+            )
+
+        assert [conflict['id'] for conflict in created['conflicts']] == ['a']
+        assert event_store.get_sync_state('work')[0] == 'token'
+
+
+app = Starlette(
+    routes=[
+        Route('/api/calendars/', CalendarList),
+        Route('/api/events/{calendar_id}/', EventList),
+        Route('/api/events/{calendar_id}/{event_id}/', EventItem),
+    ]
+)
+
+
+class TestAsyncApi(object):
+    """Tests for src.async_api"""
+
+    @patch('src.async_api.get_calendar_list', new_callable=AsyncMock)
+    def test_calendar_list_not_modified(self, mock_get_calendar_list):
+        mock_get_calendar_list.return_value = [{'id': 'work', 'etag': '"1"'}]
+        client = TestClient(app)
+
+        response = client.get('/api/calendars/')
+        assert response.status_code == 200
+        assert response.json() == [{'id': 'work', 'etag': '"1"'}]
+
+        response = client.get(
+            '/api/calendars/', headers={'If-None-Match': response.headers['ETag']}
+        )
+        assert response.status_code == 304
+
+    @patch('src.async_api.get_events', new_callable=AsyncMock)
+    def test_event_list(self, mock_get_events, make_event):
+        events = async_event.EventResult([make_event('a', 1)])
+        events.next_cursor = 'next'
+        mock_get_events.return_value = events
+
+        response = TestClient(app).get(
+            '/api/events/work/',
+            params={'start_date': '2025-02-01', 'end_date': '2025-03-01', 'limit': '1'},
+        )
+
+        assert response.status_code == 200
+        assert response.json()[0]['id'] == 'a'
+        assert response.headers['X-Next-Cursor'] == 'next'
+        assert mock_get_events.call_args.kwargs['limit'] == 1
+
+    def test_event_list_requires_time_range(self):
+        response = TestClient(app).get('/api/events/work/')
+
+        assert response.status_code == 400
+        assert response.json()['@error']['@message'] == 'Bad Request'
+
+    @patch('src.compression.COMPRESSION_MIN_SIZE', 0)
+    @patch('src.async_api.get_calendar_list', new_callable=AsyncMock)
+    def test_calendar_list_compressed(self, mock_get_calendar_list):
+        mock_get_calendar_list.return_value = [{'id': 'work', 'etag': '"1"'}]
+        client = TestClient(app)
+
+        response = client.get('/api/calendars/', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert response.headers['ETag'].endswith('-gzip"')
+        assert response.json() == [{'id': 'work', 'etag': '"1"'}]
+
+        # The ETag of the compressed representation is not modified either
+        response = client.get(
+            '/api/calendars/', headers={'If-None-Match': response.headers['ETag']}
+        )
+        assert response.status_code == 304
+
+    @patch('src.async_api.update_event', new_callable=AsyncMock)
+    @patch('src.async_api.get_event', new_callable=AsyncMock)
+    def test_get_etag_is_accepted_by_patch(
+        self, mock_get_event, mock_update_event, make_event
+    ):
+        event = make_event('a', 1, etag='"3381"')
+        mock_get_event.return_value = event
+        mock_update_event.return_value = dict(event, etag='"3382"')
+        client = TestClient(app)
+
+        etag = client.get('/api/events/work/a/').headers['ETag']
+        response = client.patch(
+            '/api/events/work/a/',
+            json={'summary': 'New'},
+            headers={'If-Match': etag},
+        )
+
+        assert etag == '"3381"'
+        assert response.status_code == 200
+        assert mock_update_event.call_args.kwargs['etag'] == '"3381"'
+        assert mock_update_event.call_args.kwargs['replace'] is False
+        assert response.headers['ETag'] == '"3382"'
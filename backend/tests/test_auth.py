@@ -0,0 +1,131 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.auth import CredentialManager, ManagedCredentials
+
+TOKEN = {
+    'token': 'access-token',
+    'refresh_token': 'refresh-token',
+    'token_uri': 'https://oauth2.googleapis.com/token',
+    'client_id': 'client-id',
+    'client_secret': 'client-secret',
+    'scopes': ['https://www.googleapis.com/auth/calendar'],
+}
+
+
+def utcnow() -> datetime:
+    # google-auth keeps the expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def write_token(path, expiry: datetime):
+    token = dict(TOKEN, expiry=expiry.isoformat() + 'Z')
+    path.write_text(json.dumps(token), encoding='utf-8')
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = CredentialManager(token_path=str(tmp_path / 'token.json'))
+    yield manager
+    manager.stop()
+
+
+def fake_refresh(self, request):
+    self.token = 'refreshed-token'
+    self.expiry = utcnow() + timedelta(hours=1)
+
+
+class TestCredentialManager(object):
+    """Tests for src.auth.CredentialManager"""
+
+    def test_get_keeps_credentials_in_memory(self, manager, tmp_path):
+        write_token(tmp_path / 'token.json', utcnow() + timedelta(hours=1))
+
+        with patch.object(manager, '_load', wraps=manager._load) as mock_load:
+            first = manager.get()
+            second = manager.get()
+
+        assert first is second
+        assert first.valid
+        assert mock_load.call_count == 1
+
+    def test_get_refreshes_expired_token(self, manager, tmp_path):
+        write_token(tmp_path / 'token.json', utcnow() - timedelta(hours=1))
+
+        with patch('src.auth.Credentials.refresh', fake_refresh):
+            creds = manager.get()
+
+        assert creds.token == 'refreshed-token'
+        stored = json.loads((tmp_path / 'token.json').read_text(encoding='utf-8'))
+        assert stored['token'] == 'refreshed-token'
+
+    def test_store_skips_unchanged_token(self, manager, tmp_path):
+        write_token(tmp_path / 'token.json', utcnow() - timedelta(hours=1))
+
+        with patch('src.auth.Credentials.refresh', fake_refresh):
+            manager.get()
+            with patch('builtins.open') as mock_open:
+                manager._store()
+
+        mock_open.assert_not_called()
+
+    def test_background_refresh_scheduled_before_expiry(self, manager, tmp_path):
+        write_token(tmp_path / 'token.json', utcnow() + timedelta(hours=1))
+
+        with patch('src.auth.threading.Timer') as mock_timer:
+            manager.get()
+
+        delay = mock_timer.call_args[0][0]
+        assert 0 < delay <= 3600 - manager.refresh_margin
+
+    def test_expired_token_refresh_scheduled_once(self, manager, tmp_path):
+        write_token(tmp_path / 'token.json', utcnow() - timedelta(hours=1))
+
+        with patch('src.auth.Credentials.refresh', fake_refresh):
+            with patch('src.auth.threading.Timer') as mock_timer:
+                manager.get()
+
+        # Only the refreshed token is scheduled, never the expired one
+        assert mock_timer.call_count == 1
+        assert mock_timer.call_args[0][0] > 0
+
+    def test_background_refresh_never_runs_auth_flow(self, manager):
+        with patch('src.auth.auth_flow') as mock_auth_flow:
+            manager.refresh()
+
+        mock_auth_flow.assert_not_called()
+
+    def test_background_refresh_retried_after_any_error(self, manager):
+        with (
+            patch.object(manager, '_refresh', side_effect=OSError('Disk full')),
+            patch('src.auth.threading.Timer') as mock_timer,
+        ):
+            manager.refresh()
+
+        assert mock_timer.call_args[0][0] == manager.retry_interval
+
+    def test_transport_refresh_goes_through_manager(self, manager, tmp_path):
+        write_token(tmp_path / 'token.json', utcnow() + timedelta(hours=1))
+        transport_credentials = ManagedCredentials(manager)
+        headers = {}
+        refreshes = []
+
+        def counting_refresh(self, request):
+            refreshes.append(1)
+            fake_refresh(self, request)
+
+        with patch('src.auth.Credentials.refresh', counting_refresh):
+            transport_credentials.before_request(None, 'GET', 'url', headers)
+            # Two transports had the same token rejected, one refresh is enough
+            transport_credentials.refresh(None)
+            other = ManagedCredentials(manager)
+            other._token = 'access-token'
+            other.refresh(None)
+
+        assert headers['authorization'] == 'Bearer access-token'
+        assert len(refreshes) == 1
+        stored = json.loads((tmp_path / 'token.json').read_text(encoding='utf-8'))
+        assert stored['token'] == 'refreshed-token'
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+from src.cache import TTLCache
+
+
+class TestTTLCache(object):
+    """Tests for src.cache.TTLCache"""
+
+    def test_get_loads_once(self):
+        cache = TTLCache('test_get', ttl=60)
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return 'value'
+
+        assert cache.get('key', loader) == 'value'
+        assert cache.get('key', loader) == 'value'
+        assert len(loads) == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_expired_entries_are_purged_on_store(self):
+        cache = TTLCache('test_expiry', ttl=10)
+        with patch('src.cache.time.monotonic', return_value=0):
+            cache.get('a', lambda: 1)
+            cache.get('b', lambda: 2)
+        with patch('src.cache.time.monotonic', return_value=20):
+            cache.get('c', lambda: 3)
+
+        assert cache.stats()['size'] == 1
+
+    def test_oldest_entries_are_evicted_beyond_max_size(self):
+        cache = TTLCache('test_max_size', ttl=60, max_size=2)
+        for key in ('a', 'b', 'c'):
+            cache.get(key, lambda: key)
+
+        assert cache.stats()['size'] == 2
+        assert cache.get('a', lambda: 'reloaded') == 'reloaded'
+        assert cache.get('c', lambda: 'reloaded') == 'c'
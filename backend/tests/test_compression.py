@@ -0,0 +1,81 @@
+import gzip
+import json
+from typing import Generator
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, Response
+from flask.testing import FlaskClient
+
+from src.compression import compress_response, compression_stats
+from src.constants import MASON
+from src.streaming import stream_response
+
+app = Flask(__name__)
+app.after_request(compress_response)
+
+EVENTS = [{'id': f'id-{i}', 'summary': 'Repeated summary'} for i in range(200)]
+
+
+@app.route('/events')
+def events():
+    response = Response(json.dumps(EVENTS), status=200, mimetype=MASON)
+    response.set_etag('abc')
+    return response
+
+
+@app.route('/small')
+def small():
+    return Response(json.dumps(EVENTS[:1]), status=200, mimetype=MASON)
+
+
+@app.route('/stream')
+def stream():
+    return stream_response(EVENTS, 'ndjson')
+
+
+@pytest.fixture
+def client() -> Generator[FlaskClient, None, None]:
+    with app.test_client() as client:
+        yield client
+
+
+class TestCompression(object):
+    """Tests for src.compression"""
+
+    def test_gzip_response(self, client: FlaskClient):
+        before = compression_stats.stats()['encodings'].get('gzip', {'responses': 0})
+
+        response = client.get('/events', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['ETag'] == '"abc-gzip"'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == EVENTS
+        stats = compression_stats.stats()['encodings']['gzip']
+        assert stats['responses'] == before['responses'] + 1
+        assert stats['ratio'] > 1
+
+    def test_no_compression_without_accept_encoding(self, client: FlaskClient):
+        response = client.get('/events')
+
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data) == EVENTS
+
+    def test_small_response_is_not_compressed(self, client: FlaskClient):
+        response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+
+    def test_min_size_is_configurable(self, client: FlaskClient):
+        with patch('src.compression.COMPRESSION_MIN_SIZE', 1):
+            response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+
+    def test_streamed_response(self, client: FlaskClient):
+        response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        lines = gzip.decompress(response.data).decode().splitlines()
+        assert [json.loads(line) for line in lines] == EVENTS
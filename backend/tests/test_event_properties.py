@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from src.event_properties import (
+    EventPropertiesEngine,
+    update_event_properties,
+    update_events_properties,
+)
+from src.utils import format_event_time_from_iso
+
+
+class TestEventPropertiesEngine(object):
+    """Tests for src.event_properties"""
+
+    def test_formats_like_format_event_time_from_iso(self):
+        engine = EventPropertiesEngine()
+        start = datetime(2024, 12, 30, 23, 45)
+        times = []
+        for hours in range(0, 24 * 5, 7):
+            time = start + timedelta(hours=hours)
+            times += [time.isoformat() + 'Z', time.isoformat() + '+02:00']
+        times += ['2024-02-29', '0999-01-01T00:00:00Z']
+
+        for time in times:
+            assert engine.parse_time(time)[1] == format_event_time_from_iso(time)
+
+    def test_update_events_properties(self):
+        events = [
+            {
+                'start': {'dateTime': '2025-02-01T10:00:00+02:00'},
+                'end': {'dateTime': '2025-02-01T11:30:00+02:00'},
+            },
+            {'start': {'date': '2025-02-01'}, 'end': {'date': '2025-02-03'}},
+        ]
+
+        timed, all_day = update_events_properties(events)
+
+        assert timed['formatted_start'] == 'Sat 01.02.2025 10:00'
+        assert timed['formatted_end'] == 'Sat 01.02.2025 11:30'
+        assert timed['duration'] == 1.5
+        assert all_day['formatted_end'] == 'Mon 03.02.2025 00:00'
+        assert all_day['duration'] == 48
+        assert update_event_properties(dict(events[0])) == timed
@@ -0,0 +1,197 @@
+from datetime import datetime, time, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.error import APIError, ParameterError
+from src.services.freeslots import (
+    find_free_slots,
+    get_free_slots,
+    merge_intervals,
+    working_hours,
+)
+
+
+def at(day, hour, minute=0):
+    """Returns the timestamp of 2025-03-<day> hour:minute UTC, 03-03 is a Monday."""
+    return datetime(2025, 3, day, hour, minute, tzinfo=timezone.utc).timestamp()
+
+
+class TestFreeSlots(object):
+    """Tests for src.services.freeslots"""
+
+    def test_merge_intervals(self):
+        assert merge_intervals([(5, 6), (1, 3), (2, 4), (4, 5), (8, 9)]) == [
+            (1, 6),
+            (8, 9),
+        ]
+        assert merge_intervals([]) == []
+
+    def test_working_hours(self):
+        # Friday to Monday, the weekend is skipped
+        windows = working_hours(at(7, 12), at(10, 12), time(9), time(17), timezone='UTC')
+
+        assert windows == [(at(7, 12), at(7, 17)), (at(10, 9), at(10, 12))]
+        assert (
+            len(
+                working_hours(
+                    at(7, 12),
+                    at(10, 12),
+                    time(9),
+                    time(17),
+                    weekends=True,
+                    timezone='UTC',
+                )
+            )
+            == 4
+        )
+
+    def test_find_free_slots(self):
+        busy = [
+            (at(3, 10, 5), at(3, 11)),
+            (at(3, 10, 30), at(3, 12, 10)),
+            (at(3, 14), at(3, 14, 20)),
+            (at(3, 16, 50), at(3, 18)),
+        ]
+        windows = [(at(3, 9), at(3, 17)), (at(4, 9), at(4, 17))]
+
+        slots = find_free_slots(busy, windows, 30, timezone='UTC')
+
+        assert [(slot['start'], slot['end']) for slot in slots] == [
+            ('2025-03-03T09:00:00+00:00', '2025-03-03T10:00:00+00:00'),
+            # The slots are aligned to 15 minutes inside the free time
+            ('2025-03-03T12:15:00+00:00', '2025-03-03T14:00:00+00:00'),
+            ('2025-03-03T14:30:00+00:00', '2025-03-03T16:45:00+00:00'),
+            ('2025-03-04T09:00:00+00:00', '2025-03-04T17:00:00+00:00'),
+        ]
+        assert slots[0]['minutes'] == 60
+        assert len(find_free_slots(busy, windows, 120, timezone='UTC')) == 2
+
+    @patch('src.services.freeslots.EVENT_SYNC', False)
+    @patch('src.services.freeslots.get_service')
+    def test_get_free_slots_from_freebusy(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.freebusy().query().execute.return_value = {
+            'calendars': {
+                'work': {
+                    'busy': [
+                        {'start': '2025-03-03T08:00:00Z', 'end': '2025-03-03T12:00:00Z'}
+                    ]
+                },
+                'home': {
+                    'busy': [
+                        {'start': '2025-03-03T13:00:00Z', 'end': '2025-03-03T14:00:00Z'}
+                    ]
+                },
+                'gone': {'errors': [{'domain': 'global', 'reason': 'notFound'}]},
+            }
+        }
+
+        result = get_free_slots(
+            ['work', 'home', 'gone'],
+            '2025-03-03T00:00:00+02:00',
+            '2025-03-04T00:00:00+02:00',
+            min_minutes=30,
+        )
+
+        # Working hours are 09:00 - 17:00 in Europe/Helsinki (UTC+2)
+        assert [(slot['start'], slot['end']) for slot in result['slots']] == [
+            ('2025-03-03T09:00:00+02:00', '2025-03-03T10:00:00+02:00'),
+            ('2025-03-03T14:00:00+02:00', '2025-03-03T15:00:00+02:00'),
+            ('2025-03-03T16:00:00+02:00', '2025-03-03T17:00:00+02:00'),
+        ]
+        assert result['errors'] == {'gone': {'status': 404, 'message': 'notFound'}}
+
+    @patch('src.services.freeslots.get_service')
+    def test_get_free_slots_from_synced_events(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.return_value = {
+            'items': [
+                {
+                    'id': 'meeting',
+                    'start': {'dateTime': '2025-03-03T09:00:00+02:00'},
+                    'end': {'dateTime': '2025-03-03T16:00:00+02:00'},
+                },
+                {
+                    'id': 'birthday',
+                    'start': {'date': '2025-03-03'},
+                    'end': {'date': '2025-03-04'},
+                    'transparency': 'transparent',
+                },
+            ]
+        }
+
+        result = get_free_slots(
+            ['work'], '2025-03-03T00:00:00+02:00', '2025-03-04T00:00:00+02:00'
+        )
+
+        assert [slot['minutes'] for slot in result['slots']] == [60]
+
+    @pytest.mark.parametrize('sync', [True, False])
+    @patch('src.services.freeslots.get_service')
+    def test_all_day_event_is_busy(self, mock_get_service, sync):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        # The freebusy API reports an opaque all-day event from midnight to midnight
+        mock_service.freebusy().query().execute.return_value = {
+            'calendars': {
+                'work': {
+                    'busy': [
+                        {
+                            'start': '2025-03-03T00:00:00+02:00',
+                            'end': '2025-03-04T00:00:00+02:00',
+                        }
+                    ]
+                }
+            }
+        }
+        mock_service.events().list().execute.return_value = {
+            'items': [
+                {
+                    'id': 'holiday',
+                    'start': {'date': '2025-03-03'},
+                    'end': {'date': '2025-03-04'},
+                }
+            ]
+        }
+
+        with patch('src.services.freeslots.EVENT_SYNC', sync):
+            result = get_free_slots(
+                ['work'], '2025-03-03T00:00:00+02:00', '2025-03-05T00:00:00+02:00'
+            )
+
+        assert [(slot['start'], slot['end']) for slot in result['slots']] == [
+            ('2025-03-04T09:00:00+02:00', '2025-03-04T17:00:00+02:00')
+        ]
+
+    @pytest.mark.parametrize(
+        'params',
+        [
+            {'interval_minutes': 7},
+            {'min_minutes': 0},
+            {'work_start': '17:00', 'work_end': '09:00'},
+            {'work_start': 'noon'},
+        ],
+    )
+    def test_invalid_parameters(self, params):
+        with pytest.raises(ParameterError):
+            get_free_slots(
+                ['work'],
+                '2025-03-03T00:00:00Z',
+                '2025-03-04T00:00:00Z',
+                **params,
+            )
+
+    @patch('src.services.freeslots.EVENT_SYNC', False)
+    @patch('src.services.freeslots.get_service')
+    def test_every_calendar_fails(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.freebusy().query().execute.return_value = {
+            'calendars': {'gone': {'errors': [{'reason': 'notFound'}]}}
+        }
+
+        with pytest.raises(APIError):
+            get_free_slots(['gone'], '2025-03-03T00:00:00Z', '2025-03-04T00:00:00Z')
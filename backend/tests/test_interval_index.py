@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+
+from src.interval_index import IntervalIndex, busy_interval
+
+
+def at_hour(hour) -> datetime:
+    """Returns the hour of 2025-03-01 (UTC)."""
+    return datetime(2025, 3, 1, hour, tzinfo=timezone.utc)
+
+
+def at(hour):
+    return at_hour(hour).timestamp()
+
+
+class TestIntervalIndex(object):
+    """Tests for src.interval_index"""
+
+    def test_busy_interval(self, make_event):
+        assert busy_interval(make_event('a', at_hour(9), 1)) == (at(9), at(10))
+        assert (
+            busy_interval(make_event('a', at_hour(9), 1, transparency='transparent'))
+            is None
+        )
+        assert busy_interval(make_event('a', at_hour(9), 0)) is None
+        all_day = {
+            'id': 'a',
+            'start': {'date': '2025-03-01'},
+            'end': {'date': '2025-03-02'},
+        }
+        assert busy_interval(all_day) is None
+        start, end = busy_interval(all_day, all_day=True)
+        assert end - start == 24 * 3600
+
+    def test_conflicts(self, make_event):
+        index = IntervalIndex(
+            [
+                make_event('long', at_hour(8), 9),
+                make_event('a', at_hour(9), 1),
+                make_event('b', at_hour(11), 1),
+                make_event('c', at_hour(13), 1),
+            ]
+        )
+
+        assert index.has_conflict(at(10), at(11))
+        assert [event['id'] for event in index.conflicts(at(10), at(11))] == ['long']
+        assert [event['id'] for event in index.conflicts(at(9), at(12))] == [
+            'long',
+            'a',
+            'b',
+        ]
+        # Events that only touch the range do not overlap it
+        assert not index.has_conflict(at(17), at(18))
+        assert index.conflicts(at(6), at(8)) == []
+
+    def test_apply_changes(self, make_event):
+        index = IntervalIndex(
+            [make_event('a', at_hour(9), 1), make_event('b', at_hour(11), 1)]
+        )
+
+        index.apply(changed=[make_event('a', at_hour(15), 1)], deleted=['b'])
+
+        assert len(index) == 1
+        assert not index.has_conflict(at(9), at(12))
+        assert [event['id'] for event in index.conflicts(at(15), at(18))] == ['a']
+
+        index.apply(
+            changed=[make_event('c', at_hour(8), 12), make_event('d', at_hour(1), 1)]
+        )
+        assert [event['id'] for event in index.conflicts(at(10), at(11))] == ['c']
+        assert index.has_conflict(at(1), at(2))
+
+    def test_overlapping_pairs(self, make_event):
+        index = IntervalIndex(
+            [
+                make_event('a', at_hour(8), 4),
+                make_event('b', at_hour(9), 1),
+                make_event('c', at_hour(11), 2),
+                make_event('d', at_hour(13), 1),
+                make_event('e', at_hour(20), 2),
+            ]
+        )
+
+        pairs = index.overlapping_pairs(at(0), at(23))
+        assert [(first['id'], second['id']) for first, second in pairs] == [
+            ('a', 'b'),
+            ('a', 'c'),
+        ]
+        # Only pairs with events that overlap the range
+        assert index.overlapping_pairs(at(12), at(23)) == []
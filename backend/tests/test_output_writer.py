@@ -0,0 +1,70 @@
+import threading
+from unittest.mock import patch
+
+from src.output_writer import DUMPS_OFF, DUMPS_ON, DUMPS_SAMPLED, OutputWriter
+
+
+class BlockingWrites(object):
+    """Records the written files, the first write waits until released."""
+
+    def __init__(self):
+        self.written = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, file_name, data):
+        self.started.set()
+        self.release.wait(timeout=5)
+        self.written.append((file_name, data))
+
+
+class TestOutputWriter(object):
+    """Tests for src.output_writer"""
+
+    def test_coalesces_and_drops_when_full(self):
+        writes = BlockingWrites()
+        writer = OutputWriter(mode=DUMPS_ON, max_pending=2)
+
+        with patch('src.output_writer.write_to_output_file', writes):
+            writer.queue('busy.json', 0)
+            assert writes.started.wait(timeout=5)
+            # The writer thread is busy, the next dumps wait in the queue
+            writer.queue('events.json', 1)
+            writer.queue('events.json', 2)
+            writer.queue('calendars.json', 3)
+            writer.queue('popular_events.json', 4)
+            writes.release.set()
+            assert writer.flush(timeout=5)
+
+        assert writes.written == [
+            ('busy.json', 0),
+            ('events.json', 2),
+            ('calendars.json', 3),
+        ]
+        stats = writer.stats()
+        assert stats['written'] == 3
+        assert stats['coalesced'] == 1
+        assert stats['dropped'] == 1
+
+    def test_off_mode_writes_nothing(self):
+        writer = OutputWriter(mode=DUMPS_OFF)
+
+        with patch('src.output_writer.write_to_output_file') as mock_write:
+            writer.queue('events.json', [])
+            assert writer.flush(timeout=5)
+
+        mock_write.assert_not_called()
+
+    def test_sampled_mode(self):
+        writer = OutputWriter(mode=DUMPS_SAMPLED)
+
+        with (
+            patch('src.output_writer.write_to_output_file') as mock_write,
+            patch('src.output_writer.random.random', side_effect=[0.05, 0.5]),
+        ):
+            writer.queue('events.json', 1)
+            writer.queue('calendars.json', 2)
+            assert writer.flush(timeout=5)
+
+        mock_write.assert_called_once_with('events.json', 1)
+        assert writer.stats()['sampled_out'] == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from src.error import ParameterError
+from src.projection import (
+    needs_computed_properties,
+    parse_fields,
+    project_events,
+    upstream_fields,
+)
+
+
+class TestProjection(object):
+    """Tests for src.projection"""
+
+    def test_parse_fields(self):
+        assert parse_fields(None) is None
+        assert parse_fields(' ') is None
+        assert parse_fields('id, summary,start(dateTime,date),id') == (
+            'id',
+            'summary',
+            'start(dateTime,date)',
+        )
+
+    @pytest.mark.parametrize('fields', ['id,,summary', 'start(dateTime', 'a)b(', '*'])
+    def test_parse_fields_invalid(self, fields):
+        with pytest.raises(ParameterError):
+            parse_fields(fields)
+
+    def test_upstream_fields(self):
+        assert upstream_fields(('summary',)) == (
+            'nextPageToken,nextSyncToken,items(summary)'
+        )
+        assert upstream_fields(('start(dateTime)', 'formatted_start')) == (
+            'nextPageToken,nextSyncToken,items(start,end)'
+        )
+        assert not needs_computed_properties(('summary', 'start'))
+
+    def test_project_events_copies(self):
+        event = {'id': 'a', 'summary': 'Gym', 'duration': 1.0}
+
+        (projected,) = project_events([event], ('start(date)', 'summary'))
+
+        assert projected == {'summary': 'Gym'}
+        assert event['id'] == 'a'
@@ -1,13 +1,22 @@
 import json
 import logging
+from datetime import datetime, timedelta
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
 from flask import Flask
 from flask.testing import FlaskClient
+from googleapiclient.errors import HttpError
 
-from src.resources.event import EventList
+from src.etag import upstream_etag
+from src.resources.event import EventItem, EventList, EventSuggest
+from src.resources.freeslots import FreeSlots
+from src.services.calendar import (
+    calendar_cache,
+    get_calendar_list,
+    get_calendar_summary,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +26,15 @@ app = Flask(__name__)
 app.add_url_rule(
     '/events/<string:calendar_id>', view_func=EventList.as_view('event_list')
 )
+app.add_url_rule(
+    '/events/<string:calendar_id>/suggest/',
+    view_func=EventSuggest.as_view('event_suggest'),
+)
+app.add_url_rule(
+    '/events/<string:calendar_id>/<string:event_id>/',
+    view_func=EventItem.as_view('event_item'),
+)
+app.add_url_rule('/freeslots/', view_func=FreeSlots.as_view('free_slots'))
 
 
 @pytest.fixture
@@ -31,28 +49,32 @@ mock_events = {
     'items': [
         {
             'id': 'test-id-1',
-            'start': '2025-02-01T10:00:00Z',
-            'end': '2025-02-01T15:00:00Z',
+            'start': {'dateTime': '2025-02-01T10:00:00Z'},
+            'end': {'dateTime': '2025-02-01T15:00:00Z'},
         },
         {
             'id': 'test-id-2',
-            'start': '2025-02-15T10:00:00Z',
-            'end': '2025-02-15T12:00:00Z',
+            'start': {'dateTime': '2025-02-15T10:00:00Z'},
+            'end': {'dateTime': '2025-02-15T12:00:00Z'},
         },
     ]
 }
 
 
+CALENDAR_LIST = {'items': [{'id': 'test_calendar_id', 'summary': 'Test calendar'}]}
+
+
 class TestEventList(object):
     """Tests for src.resources.event"""
 
-    @patch('src.services.event.build_service')
+    @patch('src.services.event.get_service')
     @patch('src.services.event.update_event_properties')
     def test_get_with_query_parameters(
-        self, mock_build_service, mock_update_event_properties, client: FlaskClient
+        self, mock_get_service, mock_update_event_properties, client: FlaskClient
     ):
         mock_service = MagicMock()
-        mock_build_service.return_value = mock_service
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
         mock_update_event_properties.return_value = mock_service
         mock_service.events().list().execute.return_value = mock_events
 
@@ -74,13 +96,13 @@ class TestEventList(object):
             assert 'start' in event
             assert 'end' in event
 
-    @patch('src.services.event.build_service')
+    @patch('src.services.event.get_service')
     @patch('src.services.event.update_event_properties')
     def test_get_with_invalid_query_parameters(
-        self, mock_build_service, mock_update_event_properties, client: FlaskClient
+        self, mock_get_service, mock_update_event_properties, client: FlaskClient
     ):
         mock_service = MagicMock()
-        mock_build_service.return_value = mock_service
+        mock_get_service.return_value = mock_service
         mock_update_event_properties.return_value = mock_service
         mock_service.events().list().execute.return_value = mock_events
 
@@ -98,3 +120,540 @@ class TestEventList(object):
         data = json.loads(response.data)
         assert data['@error']['@message'] == 'Invalid query parameters'
         assert data['@error']['@messages'][0] == 'Date and time is invalid: 32.13.2025'
+
+
+class TestEventListStreaming(object):
+    """Tests for the streaming mode of src.resources.event.EventList"""
+
+    query_params = {
+        'start_date': '2025-02-01T00:00:00Z',
+        'end_date': '2025-02-28T00:00:00Z',
+    }
+
+    @patch('src.services.event.get_service')
+    def test_get_stream_json(self, mock_get_service, client: FlaskClient, make_event):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.side_effect = [
+            {
+                'items': [make_event('test-id-1', 1, 2), make_event('test-id-2', 2)],
+                'nextPageToken': 'token',
+            },
+            {'items': [make_event('test-id-3', 3)]},
+        ]
+
+        response = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, stream='json'),
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [event['id'] for event in data] == ['test-id-1', 'test-id-2', 'test-id-3']
+        assert data[0]['duration'] == 2
+
+    @patch('src.services.event.get_service')
+    def test_get_stream_ndjson_accept_header(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.return_value = {
+            'items': [make_event('test-id-1', 1), make_event('test-id-2', 2)]
+        }
+
+        response = client.get(
+            '/events/test_calendar_id',
+            query_string=self.query_params,
+            headers={'Accept': 'application/x-ndjson'},
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.data.decode().splitlines()
+        assert [json.loads(line)['id'] for line in lines] == ['test-id-1', 'test-id-2']
+
+    @patch('src.services.event.EVENT_SYNC', False)
+    @patch('src.services.event.get_service')
+    def test_get_stream_error_after_start(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.side_effect = [
+            {'items': [make_event('test-id-1', 1)], 'nextPageToken': 'token'},
+            HttpError(MagicMock(status=500), b'Backend Error'),
+        ]
+
+        response = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, stream='json'),
+        )
+
+        # The status is already sent, the array ends with a Mason error object
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data[0]['id'] == 'test-id-1'
+        assert data[-1]['@error']['@message'] == 'Google Calendar API Error'
+
+    @patch('src.services.event.get_service')
+    def test_get_stream_error_before_start(self, mock_get_service, client: FlaskClient):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.side_effect = HttpError(
+            MagicMock(status=500), b'Backend Error'
+        )
+
+        response = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, stream='ndjson'),
+        )
+
+        assert response.status_code == 500
+        data = json.loads(response.data)
+        assert data['@error']['@message'] == 'Google Calendar API Error'
+
+    def test_get_stream_unknown_format(self, client: FlaskClient):
+        response = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, stream='xml'),
+        )
+
+        assert response.status_code == 400
+
+
+class TestEventListCache(object):
+    """Tests for the event store cache status of src.resources.event.EventList"""
+
+    @patch('src.sync.SYNC_INTERVAL', 60)
+    @patch('src.services.event.get_service')
+    def test_get_reports_cache_miss_then_hit(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        mock_service.events().list().execute.return_value = {
+            'items': [make_event('test-id-1', 1)],
+            'nextSyncToken': 'sync-token',
+        }
+        query_params = {
+            'start_date': '2025-02-01T00:00:00Z',
+            'end_date': '2025-02-28T00:00:00Z',
+        }
+
+        first = client.get('/events/test_calendar_id', query_string=query_params)
+        second = client.get('/events/test_calendar_id', query_string=query_params)
+
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert json.loads(first.data) == json.loads(second.data)
+
+
+class TestEventListConditionalGet(object):
+    """Tests for the ETag and If-None-Match handling of EventList"""
+
+    query_params = {
+        'start_date': '2025-02-01T00:00:00Z',
+        'end_date': '2025-02-28T00:00:00Z',
+    }
+
+    @patch('src.services.event.EVENT_SYNC', False)
+    @patch('src.services.event.get_service')
+    def test_get_not_modified(self, mock_get_service, client: FlaskClient, make_event):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        mock_service.events().list().execute.return_value = {
+            'items': [
+                make_event('test-id-1', 1, etag='"1"'),
+                make_event('test-id-2', 2, etag='"1"'),
+            ]
+        }
+
+        first = client.get('/events/test_calendar_id', query_string=self.query_params)
+        second = client.get(
+            '/events/test_calendar_id',
+            query_string=self.query_params,
+            headers={'If-None-Match': first.headers['ETag']},
+        )
+
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == first.headers['ETag']
+
+    @patch('src.services.event.EVENT_SYNC', False)
+    @patch('src.services.event.get_service')
+    def test_get_modified_event_changes_etag(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        mock_service.events().list().execute.side_effect = [
+            {'items': [make_event('test-id-1', 1, etag='"1"')]},
+            {'items': [make_event('test-id-1', 1, etag='"2"')]},
+        ]
+
+        first = client.get('/events/test_calendar_id', query_string=self.query_params)
+        second = client.get(
+            '/events/test_calendar_id',
+            query_string=self.query_params,
+            headers={'If-None-Match': first.headers['ETag']},
+        )
+
+        assert second.status_code == 200
+        assert second.headers['ETag'] != first.headers['ETag']
+
+    @patch('src.services.event.EVENT_SYNC', False)
+    @patch('src.services.event.get_service')
+    def test_get_other_query_changes_etag(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        mock_service.events().list().execute.return_value = {
+            'items': [make_event('test-id-1', 1, etag='"1"')]
+        }
+
+        first = client.get('/events/test_calendar_id', query_string=self.query_params)
+        etag = first.headers['ETag']
+        sorted_ = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, sort='start'),
+            headers={'If-None-Match': etag},
+        )
+        limited = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, limit=10),
+            headers={'If-None-Match': etag},
+        )
+        default_sort = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(self.query_params, sort='-start'),
+            headers={'If-None-Match': etag},
+        )
+
+        # The same single event, but another representation of the list
+        assert sorted_.status_code == 200
+        assert sorted_.headers['ETag'] != etag
+        assert limited.status_code == 200
+        assert limited.headers['ETag'] != etag
+        assert default_sort.status_code == 304
+
+
+class TestEventItemConditionalUpdate(object):
+    """Tests for the ETag and If-Match handling of EventItem"""
+
+    @patch('src.services.event.get_service')
+    def test_get_etag_is_accepted_by_patch(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        event = make_event('test-id-1', 1, etag='"3381"')
+        mock_service.events().get().execute.return_value = event
+        patch_request = MagicMock(headers={})
+        patch_request.execute.return_value = dict(event, etag='"3382"')
+        mock_service.events().patch.return_value = patch_request
+
+        first = client.get('/events/primary/test-id-1/')
+        second = client.patch(
+            '/events/primary/test-id-1/',
+            json={'summary': 'Moved'},
+            headers={'If-Match': first.headers['ETag']},
+        )
+
+        # The ETag of the GET is the etag of Google, sent back unchanged
+        assert first.headers['ETag'] == '"3381"'
+        assert patch_request.headers['If-Match'] == '"3381"'
+        assert second.status_code == 200
+        assert second.headers['ETag'] == '"3382"'
+        # Compressed representations carry the encoding as a suffix
+        assert upstream_etag('"3381-gzip"') == '"3381"'
+
+    @patch('src.services.event.get_service')
+    def test_put_replaces_event(self, mock_get_service, client: FlaskClient, make_event):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        event = make_event('test-id-1', 1, etag='"3382"')
+        mock_service.events().update().execute.return_value = event
+        body = {'summary': 'Moved', 'start': event['start'], 'end': event['end']}
+
+        replaced = client.put('/events/primary/test-id-1/', json=body)
+        partial = client.put('/events/primary/test-id-1/', json={'summary': 'Moved'})
+
+        assert replaced.status_code == 200
+        mock_service.events().update.assert_called_with(
+            calendarId='primary', eventId='test-id-1', body=body
+        )
+        mock_service.events().patch.assert_not_called()
+        assert partial.status_code == 400
+
+
+class TestEventListPaging(object):
+    """Tests for the paging, sorting and filtering of src.resources.event.EventList"""
+
+    query_params = {
+        'start_date': '2025-02-01T00:00:00Z',
+        'end_date': '2025-02-28T00:00:00Z',
+    }
+
+    @staticmethod
+    def mock_service(mock_get_service, events):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        mock_service.events().list().execute.return_value = {
+            'items': events,
+            'nextSyncToken': 'sync-token',
+        }
+        return mock_service
+
+    def get_pages(self, client: FlaskClient, **params):
+        pages = []
+        cursor = None
+        while True:
+            query_string = dict(self.query_params, **params)
+            if cursor is not None:
+                query_string['cursor'] = cursor
+            response = client.get('/events/test_calendar_id', query_string=query_string)
+            assert response.status_code == 200
+            pages.append([event['id'] for event in json.loads(response.data)])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                return pages
+
+    @pytest.mark.parametrize('sync', [True, False])
+    @patch('src.services.event.get_service')
+    def test_pages_follow_cursor(
+        self, mock_get_service, sync, client: FlaskClient, make_event
+    ):
+        # Two events share the start time of a page boundary
+        events = [make_event(f'test-id-{day}', day) for day in (1, 2, 3, 4)]
+        events.append(make_event('test-id-3b', 3))
+        self.mock_service(mock_get_service, events)
+
+        with patch('src.services.event.EVENT_SYNC', sync):
+            oldest_first = self.get_pages(client, limit=2, sort='start')
+            newest_first = self.get_pages(client, limit=3)
+
+        assert oldest_first == [
+            ['test-id-1', 'test-id-2'],
+            ['test-id-3', 'test-id-3b'],
+            ['test-id-4'],
+        ]
+        assert newest_first == [
+            ['test-id-4', 'test-id-3b', 'test-id-3'],
+            ['test-id-2', 'test-id-1'],
+        ]
+
+    @patch('src.services.event.get_service')
+    def test_summary_contains_and_future_only(
+        self, mock_get_service, client: FlaskClient, make_event
+    ):
+        events = [
+            make_event(f'test-id-{day}', day, summary=f'Gym {day}') for day in (1, 2)
+        ]
+        future = datetime.now() + timedelta(days=1)
+        events.append(
+            {
+                'id': 'future-gym',
+                'summary': 'GYM',
+                'start': {'dateTime': future.isoformat() + 'Z'},
+                'end': {'dateTime': (future + timedelta(hours=1)).isoformat() + 'Z'},
+            }
+        )
+        self.mock_service(mock_get_service, events)
+        query_params = {'start_date': '2025-02-01', 'end_date': '2100-01-01'}
+
+        gym = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(query_params, summary_contains='gym 2'),
+        )
+        future_only = client.get(
+            '/events/test_calendar_id',
+            query_string=dict(query_params, future_only='true'),
+        )
+
+        assert [event['id'] for event in json.loads(gym.data)] == ['test-id-2']
+        assert [event['id'] for event in json.loads(future_only.data)] == ['future-gym']
+
+    @pytest.mark.parametrize(
+        'params',
+        [{'cursor': 'not-a-cursor'}, {'limit': 'ten'}, {'limit': 0}, {'sort': 'end'}],
+    )
+    @patch('src.services.event.get_service')
+    def test_invalid_paging_parameters(
+        self, mock_get_service, params, client: FlaskClient, make_event
+    ):
+        self.mock_service(mock_get_service, [make_event('test-id-1', 1)])
+
+        response = client.get(
+            '/events/test_calendar_id', query_string=dict(self.query_params, **params)
+        )
+
+        assert response.status_code == 400
+
+
+class TestEventListMultiCalendar(object):
+    """Tests for event lists of several calendars in src.resources.event"""
+
+    @patch('src.services.event.get_service')
+    def test_get_merged_events_with_errors(self, mock_get_service, client: FlaskClient):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+
+        def list_events(calendarId, **params):
+            request = MagicMock()
+            if calendarId == 'gone':
+                request.execute.side_effect = HttpError(
+                    MagicMock(status=404), b'Not Found'
+                )
+            else:
+                request.execute.return_value = mock_events
+            return request
+
+        mock_service.events().list.side_effect = list_events
+
+        response = client.get(
+            '/events/primary,gone',
+            query_string={'start_date': '2025-02-01', 'end_date': '2025-03-01'},
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert {event['calendarId'] for event in data['items']} == {'primary'}
+        assert len(data['items']) == len(mock_events['items'])
+        assert data['errors']['gone']['status'] == 404
+        assert response.headers['ETag']
+
+    def test_streaming_not_supported(self, client: FlaskClient):
+        response = client.get(
+            '/events/primary,work',
+            query_string={
+                'start_date': '2024-01-01',
+                'end_date': '2025-01-01',
+                'stream': 'ndjson',
+            },
+        )
+
+        assert response.status_code == 400
+
+
+class TestEventSuggest(object):
+    """Tests for src.resources.event.EventSuggest"""
+
+    @patch('src.services.event.get_service')
+    def test_get_suggestions(self, mock_get_service, client: FlaskClient):
+        now = datetime.now()
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.return_value = {
+            'items': [
+                {
+                    'id': f'event-{i}',
+                    'summary': summary,
+                    'start': {'dateTime': (now - timedelta(days=i)).isoformat()},
+                    'end': {'dateTime': (now - timedelta(days=i)).isoformat()},
+                }
+                for i, summary in enumerate(['Gym', 'Work', 'Gym', 'Groceries'], 1)
+            ]
+        }
+
+        response = client.get(
+            '/events/test_calendar_id/suggest/', query_string={'prefix': 'g'}
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['prefix'] == 'g'
+        assert [item['summary'] for item in data['suggestions']] == ['Gym', 'Groceries']
+        assert data['suggestions'][0]['count'] == 2
+
+    @pytest.mark.parametrize('limit', ['abc', '0', '1000'])
+    def test_invalid_limit(self, limit, client: FlaskClient):
+        response = client.get(
+            '/events/test_calendar_id/suggest/', query_string={'limit': limit}
+        )
+
+        assert response.status_code == 400
+
+
+class TestFreeSlots(object):
+    """Tests for src.resources.freeslots"""
+
+    @patch('src.services.freeslots.EVENT_SYNC', False)
+    @patch('src.services.freeslots.get_service')
+    def test_get_free_slots(self, mock_get_service, client: FlaskClient):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.freebusy().query().execute.return_value = {
+            'calendars': {'work': {'busy': []}, 'home': {'busy': []}}
+        }
+
+        response = client.get(
+            '/freeslots/',
+            query_string={
+                'calendar_ids': 'work,home',
+                'start_date': '2025-03-03T00:00:00+02:00',
+                'end_date': '2025-03-04T00:00:00+02:00',
+                'work_start': '08:00',
+                'work_end': '16:00',
+            },
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [slot['minutes'] for slot in data['slots']] == [480]
+        assert data['errors'] == {}
+        body = mock_service.freebusy().query.call_args.kwargs['body']
+        assert body['items'] == [{'id': 'work'}, {'id': 'home'}]
+
+    @pytest.mark.parametrize(
+        'query_string',
+        [
+            {},
+            {'start_date': '2025-03-03'},
+            {'start_date': '2025-03-03', 'end_date': '2025-03-04', 'min_minutes': 'x'},
+        ],
+    )
+    def test_invalid_parameters(self, query_string, client: FlaskClient):
+        response = client.get('/freeslots/', query_string=query_string)
+
+        assert response.status_code == 400
+
+
+class TestCalendarCache(object):
+    """Tests for the calendar cache behind src.resources.calendar"""
+
+    @patch('src.services.calendar.queue_output_file')
+    @patch('src.services.calendar.get_service')
+    def test_calendar_list_is_cached(self, mock_get_service, _):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        before = calendar_cache.stats()
+
+        assert get_calendar_list() == CALENDAR_LIST['items']
+        assert get_calendar_list() == CALENDAR_LIST['items']
+        assert get_calendar_list(refresh=True) == CALENDAR_LIST['items']
+
+        assert mock_service.calendarList().list().execute.call_count == 2
+        after = calendar_cache.stats()
+        assert after['hits'] - before['hits'] == 1
+        assert after['misses'] - before['misses'] == 2
+
+    def test_calendar_summary_skips_calendars_get(self):
+        mock_service = MagicMock()
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+
+        with patch('src.services.calendar.queue_output_file'):
+            summary = get_calendar_summary(mock_service, 'test_calendar_id')
+            get_calendar_summary(mock_service, 'test_calendar_id')
+
+        assert summary == 'Test calendar'
+        mock_service.calendars().get.assert_not_called()
+        assert mock_service.calendarList().list().execute.call_count == 1
@@ -0,0 +1,38 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src import serialization
+
+DATA = {'summary': 'Kävely – ulkona', 'duration': 1.5, 'attendees': [{'id': 1}]}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def backend(request):
+    """Run the test with orjson (if installed) and with the stdlib fallback."""
+    if request.param == 'orjson':
+        if serialization.orjson is None:
+            pytest.skip('orjson is not installed')
+        yield request.param
+    else:
+        with patch('src.serialization.orjson', None):
+            yield request.param
+
+
+class TestSerialization(object):
+    """Tests for src.serialization"""
+
+    def test_dumps_is_compact_utf8(self, backend):
+        assert serialization.dumps(DATA) == json.dumps(
+            DATA, separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8')
+
+    def test_dumps_pretty(self, backend):
+        assert serialization.dumps_pretty(DATA) == json.dumps(
+            DATA, indent=2, ensure_ascii=False
+        ).encode('utf-8')
+
+    def test_loads_round_trip(self, backend):
+        assert serialization.loads(serialization.dumps(DATA)) == DATA
+        assert serialization.loads(serialization.dumps(DATA).decode()) == DATA
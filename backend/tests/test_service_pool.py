@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src import service_pool
+from src.error import ServiceBuildError
+from src.service_pool import get_service, invalidate_service_pool
+
+
+@pytest.fixture
+def pool():
+    """Reset the pool and replace the credentials and the service builder."""
+    invalidate_service_pool()
+    with (
+        patch('src.service_pool.get_credentials') as mock_get_credentials,
+        patch('src.service_pool._build_service') as mock_build_service,
+    ):
+        mock_get_credentials.return_value = MagicMock()
+        mock_build_service.side_effect = lambda: MagicMock()
+        yield mock_get_credentials, mock_build_service
+    invalidate_service_pool()
+
+
+class TestServicePool(object):
+    """Tests for src.service_pool"""
+
+    def test_get_service_reuses_thread_service(self, pool):
+        mock_get_credentials, mock_build_service = pool
+
+        assert get_service() is get_service()
+        assert mock_build_service.call_count == 1
+        assert mock_get_credentials.call_count == 1
+
+    def test_get_service_builds_one_service_per_thread(self, pool):
+        _, mock_build_service = pool
+        services = []
+
+        thread = threading.Thread(target=lambda: services.append(get_service()))
+        thread.start()
+        thread.join()
+
+        assert get_service() is not services[0]
+        assert mock_build_service.call_count == 2
+
+    def test_invalidate_rebuilds_service(self, pool):
+        mock_get_credentials, mock_build_service = pool
+
+        service = get_service()
+        invalidate_service_pool()
+
+        assert get_service() is not service
+        assert mock_get_credentials.call_count == 2
+        assert mock_build_service.call_count == 2
+
+    def test_get_service_missing_credentials(self, pool):
+        mock_get_credentials, _ = pool
+        mock_get_credentials.return_value = None
+
+        with pytest.raises(ServiceBuildError):
+            get_service()
+
+    def test_discovery_document_parsed_once(self):
+        with patch('src.service_pool._discovery_document', None):
+            document = service_pool._get_discovery_document()
+            assert service_pool._get_discovery_document() is document
+            assert document['name'] == 'calendar'
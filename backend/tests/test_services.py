@@ -1,29 +1,61 @@
 import logging
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
-from src.services.event import get_popular_events
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.error import APIError, ParameterError
+from src.services.event import (
+    EventPages,
+    create_event,
+    create_events,
+    delete_events,
+    get_events,
+    get_events_from_calendars,
+    get_popular_events,
+    get_recent_unique_events,
+    parse_calendar_ids,
+    update_event,
+)
+from src.services.stats import compute_event_stats, get_event_stats
+from src.sync import forget_event, store_event
 
 logger = logging.getLogger(__name__)
 
 
+def summary_event(summary, days_ago=1):
+    """Returns an event with the summary that happened days_ago days ago."""
+    start = datetime.now() - timedelta(days=days_ago)
+    return {
+        'id': f'{summary}-{days_ago}',
+        'summary': summary,
+        'start': {'dateTime': start.isoformat() + 'Z'},
+        'end': {'dateTime': (start + timedelta(hours=1)).isoformat() + 'Z'},
+    }
+
+
+CALENDAR_LIST = {'items': [{'id': 'test_calendar_id', 'summary': 'Test calendar'}]}
+
+
 class TestServicesEvent(object):
     """Tests for src.services.event"""
 
-    @patch('src.services.event.build_service')
-    def test_get_popular_events_multiple_events(self, mock_build_service):
+    @patch('src.services.event.get_service')
+    def test_get_popular_events_multiple_events(self, mock_get_service):
         # Mock the service object and its methods
         mock_service = MagicMock()
-        mock_build_service.return_value = mock_service
+        mock_get_service.return_value = mock_service
 
         # Mock the events returned by the API
         mock_events = {
             'items': [
-                {'summary': 'Event A'},
-                {'summary': 'Event B'},
-                {'summary': 'Event A'},
-                {'summary': 'Event C'},
-                {'summary': 'Event B'},
-                {'summary': 'Event A'},
+                summary_event('Event A', 1),
+                summary_event('Event B', 2),
+                summary_event('Event A', 3),
+                summary_event('Event C', 4),
+                summary_event('Event B', 5),
+                summary_event('Event A', 6),
             ]
         }
         mock_service.events().list().execute.return_value = mock_events
@@ -35,11 +67,11 @@ class TestServicesEvent(object):
         # Assert the result
         assert result == {'Event A': 3, 'Event B': 2, 'Event C': 1}
 
-    @patch('src.services.event.build_service')
-    def test_get_popular_events_no_events(self, mock_build_service):
+    @patch('src.services.event.get_service')
+    def test_get_popular_events_no_events(self, mock_get_service):
         # Mock the service and its methods
         mock_service = MagicMock()
-        mock_build_service.return_value = mock_service
+        mock_get_service.return_value = mock_service
 
         # Mock the events returned by the API to be empty
         mock_service.events().list().execute.return_value = {'items': []}
@@ -50,16 +82,16 @@ class TestServicesEvent(object):
         # Assert the result
         assert result == {}
 
-    @patch('src.services.event.build_service')
-    def test_get_popular_events_single_event(self, mock_build_service):
+    @patch('src.services.event.get_service')
+    def test_get_popular_events_single_event(self, mock_get_service):
         # Mock the service and its methods
         mock_service = MagicMock()
-        mock_build_service.return_value = mock_service
+        mock_get_service.return_value = mock_service
 
         # Mock the events returned by the API with a single event
         mock_events = {
             'items': [
-                {'summary': 'Event A'},
+                summary_event('Event A'),
             ]
         }
         mock_service.events().list().execute.return_value = mock_events
@@ -71,14 +103,16 @@ class TestServicesEvent(object):
         # Assert the result
         assert result == {'Event A': 1}
 
-    @patch('src.services.event.build_service')
-    def test_get_popular_events_more_than_ten_unique_events(self, mock_build_service):
+    @patch('src.services.event.get_service')
+    def test_get_popular_events_more_than_ten_unique_events(self, mock_get_service):
         # Mock the service and its methods
         mock_service = MagicMock()
-        mock_build_service.return_value = mock_service
+        mock_get_service.return_value = mock_service
 
         # Mock the events returned by the API with more than ten unique events
-        mock_events = {'items': [{'summary': f'Event {chr(65 + i)}'} for i in range(15)]}
+        mock_events = {
+            'items': [summary_event(f'Event {chr(65 + i)}', i + 1) for i in range(15)]
+        }
         mock_service.events().list().execute.return_value = mock_events
 
         # Call the function
@@ -87,3 +121,628 @@ class TestServicesEvent(object):
 
         # Assert the result contains only 10 most recent events
         assert len(result) == 10
+
+    @patch('src.services.event.get_service')
+    def test_popular_and_recent_events_share_history(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        execute = mock_service.events().list().execute
+        execute.return_value = {
+            'items': [
+                summary_event('Event A', 3),
+                summary_event('Event B', 2),
+                summary_event('Event A', 1),
+            ]
+        }
+
+        assert get_popular_events('test_calendar_id') == {'Event A': 2, 'Event B': 1}
+        recent = get_recent_unique_events('test_calendar_id')
+
+        assert recent == ['Event A', 'Event B']
+        # One upstream request served both analyses
+        assert execute.call_count == 1
+
+    @patch('src.services.event.get_service')
+    def test_event_history_invalidated_on_change(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.return_value = {
+            'items': [summary_event('Event A', 2), summary_event('Event B', 1)]
+        }
+
+        assert get_popular_events('test_calendar_id') == {'Event A': 1, 'Event B': 1}
+        forget_event('test_calendar_id', 'Event A-2')
+
+        assert get_popular_events('test_calendar_id') == {'Event B': 1}
+
+    @patch('src.services.event.get_service')
+    def test_event_history_updated_incrementally(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        execute = mock_service.events().list().execute
+        execute.return_value = {'items': [summary_event('Event A', 2)]}
+
+        assert get_popular_events('test_calendar_id') == {'Event A': 1}
+        store_event('test_calendar_id', summary_event('Event B', 1))
+        store_event('test_calendar_id', summary_event('Event B', 0.5))
+
+        assert get_popular_events('test_calendar_id') == {'Event B': 2, 'Event A': 1}
+        assert get_recent_unique_events('test_calendar_id') == ['Event B', 'Event A']
+        assert execute.call_count == 1
+
+    @patch('src.services.event.get_service')
+    def test_event_history_reloaded_after_other_worker_change(
+        self, mock_get_service, event_store
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.return_value = {
+            'items': [summary_event('Event A', 2)]
+        }
+
+        assert get_popular_events('test_calendar_id') == {'Event A': 1}
+        # Written to the shared store by another worker, without notifying us
+        event_store.upsert('test_calendar_id', summary_event('Event B', 1))
+
+        assert get_popular_events('test_calendar_id') == {'Event A': 1, 'Event B': 1}
+
+
+class TestServicesEventPagination(object):
+    """Tests for the pagination of src.services.event.get_events"""
+
+    @staticmethod
+    def mock_pages(mock_service, pages):
+        """Make events().list().execute() return the pages in order."""
+        mock_service.events().list().execute.side_effect = [
+            {
+                'items': items,
+                **({'nextPageToken': f'token-{i}'} if i < len(pages) - 1 else {}),
+            }
+            for i, items in enumerate(pages)
+        ]
+
+    @patch('src.services.event.queue_output_file')
+    @patch('src.services.event.get_service')
+    def test_get_events_follows_next_page_token(self, mock_get_service, _, make_event):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        self.mock_pages(
+            mock_service,
+            [
+                [make_event('event-1', 1, 1.5), make_event('event-2', 2, 1.5)],
+                [make_event('event-3', 3, 1.5)],
+            ],
+        )
+
+        events = get_events('test_calendar_id', '2025-02-01', '2025-02-28')
+
+        # Newest first, with the computed properties added
+        assert [event['id'] for event in events] == ['event-3', 'event-2', 'event-1']
+        assert all(event['duration'] == 1.5 for event in events)
+        assert events.truncated is False
+        page_tokens = [
+            call.kwargs.get('pageToken')
+            for call in mock_service.events().list.call_args_list
+            if call.kwargs
+        ]
+        assert page_tokens == [None, 'token-0']
+
+    @patch('src.services.event.queue_output_file')
+    @patch('src.services.event.get_service')
+    def test_get_events_page_limit_truncates(self, mock_get_service, _, make_event):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        self.mock_pages(
+            mock_service,
+            [
+                [make_event('event-1', 1, 1.5)],
+                [make_event('event-2', 2, 1.5)],
+                [make_event('event-3', 3, 1.5)],
+            ],
+        )
+
+        pages = EventPages(mock_service, max_pages=2, calendarId='test_calendar_id')
+        events = [event for page in pages for event in page]
+
+        assert len(events) == 2
+        assert pages.truncated is True
+        assert pages.page_count == 2
+
+    @patch('src.services.event.EVENT_SYNC', False)
+    @patch('src.services.event.queue_output_file')
+    @patch('src.services.event.get_service')
+    def test_get_events_fields_projection(self, mock_get_service, _, make_event):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        self.mock_pages(
+            mock_service, [[make_event('event-1', 1, 1.5), make_event('event-2', 2, 1.5)]]
+        )
+
+        events = get_events(
+            'test_calendar_id', '2025-02-01', '2025-02-28', fields=('id', 'duration')
+        )
+
+        assert events == [
+            {'id': 'event-2', 'duration': 1.5},
+            {'id': 'event-1', 'duration': 1.5},
+        ]
+        list_kwargs = mock_service.events().list.call_args.kwargs
+        assert list_kwargs['fields'] == (
+            'nextPageToken,nextSyncToken,items(id,start,end)'
+        )
+
+    @patch('src.services.event.queue_output_file')
+    @patch('src.services.event.get_service')
+    def test_get_events_fields_projection_from_store(
+        self, mock_get_service, _, make_event
+    ):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.calendarList().list().execute.return_value = CALENDAR_LIST
+        self.mock_pages(mock_service, [[make_event('event-1', 1, 1.5, summary='Gym')]])
+
+        events = get_events(
+            'test_calendar_id', '2025-02-01', '2025-02-28', fields=('summary',)
+        )
+
+        assert events == [{'summary': 'Gym'}]
+
+
+class FakeBatch(object):
+    """Stands in for BatchHttpRequest, executes the added requests in order."""
+
+    def __init__(self, callback, batches):
+        self.callback = callback
+        self.requests = []
+        batches.append(self)
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except HttpError as error:
+                self.callback(request_id, None, error)
+
+
+class TestServicesEventBatch(object):
+    """Tests for src.services.event.create_events"""
+
+    @staticmethod
+    def mock_batch_service(batches):
+        mock_service = MagicMock()
+        mock_service.new_batch_http_request.side_effect = lambda callback: FakeBatch(
+            callback, batches
+        )
+
+        def insert(calendarId, body):
+            request = MagicMock()
+            if body['summary'] == 'fail':
+                request.execute.side_effect = HttpError(
+                    MagicMock(status=400), b'Bad Request'
+                )
+            else:
+                request.execute.return_value = dict(body, id=f'id-{body["summary"]}')
+            return request
+
+        mock_service.events().insert.side_effect = insert
+        return mock_service
+
+    @patch('src.services.event.get_service')
+    def test_create_events_in_chunks_and_input_order(self, mock_get_service):
+        batches = []
+        mock_get_service.return_value = self.mock_batch_service(batches)
+        bodies = [
+            dict(summary_event(str(i)), summary='fail' if i == 3 else str(i))
+            for i in range(5)
+        ]
+
+        with patch('src.batch.BATCH_SIZE', 2):
+            results = create_events('test_calendar_id', bodies)
+
+        assert [len(batch.requests) for batch in batches] == [2, 2, 1]
+        assert [result['index'] for result in results] == [0, 1, 2, 3, 4]
+        assert [result['status'] for result in results] == [201, 201, 201, 400, 201]
+        assert results[4]['event']['id'] == 'id-4'
+        assert 'duration' in results[0]['event']
+        assert 'error' in results[3]
+
+    def test_create_events_requires_array(self):
+        with pytest.raises(ParameterError):
+            create_events('test_calendar_id', {'summary': 'Not an array'})
+
+
+class TestServicesEventBulkDelete(object):
+    """Tests for src.services.event.delete_events"""
+
+    @staticmethod
+    def mock_batch_service(batches):
+        mock_service = MagicMock()
+        mock_service.new_batch_http_request.side_effect = lambda callback: FakeBatch(
+            callback, batches
+        )
+
+        def delete(calendarId, eventId):
+            request = MagicMock()
+            if eventId == 'missing':
+                request.execute.side_effect = HttpError(
+                    MagicMock(status=404), b'Not Found'
+                )
+            else:
+                request.execute.return_value = ''
+            return request
+
+        mock_service.events().delete.side_effect = delete
+        return mock_service
+
+    @patch('src.services.event.forget_events')
+    @patch('src.services.event.get_service')
+    def test_delete_events_by_ids(self, mock_get_service, mock_forget_events):
+        batches = []
+        mock_get_service.return_value = self.mock_batch_service(batches)
+
+        with patch('src.batch.BATCH_SIZE', 2):
+            report = delete_events(
+                'test_calendar_id', event_ids=['a', 'missing', 'b', 'a']
+            )
+
+        assert [len(batch.requests) for batch in batches] == [2, 1]
+        assert report['matched'] == 3
+        assert report['truncated'] is False
+        assert report['deleted'] == 2
+        assert report['failed'] == 1
+        assert [result['status'] for result in report['results']] == [204, 404, 204]
+        # The deleted events leave the store in one batch
+        mock_forget_events.assert_called_once_with('test_calendar_id', ['a', 'b'])
+
+    @patch('src.services.event.get_service')
+    def test_delete_events_dry_run_by_query(self, mock_get_service):
+        batches = []
+        mock_service = self.mock_batch_service(batches)
+        mock_get_service.return_value = mock_service
+        events = [summary_event('Gym', days_ago=2), summary_event('Lunch')]
+
+        with patch(
+            'src.services.event.list_events', return_value=(events, None, None)
+        ) as mock_list_events:
+            report = delete_events('test_calendar_id', search_query='Gym', dry_run=True)
+
+        assert mock_list_events.call_args.args[-1] == 'Gym'
+        assert report['dry_run'] is True
+        assert report['matched'] == 2
+        assert [result['id'] for result in report['results']] == ['Gym-2', 'Lunch-1']
+        assert batches == []
+        mock_service.events().delete.assert_not_called()
+
+    @patch('src.services.event.forget_events')
+    @patch('src.services.event.get_service')
+    def test_delete_events_reports_truncated_selection(
+        self, mock_get_service, mock_forget_events
+    ):
+        batches = []
+        mock_get_service.return_value = self.mock_batch_service(batches)
+        events = [summary_event('Gym', days_ago=2), summary_event('Gym')]
+        pages = MagicMock(truncated=True)
+
+        with patch(
+            'src.services.event.list_events',
+            side_effect=lambda *args, **kwargs: (iter(events), pages, None),
+        ):
+            dry_run = delete_events('test_calendar_id', search_query='Gym', dry_run=True)
+            report = delete_events('test_calendar_id', search_query='Gym')
+
+        assert dry_run['truncated'] is True
+        assert report['truncated'] is True
+        assert report['deleted'] == 2
+        mock_forget_events.assert_called_once_with('test_calendar_id', ['Gym-2', 'Gym-1'])
+
+    def test_delete_events_requires_selection(self):
+        with pytest.raises(ParameterError):
+            delete_events('test_calendar_id')
+        with pytest.raises(ParameterError):
+            delete_events('test_calendar_id', event_ids=['a'], search_query='Gym')
+
+
+class TestServicesEventUpdate(object):
+    """Tests for src.services.event.update_event"""
+
+    @staticmethod
+    def mock_patch_service(response=None, error=None):
+        mock_service = MagicMock()
+        patch_request = MagicMock()
+        patch_request.headers = {}
+        if error is not None:
+            patch_request.execute.side_effect = error
+        else:
+            patch_request.execute.return_value = response
+        mock_service.events().patch.return_value = patch_request
+        return mock_service, patch_request
+
+    @patch('src.services.event.get_service')
+    def test_update_event_patches_given_fields(self, mock_get_service):
+        event = dict(summary_event('Renamed'), etag='"2"')
+        mock_service, patch_request = self.mock_patch_service(response=event)
+        mock_get_service.return_value = mock_service
+
+        updated = update_event(
+            'test_calendar_id', event['id'], {'summary': 'Renamed'}, etag='"1"'
+        )
+
+        mock_service.events().patch.assert_called_with(
+            calendarId='test_calendar_id',
+            eventId=event['id'],
+            body={'summary': 'Renamed'},
+        )
+        mock_service.events().get.assert_not_called()
+        assert patch_request.headers['If-Match'] == '"1"'
+        assert updated['etag'] == '"2"'
+        assert 'duration' in updated
+
+    @patch('src.services.event.get_service')
+    def test_update_event_precondition_failed(self, mock_get_service):
+        error = HttpError(MagicMock(status=412), b'Precondition Failed')
+        mock_service, _ = self.mock_patch_service(error=error)
+        mock_get_service.return_value = mock_service
+
+        with pytest.raises(APIError) as exc_info:
+            update_event('test_calendar_id', 'id', {'summary': 'x'}, etag='"1"')
+
+        assert exc_info.value.status_code == 412
+
+    def test_update_event_rejects_unknown_fields(self):
+        with pytest.raises(ParameterError):
+            update_event('test_calendar_id', 'id', {'id': 'other-id'})
+        with pytest.raises(ParameterError):
+            update_event('test_calendar_id', 'id', {})
+
+    @patch('src.services.event.get_service')
+    def test_replace_event_updates_whole_event(self, mock_get_service):
+        event = summary_event('Replaced')
+        body = {key: event[key] for key in ('summary', 'start', 'end')}
+        mock_service = MagicMock()
+        mock_service.events().update().execute.return_value = event
+        mock_get_service.return_value = mock_service
+
+        replaced = update_event('test_calendar_id', event['id'], body, replace=True)
+
+        mock_service.events().update.assert_called_with(
+            calendarId='test_calendar_id', eventId=event['id'], body=body
+        )
+        mock_service.events().patch.assert_not_called()
+        assert replaced['summary'] == 'Replaced'
+
+    def test_replace_event_requires_start_and_end(self):
+        with pytest.raises(ParameterError, match='end, start'):
+            update_event('test_calendar_id', 'id', {'summary': 'x'}, replace=True)
+
+
+class TestServicesEventMultiCalendar(object):
+    """Tests for src.services.event.get_events_from_calendars"""
+
+    @staticmethod
+    def mock_calendars(mock_get_service, calendars):
+        """Make events().list() of each calendar return its events or raise."""
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+
+        def list_events(calendarId, **params):
+            request = MagicMock()
+            result = calendars[calendarId]
+            if isinstance(result, Exception):
+                request.execute.side_effect = result
+            else:
+                request.execute.return_value = {'items': result}
+            return request
+
+        mock_service.events().list.side_effect = list_events
+
+    @patch('src.services.event.get_service')
+    def test_merges_calendars_in_order(self, mock_get_service, make_event):
+        self.mock_calendars(
+            mock_get_service,
+            {
+                'work': [make_event(f'work-{day}', day) for day in (2, 5, 6)],
+                'home': [make_event(f'home-{day}', day) for day in (1, 3, 4)],
+            },
+        )
+        params = dict(
+            start_date='2025-02-01T00:00:00Z',
+            end_date='2025-03-01T00:00:00Z',
+            sort='start',
+            limit=4,
+        )
+
+        first = get_events_from_calendars(['work', 'home'], **params)
+        second = get_events_from_calendars(
+            ['work', 'home'], cursor=first.next_cursor, **params
+        )
+
+        assert [event['id'] for event in first] == [
+            'home-1',
+            'work-2',
+            'home-3',
+            'home-4',
+        ]
+        assert [event['calendarId'] for event in first] == [
+            'home',
+            'work',
+            'home',
+            'home',
+        ]
+        assert [event['id'] for event in second] == ['work-5', 'work-6']
+        assert second.next_cursor is None
+        assert first.errors == {}
+
+    @patch('src.services.event.get_service')
+    def test_reports_failed_calendars(self, mock_get_service, make_event):
+        self.mock_calendars(
+            mock_get_service,
+            {
+                'work': [make_event('work-2', 2)],
+                'gone': HttpError(MagicMock(status=404), b'Not Found'),
+            },
+        )
+
+        events = get_events_from_calendars(
+            ['work', 'gone'],
+            start_date='2025-02-01T00:00:00Z',
+            end_date='2025-03-01T00:00:00Z',
+            fields=('summary',),
+        )
+
+        assert events == [{'summary': 'Event work-2', 'calendarId': 'work'}]
+        assert list(events.errors) == ['gone']
+        assert events.errors['gone']['status'] == 404
+
+    @patch('src.services.event.get_service')
+    def test_every_calendar_fails(self, mock_get_service):
+        error = HttpError(MagicMock(status=500), b'Backend Error')
+        self.mock_calendars(mock_get_service, {'work': error, 'home': error})
+
+        with pytest.raises(APIError):
+            get_events_from_calendars(
+                ['work', 'home'],
+                start_date='2025-02-01T00:00:00Z',
+                end_date='2025-03-01T00:00:00Z',
+            )
+
+    def test_parse_calendar_ids(self):
+        assert parse_calendar_ids('primary') is None
+        assert parse_calendar_ids('work, home,work') == ['work', 'home']
+        with patch(
+            'src.services.event.get_calendar_list',
+            return_value=[{'id': 'work'}, {'id': 'home'}],
+        ):
+            assert parse_calendar_ids('all') == ['work', 'home']
+        with pytest.raises(ParameterError):
+            parse_calendar_ids(',')
+
+
+class TestServicesEventConflicts(object):
+    """Tests for the conflict check of src.services.event.create_event"""
+
+    existing = {
+        'id': 'existing',
+        'summary': 'Meeting',
+        'start': {'dateTime': '2025-03-01T09:00:00+00:00'},
+        'end': {'dateTime': '2025-03-01T10:00:00+00:00'},
+    }
+
+    @staticmethod
+    def event_body(start_hour, end_hour):
+        return {
+            'summary': 'Gym',
+            'start': {'dateTime': f'2025-03-01T{start_hour:02d}:00:00+00:00'},
+            'end': {'dateTime': f'2025-03-01T{end_hour:02d}:00:00+00:00'},
+        }
+
+    def mock_service(self, mock_get_service):
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.events().list().execute.return_value = {'items': [self.existing]}
+        mock_service.events().insert.side_effect = lambda calendarId, body: MagicMock(
+            execute=lambda: dict(body, id=f'created-{body["start"]["dateTime"][11:13]}')
+        )
+        return mock_service
+
+    @patch('src.services.conflicts.get_service')
+    @patch('src.services.event.get_service')
+    def test_reject(self, mock_get_service, mock_conflicts_service):
+        mock_service = self.mock_service(mock_get_service)
+        mock_conflicts_service.return_value = mock_service
+
+        with pytest.raises(APIError) as error:
+            create_event('test_calendar_id', self.event_body(9, 11), conflicts='reject')
+
+        assert error.value.status_code == 409
+        mock_service.events().insert.assert_not_called()
+
+    @patch('src.services.conflicts.get_service')
+    @patch('src.services.event.get_service')
+    def test_flag(self, mock_get_service, mock_conflicts_service):
+        mock_conflicts_service.return_value = self.mock_service(mock_get_service)
+
+        event = create_event('test_calendar_id', self.event_body(9, 11), conflicts='flag')
+        other = create_event(
+            'test_calendar_id', self.event_body(10, 12), conflicts='flag'
+        )
+
+        assert [conflict['id'] for conflict in event['conflicts']] == ['existing']
+        # The created event is indexed for the next check
+        assert [conflict['id'] for conflict in other['conflicts']] == ['created-09']
+
+    def test_unknown_mode(self):
+        with pytest.raises(ParameterError):
+            create_event('test_calendar_id', self.event_body(9, 11), conflicts='maybe')
+
+
+class TestServicesEventStats(object):
+    """Tests for src.services.stats"""
+
+    def test_compute_event_stats(self):
+        events = [
+            dict(summary_event('Gym', days_ago=3), duration=1.0),
+            dict(summary_event('Lunch', days_ago=2), duration=0.5),
+            dict(summary_event('Gym', days_ago=1), duration=2.0),
+        ]
+
+        stats = compute_event_stats(events)
+
+        assert stats['total_events'] == 3
+        assert stats['total_hours'] == 3.5
+        gym, lunch = stats['summaries']
+        assert gym['summary'] == 'Gym'
+        assert gym['count'] == 2
+        assert gym['total_hours'] == 3.0
+        assert gym['mean_hours'] == 1.5
+        assert gym['first_start'] == events[0]['start']['dateTime']
+        assert gym['last_start'] == events[2]['start']['dateTime']
+        assert lunch['count'] == 1
+
+    @patch('src.services.stats.sync_calendar')
+    @patch('src.services.stats.get_service')
+    def test_event_stats_are_cached_until_events_change(
+        self, mock_get_service, mock_sync_calendar, event_store
+    ):
+        mock_get_service.return_value = MagicMock()
+        events = [dict(summary_event('Gym'), duration=1.0)]
+        event_store.replace('test_calendar_id', [], 'sync-token')
+
+        with patch(
+            'src.services.stats.list_events', return_value=(events, None, None)
+        ) as mock_list_events:
+            first = get_event_stats('test_calendar_id', '2025-01-01', '2025-02-01')
+            second = get_event_stats('test_calendar_id', '2025-01-01', '2025-02-01')
+            store_event('test_calendar_id', summary_event('Gym'))
+            get_event_stats('test_calendar_id', '2025-01-01', '2025-02-01')
+
+        assert first == second
+        assert first['summaries'][0]['count'] == 1
+        assert mock_list_events.call_count == 2
+        assert mock_sync_calendar.call_count == 3
+
+    @patch('src.services.stats.get_service')
+    def test_event_stats_are_stale_after_a_sync_brings_changes(
+        self, mock_get_service, event_store
+    ):
+        mock_get_service.return_value = MagicMock()
+        events = [dict(summary_event('Gym'), duration=1.0)]
+
+        def sync_calendar(service, calendar_id):
+            # The changes reach the store directly, no change listener runs
+            event_store.apply(calendar_id, [summary_event('Gym')], [], 'sync-token')
+
+        with (
+            patch(
+                'src.services.stats.list_events', return_value=(events, None, None)
+            ) as mock_list_events,
+            patch('src.services.stats.sync_calendar', side_effect=sync_calendar),
+        ):
+            get_event_stats('test_calendar_id', '2025-01-01', '2025-02-01')
+            get_event_stats('test_calendar_id', '2025-01-01', '2025-02-01')
+
+        assert mock_list_events.call_count == 2
@@ -0,0 +1,194 @@
+from datetime import datetime, timezone
+
+from src.calendar_index import CalendarIndexes
+from src.summary_index import SummaryIndex
+
+DAY = 24 * 3600
+NOW = datetime(2025, 3, 1, tzinfo=timezone.utc).timestamp()
+
+
+def from_now(days) -> datetime:
+    """Returns the time days days after NOW."""
+    return datetime.fromtimestamp(NOW + days * DAY, tz=timezone.utc)
+
+
+def make_index(events, window_days=30):
+    return SummaryIndex(window_days * DAY, NOW + 3650 * DAY, events, NOW)
+
+
+class TestSummaryIndex(object):
+    """Tests for src.summary_index"""
+
+    def test_top_and_recent(self, make_event):
+        index = make_index(
+            [
+                make_event('1', from_now(-5), summary='Gym'),
+                make_event('2', from_now(-4), summary='Work'),
+                make_event('3', from_now(-3), summary='Gym'),
+                make_event('4', from_now(-2), summary='Lunch'),
+                make_event('5', from_now(-1), summary='Gym'),
+                make_event('6', from_now(-40), summary='Work'),
+                make_event('7', from_now(2), summary='Future'),
+            ]
+        )
+
+        assert index.top(10, NOW) == [('Gym', 3), ('Work', 1), ('Lunch', 1)]
+        assert index.top(1, NOW) == [('Gym', 3)]
+        assert index.recent(10, NOW) == ['Gym', 'Lunch', 'Work']
+        assert index.recent(2, NOW) == ['Gym', 'Lunch']
+        assert index.recent(0, NOW) == []
+        assert len(index) == 7
+
+    def test_load_matches_applied_events(self, make_event):
+        events = [
+            make_event(str(i), from_now(-i % 45 + 1), summary=f'Event {i % 7}')
+            for i in range(200)
+        ]
+        loaded = make_index(events)
+        applied = make_index([])
+        applied.apply(
+            changed=sorted(events, key=lambda event: event['start']['dateTime'])
+        )
+
+        assert len(loaded) == len(applied) == 200
+        assert loaded.top(10, NOW) == applied.top(10, NOW)
+        assert loaded.recent(10, NOW) == applied.recent(10, NOW)
+        assert loaded.suggest('ev', 10, NOW) == applied.suggest('ev', 10, NOW)
+        assert loaded.top(10, NOW + 10 * DAY) == applied.top(10, NOW + 10 * DAY)
+
+    def test_apply_changes(self, make_event):
+        index = make_index(
+            [
+                make_event('1', from_now(-3), summary='Gym'),
+                make_event('2', from_now(-1), summary='Gym'),
+                make_event('3', from_now(-2), summary='Work'),
+            ]
+        )
+
+        # The most recent Gym event is renamed, then a Work event is deleted
+        index.apply(
+            changed=[make_event('2', from_now(-1), summary='Swim')], deleted=['3']
+        )
+
+        assert index.top(10, NOW) == [('Gym', 1), ('Swim', 1)]
+        assert index.recent(10, NOW) == ['Swim', 'Gym']
+
+        index.apply(deleted=['2', 'unknown'])
+        assert index.top(10, NOW) == [('Gym', 1)]
+        assert index.recent(10, NOW) == ['Gym']
+
+    def test_sliding_window(self, make_event):
+        index = make_index(
+            [
+                make_event('1', from_now(-20), summary='Gym'),
+                make_event('2', from_now(-10), summary='Work'),
+                make_event('3', from_now(5), summary='Lunch'),
+            ]
+        )
+        assert index.top(10, NOW) == [('Gym', 1), ('Work', 1)]
+
+        # Gym ages out and Lunch has started
+        later = NOW + 15 * DAY
+        assert index.top(10, later) == [('Work', 1), ('Lunch', 1)]
+        assert index.recent(10, later) == ['Lunch', 'Work']
+
+        # Far enough that every event aged out
+        assert index.top(10, NOW + 100 * DAY) == []
+        assert index.recent(10, NOW + 100 * DAY) == []
+
+    def test_suggest(self, make_event):
+        index = make_index(
+            [
+                make_event('1', from_now(-20), summary='Evening gym'),
+                make_event('2', from_now(-19), summary='Evening gym'),
+                make_event('3', from_now(-18), summary='Evening gym'),
+                make_event('4', from_now(-1), summary='Gym'),
+                make_event('5', from_now(-2), summary='Groceries'),
+                make_event('6', from_now(-3), summary='Work'),
+            ]
+        )
+
+        suggestions = index.suggest('GY', 10, NOW)
+        # Three older events outrank one recent event
+        assert [summary for summary, _, _ in suggestions] == ['Evening gym', 'Gym']
+        assert suggestions[1] == ('Gym', 1, NOW - DAY)
+        assert [summary for summary, _, _ in index.suggest('g', 10, NOW)] == [
+            'Evening gym',
+            'Gym',
+            'Groceries',
+        ]
+        assert [summary for summary, _, _ in index.suggest('evening g', 10, NOW)] == [
+            'Evening gym'
+        ]
+        assert len(index.suggest('', 2, NOW)) == 2
+        assert index.suggest('x', 10, NOW) == []
+
+        # Summaries without events in the window are not suggested
+        index.apply(deleted=['4'])
+        assert [summary for summary, _, _ in index.suggest('gym', 10, NOW)] == [
+            'Evening gym'
+        ]
+        assert index.suggest('evening', 10, NOW + 30 * DAY) == []
+
+    def test_expired(self):
+        index = make_index([])
+        assert not index.expired(NOW)
+        assert index.expired(NOW + 3650 * DAY)
+
+
+class TestCalendarIndexes(object):
+    """Tests for src.calendar_index"""
+
+    def test_get_loads_once(self):
+        indexes = CalendarIndexes()
+        index = make_index([])
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return index
+
+        assert indexes.get('calendar', loader) is index
+        assert indexes.get('calendar', loader) is index
+        assert len(loads) == 1
+
+    def test_apply_changes(self, make_event):
+        indexes = CalendarIndexes()
+        index = indexes.get('calendar', lambda: make_index([]))
+
+        indexes.apply_changes(
+            'calendar', [make_event('1', from_now(-1), summary='Gym')], [], False
+        )
+        indexes.apply_changes(
+            'other', [make_event('2', from_now(-1), summary='Work')], [], False
+        )
+        assert index.top(10, NOW) == [('Gym', 1)]
+        assert indexes.stats() == {'calendars': 1, 'events': 1}
+
+        # A full sync replaces the events, the index is loaded again
+        indexes.apply_changes('calendar', [], [], True)
+        assert indexes.stats() == {'calendars': 0, 'events': 0}
+
+    def test_store_version(self, make_event):
+        indexes = CalendarIndexes()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return make_index([])
+
+        index = indexes.get('calendar', loader, 1)
+        # Changes written by this process keep the index up to date
+        indexes.apply_changes(
+            'calendar', [make_event('1', from_now(-1), summary='Gym')], [], False, 2
+        )
+        assert indexes.get('calendar', loader, 2) is index
+        assert index.top(10, NOW) == [('Gym', 1)]
+
+        # Another worker wrote version 3, the index is loaded again
+        assert indexes.get('calendar', loader, 3) is not index
+        assert len(loads) == 2
+        indexes.apply_changes(
+            'calendar', [make_event('2', from_now(-1), summary='Work')], [], False, 5
+        )
+        assert indexes.stats() == {'calendars': 0, 'events': 0}
@@ -0,0 +1,230 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.event_store import (
+    MemoryEventStore,
+    SQLiteEventStore,
+    matches_query,
+    to_rfc3339,
+    to_timestamp,
+)
+from src.sync import CACHE_HIT, CACHE_MISS, store_event, sync_calendar
+
+CALENDAR_ID = 'test_calendar_id'
+
+
+def stored_ids(event_store):
+    return [event['id'] for event in event_store.query(CALENDAR_ID, 0, 2**32)]
+
+
+@pytest.fixture
+def service():
+    return MagicMock()
+
+
+class TestSync(object):
+    """Tests for src.sync"""
+
+    def test_full_sync_stores_events_and_sync_token(
+        self, service, event_store, make_event
+    ):
+        service.events().list().execute.side_effect = [
+            {'items': [make_event('b', 2)], 'nextPageToken': 'page-2'},
+            {'items': [make_event('a', 1)], 'nextSyncToken': 'sync-1'},
+        ]
+
+        sync_calendar(service, CALENDAR_ID)
+
+        assert stored_ids(event_store) == ['a', 'b']
+        assert event_store.get_sync_state(CALENDAR_ID)[0] == 'sync-1'
+        assert 'duration' in list(event_store.query(CALENDAR_ID, 0, 2**32))[0]
+
+    def test_incremental_sync_applies_changes(self, service, event_store, make_event):
+        service.events().list().execute.side_effect = [
+            {'items': [make_event('a', 1), make_event('b', 2)], 'nextSyncToken': 's1'},
+            {
+                'items': [
+                    {'id': 'a', 'status': 'cancelled'},
+                    make_event('b', 3, summary='Moved'),
+                    make_event('c', 4),
+                ],
+                'nextSyncToken': 's2',
+            },
+        ]
+
+        sync_calendar(service, CALENDAR_ID)
+        sync_calendar(service, CALENDAR_ID, force=True)
+
+        assert stored_ids(event_store) == ['b', 'c']
+        assert list(event_store.query(CALENDAR_ID, 0, 2**32))[0]['summary'] == 'Moved'
+        assert event_store.get_sync_state(CALENDAR_ID)[0] == 's2'
+        assert service.events().list.call_args.kwargs['syncToken'] == 's1'
+
+    def test_expired_sync_token_runs_full_sync(self, service, event_store, make_event):
+        service.events().list().execute.side_effect = [
+            {'items': [make_event('a', 1)], 'nextSyncToken': 's1'},
+            HttpError(MagicMock(status=410), b'Gone'),
+            {'items': [make_event('b', 2)], 'nextSyncToken': 's2'},
+        ]
+
+        assert sync_calendar(service, CALENDAR_ID) == CACHE_MISS
+        assert sync_calendar(service, CALENDAR_ID, force=True) == CACHE_MISS
+
+        assert stored_ids(event_store) == ['b']
+        assert event_store.get_sync_state(CALENDAR_ID)[0] == 's2'
+
+    def test_recent_sync_is_not_repeated(self, service, make_event):
+        service.events().list().execute.return_value = {
+            'items': [make_event('a', 1)],
+            'nextSyncToken': 's1',
+        }
+
+        with patch('src.sync.SYNC_INTERVAL', 60):
+            assert sync_calendar(service, CALENDAR_ID) == CACHE_MISS
+            assert sync_calendar(service, CALENDAR_ID) == CACHE_HIT
+
+        assert service.events().list().execute.call_count == 1
+
+    def test_recurring_event_is_not_stored(self, event_store, make_event):
+        event_store.replace(CALENDAR_ID, [], 's1')
+        store_event(CALENDAR_ID, make_event('a', 1))
+        store_event(CALENDAR_ID, make_event('b', 2, recurrence=['RRULE:FREQ=WEEKLY']))
+
+        # The instances of the recurring event come with the next sync
+        assert stored_ids(event_store) == ['a']
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryEventStore()
+    return SQLiteEventStore(str(tmp_path / 'events.sqlite3'))
+
+
+class TestEventStore(object):
+    """Tests for the event stores of src.event_store"""
+
+    def test_query_returns_overlapping_events(self, store, make_event):
+        store.replace(
+            CALENDAR_ID, [make_event('a', 1), make_event('b', 2), make_event('c', 3)], 's'
+        )
+        start = to_timestamp(make_event('x', 2)['start'])
+        end = to_timestamp(make_event('x', 3)['start'])
+
+        events = store.query(CALENDAR_ID, start, end)
+
+        assert [event['id'] for event in events] == ['b']
+
+    def test_query_finds_events_that_start_long_before(self, store, make_event):
+        store.replace(
+            CALENDAR_ID,
+            [make_event('long', 2, 24 * 5), make_event('a', 3), make_event('b', 6)],
+            's',
+        )
+        start = to_timestamp(make_event('x', 6)['start'])
+        end = to_timestamp(make_event('x', 7)['start'])
+
+        assert [event['id'] for event in store.query(CALENDAR_ID, start, end)] == [
+            'long',
+            'b',
+        ]
+
+        # A longer event that an update brings in is found as well
+        store.apply(CALENDAR_ID, [make_event('longer', 1, 24 * 10)], ['long'], 's2')
+        store.upsert(CALENDAR_ID, make_event('a', 5, 30))
+
+        events = store.query(CALENDAR_ID, start, end, descending=True)
+        assert [event['id'] for event in events] == ['b', 'a', 'longer']
+
+    def test_query_descending(self, store, make_event):
+        events = [make_event('b', 1), make_event('a', 1), make_event('c', 2)]
+        store.replace(CALENDAR_ID, events, 's')
+
+        ascending = store.query(CALENDAR_ID, 0, 2**32)
+        descending = store.query(CALENDAR_ID, 0, 2**32, descending=True)
+
+        assert [event['id'] for event in ascending] == ['a', 'b', 'c']
+        assert [event['id'] for event in descending] == ['c', 'b', 'a']
+
+    def test_upsert_and_delete(self, store, make_event):
+        store.replace(CALENDAR_ID, [make_event('a', 1)], 's')
+        store.upsert(CALENDAR_ID, make_event('b', 2))
+        store.delete(CALENDAR_ID, 'a')
+        # Events of calendars that were never synced are not stored
+        store.upsert('other_calendar_id', make_event('c', 3))
+
+        assert [event['id'] for event in store.query(CALENDAR_ID, 0, 2**32)] == ['b']
+        assert list(store.query('other_calendar_id', 0, 2**32)) == []
+
+    def test_delete_many(self, store, make_event):
+        events = [make_event('a', 1), make_event('b', 2), make_event('c', 3)]
+        store.replace(CALENDAR_ID, events, 's')
+        store.delete_many(CALENDAR_ID, ['a', 'c', 'missing'])
+
+        assert [event['id'] for event in store.query(CALENDAR_ID, 0, 2**32)] == ['b']
+
+    def test_clear_forgets_sync_state(self, store, make_event):
+        store.replace(CALENDAR_ID, [make_event('a', 1)], 's')
+        store.clear(CALENDAR_ID)
+
+        assert store.get_sync_state(CALENDAR_ID) == (None, None)
+        assert list(store.query(CALENDAR_ID, 0, 2**32)) == []
+
+    def test_version_moves_with_writes(self, store, make_event):
+        assert store.get_version(CALENDAR_ID) == 0
+        assert store.replace(CALENDAR_ID, [make_event('a', 1)], 's') == 1
+        assert store.upsert(CALENDAR_ID, make_event('b', 2)) == 2
+        assert store.apply(CALENDAR_ID, [make_event('c', 3)], ['a', 'b'], 's2') == 3
+        # Writes that change nothing leave the version
+        assert store.delete_many(CALENDAR_ID, ['missing']) is None
+        assert store.upsert('other_calendar_id', make_event('d', 4)) is None
+
+        store.clear()
+
+        assert store.get_version(CALENDAR_ID) == 4
+        assert store.get_version('other_calendar_id') == 0
+
+    def test_sqlite_store_survives_restart(self, tmp_path, make_event):
+        path = str(tmp_path / 'events.sqlite3')
+        SQLiteEventStore(path).replace(CALENDAR_ID, [make_event('a', 1)], 's')
+
+        store = SQLiteEventStore(path)
+
+        assert store.get_sync_state(CALENDAR_ID)[0] == 's'
+        assert [event['id'] for event in store.query(CALENDAR_ID, 0, 2**32)] == ['a']
+
+    def test_sqlite_store_backfills_durations(self, tmp_path, make_event):
+        path = str(tmp_path / 'events.sqlite3')
+        old_store = SQLiteEventStore(path)
+        old_store.replace(CALENDAR_ID, [make_event('a', 1, 48)], 's')
+        # A database written before the durations were kept
+        with old_store._connect() as connection:
+            connection.execute('DELETE FROM durations')
+
+        store = SQLiteEventStore(path)
+        start = to_timestamp(make_event('x', 2)['start'])
+
+        assert [event['id'] for event in store.query(CALENDAR_ID, start, 2**32)] == ['a']
+
+    def test_matches_query(self):
+        event = {'summary': 'Weekly Meeting', 'location': 'Helsinki'}
+
+        assert matches_query(event, 'meeting helsinki')
+        assert not matches_query(event, 'meeting tampere')
+
+    def test_to_timestamp_uses_the_event_time_zone(self):
+        with_offset = {'dateTime': '2025-07-01T10:00:00+03:00'}
+        helsinki = {'dateTime': '2025-07-01T10:00:00', 'timeZone': 'Europe/Helsinki'}
+        new_york = {'dateTime': '2025-07-01T03:00:00', 'timeZone': 'America/New_York'}
+
+        assert to_timestamp(helsinki) == to_timestamp(with_offset)
+        assert to_timestamp(new_york) == to_timestamp(with_offset)
+        assert to_rfc3339(to_timestamp(with_offset)) == '2025-07-01T07:00:00+00:00'
+
+    @patch('src.event_store.TIMEZONE', 'Asia/Tokyo')
+    def test_to_timestamp_defaults_to_the_configured_time_zone(self):
+        local = {'dateTime': '2025-07-01T16:00:00'}
+
+        assert to_rfc3339(to_timestamp(local)) == '2025-07-01T07:00:00+00:00'
@@ -1,9 +1,18 @@
+import time
 from unittest.mock import patch
 
 import pytest
+from prompt_toolkit.document import Document
 
+from src.error import APIError
+from src.summary_index import SummaryIndex
 from src.utils import format_str_datetime_to_iso
-from terminal import custom, fast
+from terminal import SummaryCompleter, custom, fast, get_summary
+
+SUMMARIES = [
+    ('Summary1', 3, 1696845600.0),
+    ('Summary2', 2, 1696759200.0),
+]
 
 
 # Mock constants and services
@@ -17,10 +26,10 @@ def mock_constants():
 def mock_services():
     with (
         patch('terminal.get_calendar_list') as mock_get_calendar_list,
-        patch('terminal.get_recent_unique_events') as mock_get_recent_unique_events,
+        patch('terminal.get_summary_index') as mock_get_summary_index,
         patch('terminal.create_event') as mock_create_event,
     ):
-        yield mock_get_calendar_list, mock_get_recent_unique_events, mock_create_event
+        yield mock_get_calendar_list, mock_get_summary_index, mock_create_event
 
 
 # Test format_datetime
@@ -31,16 +40,57 @@ def test_format_datetime():
     assert format_str_datetime_to_iso(datetime_str, timezone_str) == expected
 
 
+def test_summary_completer():
+    """Test that the completions replace the typed text with the summaries."""
+    now = time.time()
+    events = [
+        {
+            'id': '1',
+            'summary': 'Evening gym',
+            'start': {'dateTime': '2023-10-09T18:00:00Z'},
+        },
+        {'id': '2', 'summary': 'Work', 'start': {'dateTime': '2023-10-09T08:00:00Z'}},
+    ]
+    index = SummaryIndex(now, now + 3600, events, now)
+
+    completions = list(SummaryCompleter(index).get_completions(Document('gy'), None))
+
+    assert [completion.text for completion in completions] == ['Evening gym']
+    assert completions[0].start_position == -2
+
+
+def test_get_summary_loads_index_once(mock_services):
+    """Test that the summary index is loaded before the prompt, not per key press."""
+    _, mock_get_summary_index, _ = mock_services
+    mock_get_summary_index.return_value.suggest.return_value = SUMMARIES
+
+    with patch('InquirerPy.inquirer.text') as mock_text:
+        mock_text.return_value.execute.return_value = 'Summary1'
+
+        assert get_summary('test_calendar_id') == 'Summary1'
+
+    mock_get_summary_index.assert_called_once_with('test_calendar_id')
+    completer = mock_text.call_args.kwargs['completer']
+    assert completer.index is mock_get_summary_index.return_value
+
+
+def test_get_summary_without_suggestions(mock_services):
+    """Test that the summary can be typed when the summary index fails to load."""
+    _, mock_get_summary_index, _ = mock_services
+    mock_get_summary_index.side_effect = APIError(500, 'Google Calendar API Error')
+
+    with patch('InquirerPy.inquirer.text') as mock_text:
+        mock_text.return_value.execute.return_value = 'Summary1'
+
+        assert get_summary('test_calendar_id') == 'Summary1'
+
+    assert mock_text.call_args.kwargs['completer'] is None
+
+
 def test_fast(mock_services):
     """Test fast function with print_event_details"""
-    mock_get_calendar_list, mock_get_recent_unique_events, mock_create_event = (
-        mock_services
-    )
-    mock_get_recent_unique_events.return_value = [
-        'Summary1',
-        'Summary2',
-        'Summary3',
-    ]
+    mock_get_calendar_list, mock_get_summary_index, mock_create_event = mock_services
+    mock_get_summary_index.return_value.suggest.return_value = SUMMARIES
     mock_create_event.return_value = {
         'summary': 'Test Event',
         'description': 'Test Description',
@@ -71,14 +121,8 @@ def test_fast(mock_services):
 @patch('builtins.input', lambda: '10:15')  # Mock start time input
 def test_custom(mock_services):
     """Test custom function with print_event_details."""
-    mock_get_calendar_list, mock_get_recent_unique_events, mock_create_event = (
-        mock_services
-    )
-    mock_get_recent_unique_events.return_value = [
-        'Summary1',
-        'Summary2',
-        'Summary3',
-    ]
+    mock_get_calendar_list, mock_get_summary_index, mock_create_event = mock_services
+    mock_get_summary_index.return_value.suggest.return_value = SUMMARIES
     mock_create_event.return_value = {
         'summary': 'Test Event',
         'description': 'Test Description',
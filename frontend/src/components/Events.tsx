@@ -62,7 +62,7 @@ const Events = ({
     const result = window.confirm(`Update event: ${event.summary}?`)
     if (result) {
       eventService
-        .update(calendarId, event.id, request_body)
+        .update(calendarId, event.id, request_body, event.etag)
         .then((updatedEvent: Event) => {
           console.log('Event updated:', updatedEvent)
           const updatedEvents = events.map((e) =>
@@ -28,10 +28,13 @@ const remove = (calendar_id: string, event_id: string): Promise<void> => {
 const update = (
   calendar_id: string,
   event_id: string,
-  request_body: UpdateEventRequestBody
+  request_body: UpdateEventRequestBody,
+  etag?: string
 ): Promise<Event> => {
   const url = `${serviceUrl}/${calendar_id}/${event_id}`
-  const request = apiClient.put(url, request_body)
+  // The update fails with 412 if the event was modified since it was fetched
+  const headers = etag ? { 'If-Match': etag } : {}
+  const request = apiClient.put(url, request_body, { headers })
   console.log('Updating event:', url)
   return request.then((response) => response.data)
 }
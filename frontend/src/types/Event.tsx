@@ -7,6 +7,7 @@ interface Event {
 
   // Optional API properties for request body
   id: string
+  etag: string // Version of the event, sent back on update (If-Match)
   summary: string
   description: string
   htmlLink: string
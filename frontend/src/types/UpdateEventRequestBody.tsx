@@ -1,5 +1,12 @@
+import EventTime from './EventTime'
+
+// Only the given fields are updated (PATCH semantics)
 type UpdateEventRequestBody = {
-  summary: string
+  summary?: string
+  description?: string
+  location?: string
+  start?: EventTime
+  end?: EventTime
 }
 
 export default UpdateEventRequestBody